@@ -2,9 +2,11 @@
 API 模块 - FastAPI Web 服务
 """
 from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
+import asyncio
 import uuid
 import logging
 
@@ -78,6 +80,17 @@ class HealthResponse(BaseModel):
 
 # ==================== FastAPI 应用 ====================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期: 退出时关闭共享 HTTP 连接池与 PDF 解析进程池"""
+    yield
+    from ops.http_pool import close_http_pool
+    from ops.parser.pool import close_pdf_pool
+    
+    await close_http_pool()
+    await asyncio.to_thread(close_pdf_pool)
+
+
 def create_app() -> FastAPI:
     """创建 FastAPI 应用"""
     app = FastAPI(
@@ -85,7 +98,8 @@ def create_app() -> FastAPI:
         description="AI-Driven Electronic Component Selection Engine API",
         version="0.1.0",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        lifespan=lifespan,
     )
     
     # CORS
@@ -124,6 +138,27 @@ def create_app() -> FastAPI:
             }
         )
     
+    @app.get("/api/v1/metrics", tags=["System"])
+    async def metrics():
+        """
+        运行指标
+        
+        包含请求合并 (single-flight) 计数、各数据源限流与熔断状态、延迟分位等。
+        """
+        from ops.latency import latency_stats
+        from ops.parser.cache import datasheet_cache_stats
+        from ops.ratelimit import limiter_stats
+        from ops.resilience import breaker_stats
+        from ops.singleflight import singleflight_stats
+        
+        return {
+            "breakers": breaker_stats(),
+            "datasheet_cache": datasheet_cache_stats(),
+            "latency": latency_stats(),
+            "rate_limits": limiter_stats(),
+            "singleflight": singleflight_stats(),
+        }
+    
     @app.post("/api/v1/select", response_model=SelectResponse, tags=["Selection"])
     async def select_component(request: SelectRequest):
         """
@@ -198,8 +233,11 @@ def create_app() -> FastAPI:
         """
         解析 Datasheet
         
-        提取关键参数并生成通俗易懂的摘要。
+        提取关键参数并生成通俗易懂的摘要。相同内容的 datasheet 直接返回缓存的解析结果。
         """
+        if not request.url and not request.content:
+            raise HTTPException(status_code=400, detail="url or content required")
+        
         try:
             from ops.config import Config
             from ops.parser import DatasheetParser
@@ -209,21 +247,24 @@ def create_app() -> FastAPI:
             
             if request.url:
                 result = await parser.parse_url(request.url)
-            elif request.content:
-                result = await parser.parse_text(request.content)
             else:
-                raise HTTPException(status_code=400, detail="url or content required")
-            
-            summary = await parser.generate_summary(result)
-            
-            return DatasheetParseResponse(
-                part_number=result.get("part_number"),
-                parameters=result.get("parameters", {}),
-                summary=summary
-            )
+                result = await parser.parse_text(request.content)
         except Exception as e:
             logger.error(f"Parse error: {e}")
             raise HTTPException(status_code=500, detail=str(e))
+        
+        if result is None:
+            raise HTTPException(status_code=422, detail="datasheet could not be parsed")
+        
+        return DatasheetParseResponse(
+            part_number=result.part_number,
+            parameters={
+                **result.specifications,
+                "package": result.package,
+                "manufacturer": result.manufacturer,
+            },
+            summary=result.summary
+        )
     
     @app.post("/api/v1/bom/generate", response_model=BomResponse, tags=["BOM"])
     async def generate_bom(request: BomGenerateRequest):
@@ -266,17 +307,15 @@ def create_app() -> FastAPI:
         """
         搜索元器件
         
-        在知识库中搜索匹配的元器件。
+        在知识库中搜索匹配的元器件 (BM25 关键词 + 向量相似度混合检索)。
         """
         try:
-            from ops.config import Config
-            from ops.knowledge import VectorStore
+            from ops.knowledge import get_vector_store
             
-            config = Config.load()
-            store = VectorStore(config)
-            await store.initialize()
+            store = await get_vector_store()
             
-            results = await store.search(q, limit=limit)
+            filters = {"category": category} if category else None
+            results = await store.hybrid_search(q, filters=filters, limit=limit)
             return {"results": results}
         except Exception as e:
             logger.error(f"Search error: {e}")
@@ -11,6 +11,7 @@ import time
 import re
 import logging
 from datetime import datetime
+from pathlib import Path
 from typing import List, Dict, Optional, Any
 from urllib.parse import quote
 from functools import wraps
@@ -18,6 +19,7 @@ from functools import wraps
 # 配置
 BASE_URL = "https://www.lcsc.com"
 SEARCH_URL = f"{BASE_URL}/search"
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"  # 与运行目录无关
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
@@ -34,6 +36,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 可选: 复用 ops 的磁盘响应缓存和限流器 (在仓库根目录以 python -m backend.scraper 运行)
+try:
+    from ops.cache import CachedResponse, ResponseCache, get_response_cache, is_cacheable
+    from ops.config import Config
+    from ops.ratelimit import AdaptiveLimiter, get_limiter
+except ImportError as e:
+    logger.warning(f"ops 不可用 ({e})，不使用响应缓存，请求间隔固定 1 秒")
+    ResponseCache = None
+    get_limiter = None
+
 # 重试配置
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds
@@ -109,10 +121,52 @@ def get_text_safe(element: Optional[Any], default: str = "") -> str:
     return default
 
 
+_response_cache = None
+
+
+def get_cache() -> Optional["ResponseCache"]:
+    """获取磁盘响应缓存 (未安装 ops 依赖或配置关闭时返回 None)"""
+    global _response_cache
+    if _response_cache is None and ResponseCache is not None:
+        try:
+            _response_cache = get_response_cache(Config.load())
+        except Exception as e:
+            logger.warning(f"响应缓存不可用: {e}")
+    return _response_cache
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter() -> Optional["AdaptiveLimiter"]:
+    """获取 LCSC 网页的限流器 (与搜索引擎共用 ops.ratelimit 的令牌桶 + AIMD)"""
+    global _rate_limiter
+    if _rate_limiter is None and get_limiter is not None:
+        try:
+            _rate_limiter = get_limiter("lcsc_web")
+        except Exception as e:
+            logger.warning(f"限流器不可用: {e}")
+    return _rate_limiter
+
+
+def _get(url: str, headers: Dict[str, str], timeout: int) -> requests.Response:
+    """发送 GET 请求 (有限流器时按配额等待，并把响应状态反馈给限流器)"""
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return requests.get(url, headers=headers, timeout=timeout)
+    with limiter.slot_sync() as outcome:
+        response = requests.get(url, headers=headers, timeout=timeout)
+        outcome.record(response)
+        return response
+
+
 @retry_on_failure(max_retries=3, delay=2)
 def fetch_url(url: str, timeout: int = 30) -> Optional[str]:
     """
-    获取 URL 内容（带重试机制）
+    获取 URL 内容（带重试机制和磁盘缓存）
+    
+    缓存未过期时直接返回；过期后带 If-None-Match / If-Modified-Since
+    重新验证，304 时复用缓存；请求失败时在 stale 窗口内返回旧内容。
     
     Args:
         url: 目标 URL
@@ -121,9 +175,32 @@ def fetch_url(url: str, timeout: int = 30) -> Optional[str]:
     Returns:
         响应文本，失败返回 None
     """
+    cache = get_cache()
+    key = ResponseCache.make_key("GET", url) if cache else None
+    entry = cache.get(key) if cache else None
+    if entry is not None and cache.is_fresh(entry):
+        logger.info(f"Cache hit: {url}")
+        return entry.text
+    
+    headers = dict(HEADERS)
+    if entry is not None:
+        headers.update(entry.validators())
+    
     logger.info(f"Fetching: {url}")
-    response = requests.get(url, headers=HEADERS, timeout=timeout)
-    response.raise_for_status()
+    try:
+        response = _get(url, headers, timeout)
+        if entry is not None and response.status_code == 304:
+            cache.touch(key, {k.lower(): v for k, v in response.headers.items()})
+            return entry.text
+        response.raise_for_status()
+    except requests.RequestException as e:
+        if entry is not None and cache.is_servable_stale(entry):
+            logger.warning(f"请求失败，使用过期缓存: {url} ({e})")
+            return entry.text
+        raise
+    
+    if cache is not None and is_cacheable(response.status_code, response.headers):
+        cache.put(key, CachedResponse.from_response(response))
     return response.text
 
 
@@ -356,8 +433,9 @@ def scrape_all_popular() -> Dict[str, Any]:
                 "status": "not_found"
             })
         
-        # 礼貌性延迟
-        time.sleep(1)
+        # 礼貌性延迟 (启用限流器时由令牌桶控制节奏)
+        if get_rate_limiter() is None:
+            time.sleep(1)
     
     end_time = datetime.now()
     print("\n" + "=" * 60)
@@ -390,11 +468,11 @@ def main() -> None:
     data = scrape_all_popular()
     
     # 保存数据
-    save_to_json(data, "../data/parts.json")
+    save_to_json(data, str(DATA_DIR / "parts.json"))
     
     # 同时保存一份带时间戳的版本
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    save_to_json(data, f"../data/parts_{timestamp}.json")
+    save_to_json(data, str(DATA_DIR / f"parts_{timestamp}.json"))
     
     print("\n📋 爬取摘要:")
     for part in data['parts']:
@@ -24,7 +24,7 @@ from datetime import datetime, timezone
 from .config import Config
 from .search import SearchEngine
 from .parser import DatasheetParser
-from .knowledge import VectorStore
+from .prefetch import EnrichmentPrefetcher
 from . import database
 
 logger = logging.getLogger(__name__)
@@ -111,7 +111,6 @@ class Agent:
         self.config = config or Config.load()
         self.search_engine = SearchEngine(self.config)
         self.datasheet_parser = DatasheetParser()
-        self.knowledge_base = VectorStore(self.config)
         self._initialized = False
     
     async def initialize(self):
@@ -298,21 +297,32 @@ class Agent:
                 logger.error(f"Search failed: {search_error}")
                 candidates = []
             
-            # 3. 分析与排序
-            results = await self._analyze_and_rank(candidates, parsed_query)
-            
-            # 4. 获取替代料
-            for result in results:
-                try:
-                    alternatives = await self.search_engine.get_alternatives(result.part_number)
-                    result.alternatives = [a["part_number"] for a in alternatives[:3]]
-                except Exception as alt_error:
-                    logger.debug(f"Could not fetch alternatives: {alt_error}")
+            # 3. 投机预取: 搜索一返回就为可能的 top-k 启动价格/替代料查询
+            prefetcher = EnrichmentPrefetcher(
+                self.search_engine,
+                max_concurrency=self.config.prefetch_concurrency
+            )
+            try:
+                prefetcher.start(EnrichmentPrefetcher.likely_top_k(candidates, top_k))
+                
+                # 4. 分析与排序 (复用预取结果)
+                results = await self._analyze_and_rank(candidates, parsed_query, prefetcher)
+                
+                # 5. 取消跌出 top-k 的投机任务，获取替代料
+                prefetcher.retain(r.part_number for r in results[:top_k])
+                for result in results[:top_k]:
+                    try:
+                        alternatives = await prefetcher.alternatives(result.part_number)
+                        result.alternatives = [a["part_number"] for a in alternatives[:3]]
+                    except Exception as alt_error:
+                        logger.debug(f"Could not fetch alternatives: {alt_error}")
+            finally:
+                await prefetcher.aclose()
             
-            # 5. 生成分析报告
+            # 6. 生成分析报告
             report = self._generate_report(results[:top_k], query)
             
-            # 6. 生成 BOM
+            # 7. 生成 BOM
             bom = self._generate_bom(results[:top_k])
             
             return SelectionResult(
@@ -339,17 +349,24 @@ class Agent:
     async def _analyze_and_rank(
         self, 
         candidates: List[Dict], 
-        query: Dict
+        query: Dict,
+        prefetcher: Optional[EnrichmentPrefetcher] = None
     ) -> List[SearchResult]:
         """分析并排序候选元器件"""
         results = []
         
-        for candidate in candidates:
+        # 获取价格信息 (并发进行，已预取的直接复用)；全部查询共用同一截止时间，
+        # 排队等待并发槽位也计入其中
+        timeout = self.search_engine.price_timeout()
+        price_infos = await asyncio.gather(*(
+            self._get_price_with_timeout(c.get("part_number", ""), timeout, prefetcher)
+            for c in candidates
+        ))
+        
+        for candidate, price_info in zip(candidates, price_infos):
             specs_dict = candidate.get("specs", {})
             specs = self._parse_specs_dict(specs_dict)
             
-            # 获取价格信息 (带超时)
-            price_info = await self._get_price_with_timeout(candidate.get("part_number", ""))
             price = price_info.get("best_price")
             stock = price_info.get("total_stock", 0)
             
@@ -376,13 +393,27 @@ class Agent:
         
         return results
     
-    async def _get_price_with_timeout(self, part_number: str, timeout: float = 2.0) -> Dict[str, Any]:
-        """带超时的价格获取 (防止网络阻塞)"""
+    async def _get_price_with_timeout(
+        self,
+        part_number: str,
+        timeout: Optional[float] = None,
+        prefetcher: Optional[EnrichmentPrefetcher] = None
+    ) -> Dict[str, Any]:
+        """
+        带超时的价格获取 (防止网络阻塞)，默认超时按近期比价延迟自适应
+
+        经预取器查询时，超时包含排队等待并发槽位的时间；超时后若没有其他等待者则取消
+        查询，释放并发槽位给后续的替代料查询
+        """
+        if timeout is None:
+            timeout = self.search_engine.price_timeout()
+        if prefetcher is not None:
+            lookup = prefetcher.price_result(part_number, timeout, cancel_on_timeout=True)
+        else:
+            lookup = asyncio.wait_for(self.search_engine.compare_prices(part_number), timeout=timeout)
+        
         try:
-            return await asyncio.wait_for(
-                self.search_engine.compare_prices(part_number),
-                timeout=timeout
-            )
+            return await lookup
         except asyncio.TimeoutError:
             logger.warning(f"Price lookup timeout for {part_number}")
             return {"best_price": None, "total_stock": 0}
@@ -0,0 +1,404 @@
+"""
+磁盘 HTTP 响应缓存模块
+Persistent on-disk HTTP response cache (SQLite)
+
+- 按 Config.cache_ttl_hours 判断新鲜度
+- 过期后使用 ETag / Last-Modified 做条件请求，304 时只刷新时间戳
+- stale-while-revalidate: 过期不久的响应先直接返回，后台再重新验证
+- 按总字节数限制大小，超出时按最近访问时间 (LRU) 淘汰
+
+电商平台连接器、DatasheetParser.parse_url 和 backend/scraper.py 共用。
+SQLiteLRUCache / CacheRegistry 也是解析结果缓存与向量缓存的基础。
+"""
+from typing import Any, Callable, Dict, Generic, Optional, Tuple, TypeVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+try:
+    import httpx
+except ImportError:  # 只使用 requests 的环境
+    httpx = None
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedResponse:
+    """
+    缓存的 HTTP 响应
+
+    提供与 httpx.Response 相同的常用接口 (status_code/headers/content/text/json/
+    raise_for_status)，调用方无需区分响应是否来自缓存。
+    """
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    stored_at: float = field(default_factory=time.time)
+    from_cache: bool = False
+    method: str = "GET"  # 只用于 raise_for_status 的异常信息 (错误响应不缓存)
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("etag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get("last-modified")
+
+    @property
+    def age(self) -> float:
+        """缓存时长 (秒)"""
+        return max(0.0, time.time() - self.stored_at)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    @property
+    def encoding(self) -> str:
+        content_type = self.headers.get("content-type", "")
+        if "charset=" in content_type:
+            return content_type.split("charset=")[-1].split(";")[0].strip() or "utf-8"
+        return "utf-8"
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        """4xx/5xx 时抛出 httpx.HTTPStatusError (与 httpx.Response 相同，调用方可按状态码处理)"""
+        if self.status_code < 400:
+            return
+        if httpx is None:
+            raise RuntimeError(f"HTTP {self.status_code} for {self.url}")
+        request = httpx.Request(self.method, self.url)
+        httpx.Response(
+            self.status_code, headers=self.headers, content=self.content, request=request
+        ).raise_for_status()
+
+    @classmethod
+    def from_response(cls, response: Any) -> "CachedResponse":
+        """从 httpx.Response / requests.Response 构造"""
+        try:
+            method = response.request.method
+        except (AttributeError, RuntimeError):  # httpx 未关联请求时抛出 RuntimeError
+            method = "GET"
+        return cls(
+            url=str(response.url),
+            status_code=response.status_code,
+            headers={k.lower(): v for k, v in response.headers.items()},
+            content=response.content,
+            method=method,
+        )
+
+    def validators(self) -> Dict[str, str]:
+        """条件请求头"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def is_cacheable(status_code: int, headers: Dict[str, str]) -> bool:
+    """只缓存 200 且未声明 no-store 的响应"""
+    cache_control = {k.lower(): v for k, v in headers.items()}.get("cache-control", "").lower()
+    return status_code == 200 and "no-store" not in cache_control
+
+
+def serves_stale_on(status_code: int) -> bool:
+    """限流或服务端错误 (429/5xx): 有旧缓存时返回旧缓存 (stale-if-error)"""
+    return status_code == 429 or status_code >= 500
+
+
+class SQLiteLRUCache:
+    """
+    按总字节数限制大小的 SQLite 缓存基类
+
+    子类声明 TABLE、KEY_COLUMNS 和 SCHEMA (表中须有 accessed_at 与 size 列)，
+    只负责自身的表结构与数据编码；连接、锁、LRU 淘汰和命中统计由基类统一提供。
+    LAZY 为真时 SQLite 文件在第一次写入时才创建。
+
+    Args:
+        path: 数据库文件路径
+        max_bytes: 缓存总大小上限 (字节)
+    """
+
+    TABLE = ""
+    KEY_COLUMNS: Tuple[str, ...] = ()
+    SCHEMA = ""
+    LAZY = False
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if not self.LAZY:
+            with self._lock:
+                self._connection(create=True)
+
+    def _connection(self, create: bool) -> Optional[sqlite3.Connection]:
+        """打开数据库 (持有 _lock 时调用)；文件不存在且 create 为 False 时返回 None"""
+        if self._conn is not None:
+            return self._conn
+        if not create and not self.path.exists():
+            return None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.SCHEMA)
+        self._migrate(conn)
+        self._conn = conn
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """升级旧版本的表结构 (子类按需覆盖)"""
+
+    def _size_locked(self, conn: sqlite3.Connection) -> int:
+        return conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()[0]
+
+    def _evict_locked(self, conn: sqlite3.Connection) -> None:
+        """超出上限时按 LRU 淘汰到上限的 90%"""
+        total = self._size_locked(conn)
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        keys = ", ".join(self.KEY_COLUMNS)
+        rows = conn.execute(
+            f"SELECT {keys}, size FROM {self.TABLE} ORDER BY accessed_at ASC"
+        ).fetchall()
+        victims = []
+        for *key, size in rows:
+            if total <= target:
+                break
+            victims.append(tuple(key))
+            total -= size
+        where = " AND ".join(f"{column} = ?" for column in self.KEY_COLUMNS)
+        conn.executemany(f"DELETE FROM {self.TABLE} WHERE {where}", victims)
+        self.evictions += len(victims)
+        logger.debug(f"{type(self).__name__} evicted {len(victims)} entries")
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection(create=False)
+            if conn is not None:
+                conn.execute(f"DELETE FROM {self.TABLE}")
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            conn = self._connection(create=False)
+            return self._size_locked(conn) if conn is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connection(create=False)
+            count, size = (0, 0) if conn is None else conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()
+        return {
+            "entries": count,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+C = TypeVar("C", bound=SQLiteLRUCache)
+
+
+class CacheRegistry(Generic[C]):
+    """进程级缓存实例表 (按数据库路径)，供各 get_*_cache 共享同一实例"""
+
+    def __init__(self):
+        self._caches: Dict[str, C] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, factory: Callable[[], C]) -> C:
+        """获取 path 对应的实例，不存在时用 factory 创建"""
+        with self._lock:
+            cache = self._caches.get(path)
+            if cache is None:
+                cache = self._caches[path] = factory()
+        return cache
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            caches = dict(self._caches)
+        return {path: cache.stats() for path, cache in caches.items()}
+
+
+class ResponseCache(SQLiteLRUCache):
+    """
+    SQLite 响应缓存
+
+    Args:
+        path: 数据库文件路径
+        ttl_seconds: 新鲜期 (秒)
+        stale_seconds: 过期后仍可先返回、后台重新验证的时长 (秒)
+        max_bytes: 缓存总大小上限 (字节)
+    """
+
+    TABLE = "responses"
+    KEY_COLUMNS = ("key",)
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        headers TEXT NOT NULL,
+        body BLOB NOT NULL,
+        stored_at REAL NOT NULL,
+        accessed_at REAL NOT NULL,
+        size INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 24 * 3600,
+        stale_seconds: float = 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        super().__init__(path, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+
+    @classmethod
+    def from_config(cls, config: Config, name: str = "http.sqlite") -> "ResponseCache":
+        """根据 Config 创建缓存"""
+        return cls(
+            path=str(Path(config.cache_dir) / name),
+            ttl_seconds=config.cache_ttl_hours * 3600,
+            stale_seconds=config.cache_stale_hours * 3600,
+            max_bytes=config.cache_max_mb * 1024 * 1024,
+        )
+
+    @staticmethod
+    def make_key(method: str, url: str, params: Optional[Dict] = None, body: Any = None) -> str:
+        """由请求方法、URL、查询参数和请求体生成缓存 key"""
+        payload = json.dumps(
+            [method.upper(), url, sorted((params or {}).items()), body],
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return entry.age < self.ttl_seconds
+
+    def is_servable_stale(self, entry: CachedResponse) -> bool:
+        """已过期但仍在 stale-while-revalidate 窗口内"""
+        return self.ttl_seconds <= entry.age < self.ttl_seconds + self.stale_seconds
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """读取缓存 (不判断新鲜度)"""
+        with self._lock:
+            conn = self._connection(create=True)
+            row = conn.execute(
+                "SELECT url, status, headers, body, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+
+        url, status, headers, body, stored_at = row
+        return CachedResponse(
+            url=url,
+            status_code=status,
+            headers=json.loads(headers),
+            content=bytes(body),
+            stored_at=stored_at,
+            from_cache=True,
+        )
+
+    def put(self, key: str, response: CachedResponse) -> None:
+        """写入缓存，必要时淘汰旧条目"""
+        now = time.time()
+        response.stored_at = now
+        size = len(response.content)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            conn = self._connection(create=True)
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, status, headers, body, stored_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, _strip_query(response.url), response.status_code,
+                 json.dumps(response.headers), sqlite3.Binary(response.content), now, now, size),
+            )
+            self._evict_locked(conn)
+
+    def touch(self, key: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """304 重新验证成功: 刷新存储时间 (可更新校验头)"""
+        now = time.time()
+        with self._lock:
+            conn = self._connection(create=True)
+            if headers:
+                row = conn.execute(
+                    "SELECT headers FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    merged = json.loads(row[0])
+                    for name in ("etag", "last-modified", "cache-control"):
+                        if name in headers:
+                            merged[name] = headers[name]
+                    conn.execute(
+                        "UPDATE responses SET headers = ? WHERE key = ?",
+                        (json.dumps(merged), key),
+                    )
+            conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._connection(create=True).execute("DELETE FROM responses WHERE key = ?", (key,))
+
+
+def _strip_query(url: str) -> str:
+    """去掉查询串 (可能含 API Key) 后再落盘"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+_CACHES: CacheRegistry[ResponseCache] = CacheRegistry()
+
+
+def get_response_cache(config: Optional[Config] = None) -> Optional[ResponseCache]:
+    """获取共享的响应缓存；Config.cache_enabled 为 False 时返回 None"""
+    config = config or Config.load()
+    if not config.cache_enabled:
+        return None
+    path = str(Path(config.cache_dir) / "http.sqlite")
+    return _CACHES.get(path, lambda: ResponseCache.from_config(config))
@@ -3,7 +3,7 @@
 """
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 from dataclasses import dataclass, field
 import yaml
 
@@ -18,8 +18,10 @@ class APIKeys:
     
     # 电商平台 API
     digikey: str = ""
+    digikey_client_id: str = ""
     mouser: str = ""
     octopart: str = ""
+    lcsc: str = ""
 
 
 @dataclass
@@ -40,15 +42,71 @@ class Config:
     
     # 搜索配置
     max_results: int = 10
-    timeout_seconds: int = 30
+    timeout_seconds: int = 30  # HTTP 请求超时 (启用自适应超时时作为上限)
+    prefetch_concurrency: int = 8  # 投机预取的最大并发查询数
+    search_deadline_seconds: float = 3.0  # 多源搜索整体截止时间
+    source_timeout_seconds: float = 2.0  # 单个数据源默认超时
+    source_timeouts: Dict[str, float] = field(default_factory=dict)  # 按数据源覆盖超时
+    coalesce_requests: bool = True  # 合并相同参数的并发搜索/比价 (single-flight)
+    price_timeout_seconds: float = 2.0  # 选型时单个器件比价的默认超时
+    
+    # 自适应超时配置 (超时 = 近期 p99 延迟 x (1 + margin)，限制在 [floor, ceiling])
+    adaptive_timeouts: bool = True
+    adaptive_timeout_floor: float = 0.25
+    adaptive_timeout_ceiling: float = 10.0
+    adaptive_timeout_margin: float = 0.5
+    adaptive_timeout_min_samples: int = 20  # 样本不足时使用静态超时
+    
+    # 熔断与对冲请求配置
+    breaker_failure_threshold: int = 5  # 连续失败多少次后熔断
+    breaker_reset_seconds: float = 30.0  # 熔断后多久半开探测
+    breaker_slow_call_seconds: float = 1.5  # 超过该时长的调用记为失败 (0 表示不判断)
+    hedge_requests: bool = True  # 超过 p95 延迟时发出对冲请求
+    hedge_percentile: float = 0.95
+    
+    # 限流配置 (每分钟请求数，按数据源；并发上限由 AIMD 自动调整)
+    rate_limits: Dict[str, float] = field(default_factory=lambda: {
+        "octopart": 120.0,
+        "digikey": 120.0,
+        "mouser": 30.0,
+        "lcsc": 60.0,
+        "lcsc_web": 60.0,  # backend/scraper.py 抓取 LCSC 网页
+    })
+    rate_limit_default: float = 120.0
+    rate_limit_burst_seconds: float = 10.0  # 令牌桶容量 = 速率 x 该时长
+    max_concurrency_per_source: int = 8
+    
+    # HTTP 连接池配置
+    http_max_connections_per_host: int = 10
+    http_keepalive_seconds: float = 30.0
     
     # 知识库配置
     vector_store_path: str = "./data/vector_store"
+    vector_store_fsync: bool = True  # 每次写入追加日志后 fsync
+    vector_store_compact_mb: float = 4.0  # 追加日志超过该大小 (且不小于快照) 时合并为快照
+    vector_store_quantization: str = "int8"  # 向量文件格式: int8 (每个向量一个缩放因子) / float16
+    vector_store_rerank: int = 4  # int8 量化打分取 top_k x N 个候选用 float16 向量重排，0 表示不重排且不保存重排向量
+    vector_index: str = "ivf"  # 语义搜索索引: ivf (近似) / flat (始终精确搜索)
+    ivf_min_size: int = 10000  # 向量数达到该值才训练 IVF，之前使用精确搜索
+    ivf_nlist: int = 0  # 倒排表数量，0 表示按数据量自动选择 (约 4·sqrt(n))
+    ivf_nprobe: int = 8  # 每次查询扫描的倒排表数量，越大召回越高、延迟越高
     embedding_model: str = "text-embedding-3-small"
+    embedding_cache: bool = True  # 按 (内容哈希, 嵌入模型) 缓存向量，重新导入未变内容时不再计算
+    embedding_cache_mb: int = 256  # 向量缓存大小上限，超出时按最近访问时间 (LRU) 淘汰；0 表示不缓存
+    
+    # Datasheet 解析配置 (PDF 在独立进程池中解析)
+    pdf_workers: int = 2  # 解析进程数
+    pdf_timeout_seconds: float = 60.0  # 单个文件解析超时，超时后重建进程池
+    pdf_memory_limit_mb: int = 1024  # 每个解析进程的内存上限 (POSIX)，0 表示不限制
+    pdf_max_pages: int = 30  # 逐页提取，字段找齐即停止；未找齐时最多读取的页数
+    datasheet_cache_mb: int = 128  # 解析结果缓存上限 (按文件内容哈希 + 解析器版本，位于 cache_dir)，0 表示关闭
     
     # 缓存配置
     cache_enabled: bool = True
     cache_ttl_hours: int = 24
+    cache_dir: str = "./data/cache"  # 磁盘响应缓存目录
+    cache_max_mb: int = 256  # 缓存总大小上限，超出按 LRU 淘汰
+    cache_stale_hours: int = 24  # 过期后仍先返回旧响应、后台重新验证的时长
     
     @classmethod
     def load(cls, config_path: Optional[str] = None) -> "Config":
@@ -76,12 +134,16 @@ class Config:
                     setattr(config.api_keys, key, value)
         
         # 覆盖环境变量
-        for attr in ['openai', 'anthropic', 'google', 'deepseek']:
+        for attr in ['openai', 'anthropic', 'google', 'deepseek',
+                     'digikey', 'mouser', 'octopart', 'lcsc']:
             env_key = f"OPS_{attr.upper()}_API_KEY"
             env_value = os.environ.get(env_key, "")
             if env_value:
                 setattr(config.api_keys, attr, env_value)
         
+        if os.environ.get("OPS_DIGIKEY_CLIENT_ID"):
+            config.api_keys.digikey_client_id = os.environ["OPS_DIGIKEY_CLIENT_ID"]
+        
         return config
     
     def save(self, config_path: str):
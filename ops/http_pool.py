@@ -0,0 +1,305 @@
+"""
+共享 HTTP 连接池模块
+Process-wide pooled async HTTP layer
+
+- 每个主机一个 httpx.AsyncClient，复用 keep-alive 连接，避免每次请求重复 TLS 握手
+- 安装了 h2 时自动启用 HTTP/2
+- 按主机限制最大连接数，统一超时配置
+- httpx 客户端绑定事件循环，因此每个事件循环各持有一个连接池
+- 按主机记录延迟直方图，未显式指定 timeout 时按近期 p99 自适应 (上限为 timeout)
+- limited_request 经按数据源的自适应限流器 (ops.ratelimit) 发送
+- cached_request 走磁盘响应缓存 (ops.cache)，支持条件请求与 stale-while-revalidate
+
+示例:
+    >>> pool = get_http_pool()
+    >>> response = await pool.get("https://api.mouser.com/api/v1/...")
+"""
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import time
+import weakref
+
+import httpx
+
+from .cache import CachedResponse, ResponseCache, get_response_cache, is_cacheable, serves_stale_on
+from .config import Config
+from .latency import TimeoutPolicy, get_tracker
+from .ratelimit import AdaptiveLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def http2_available() -> bool:
+    """检查 HTTP/2 依赖 (h2) 是否可用"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _host_key(url: str) -> Tuple[str, str, int]:
+    """(scheme, host, port) 作为连接池的主机键"""
+    parts = urlsplit(url)
+    scheme = parts.scheme or "https"
+    port = parts.port or (443 if scheme == "https" else 80)
+    return scheme, (parts.hostname or "").lower(), port
+
+
+class HTTPPool:
+    """
+    按主机划分的异步 HTTP 连接池
+
+    Args:
+        max_connections_per_host: 每个主机的最大并发连接数
+        max_keepalive_per_host: 每个主机保留的空闲 keep-alive 连接数
+        keepalive_expiry: 空闲连接保留时间 (秒)
+        timeout: 默认请求超时 (秒)
+        connect_timeout: 建连超时 (秒)
+        host_limits: 个别主机的连接数覆盖，如 {"api.mouser.com": 4}
+        http2: 是否启用 HTTP/2，None 表示 h2 可用时自动启用
+        cache: 磁盘响应缓存，None 表示 cached_request 不缓存
+        timeout_policy: 自适应超时策略，None 表示始终使用 timeout
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 10,
+        max_keepalive_per_host: int = 5,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        host_limits: Optional[Dict[str, int]] = None,
+        http2: Optional[bool] = None,
+        cache: Optional[ResponseCache] = None,
+        timeout_policy: Optional[TimeoutPolicy] = None,
+    ):
+        self.max_connections_per_host = max_connections_per_host
+        self.max_keepalive_per_host = max_keepalive_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.host_limits = {k.lower(): v for k, v in (host_limits or {}).items()}
+        self.http2 = http2_available() if http2 is None else http2
+        self._clients: Dict[Tuple[str, str, int], httpx.AsyncClient] = {}
+        self._requests = 0
+        self.cache = cache
+        self.timeout_policy = timeout_policy
+        self._revalidating: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_config(cls, config: Config) -> "HTTPPool":
+        """根据 Config 创建连接池"""
+        return cls(
+            max_connections_per_host=config.http_max_connections_per_host,
+            keepalive_expiry=config.http_keepalive_seconds,
+            timeout=float(config.timeout_seconds),
+            cache=get_response_cache(config),
+            timeout_policy=TimeoutPolicy.from_config(config),
+        )
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """获取 (或创建) 指定 URL 所在主机的客户端"""
+        key = _host_key(url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            max_conn = self.host_limits.get(key[1], self.max_connections_per_host)
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=max_conn,
+                    max_keepalive_connections=min(self.max_keepalive_per_host, max_conn),
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                follow_redirects=True,
+            )
+            self._clients[key] = client
+            logger.debug(f"HTTP pool: new client for {key[1]}:{key[2]} (http2={self.http2})")
+        return client
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """发送请求 (复用主机连接，记录主机延迟)"""
+        self._requests += 1
+        scheme, host, port = _host_key(url)
+        tracker = get_tracker(f"http:{host}:{port}")
+        if self.timeout_policy is not None and "timeout" not in kwargs:
+            kwargs["timeout"] = self.timeout_policy.timeout(
+                tracker, default=self.timeout, ceiling=self.timeout
+            )
+
+        started = time.monotonic()
+        try:
+            response = await self.client_for(url).request(method, url, **kwargs)
+        except httpx.TimeoutException:
+            # 超时按已等待时长记入，该主机的超时随之放宽
+            tracker.record(time.monotonic() - started)
+            raise
+        tracker.record(time.monotonic() - started)
+        return response
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        """GET 请求"""
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        """POST 请求"""
+        return await self.request("POST", url, **kwargs)
+
+    async def limited_request(
+        self,
+        method: str,
+        url: str,
+        limiter: Optional[AdaptiveLimiter] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """经限流器发送请求 (响应状态与延迟反馈给限流器)"""
+        if limiter is None:
+            return await self.request(method, url, **kwargs)
+        async with limiter.slot() as outcome:
+            response = await self.request(method, url, **kwargs)
+            outcome.record(response)
+            return response
+
+    async def cached_request(
+        self,
+        method: str,
+        url: str,
+        limiter: Optional[AdaptiveLimiter] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        带磁盘缓存的请求 (缓存命中不消耗限流配额)
+
+        - 新鲜缓存直接返回，不发请求
+        - 过期但在 stale-while-revalidate 窗口内: 先返回旧响应，后台重新验证
+        - 其余情况发送条件请求 (If-None-Match / If-Modified-Since)，304 时复用缓存；
+          请求失败 (网络错误、429 或 5xx) 且有旧缓存时返回旧缓存 (stale-if-error)
+
+        Returns:
+            启用缓存时为 CachedResponse，否则为 httpx.Response (接口一致)
+        """
+        if self.cache is None:
+            return await self.limited_request(method, url, limiter, **kwargs)
+
+        key = ResponseCache.make_key(
+            method, url, kwargs.get("params"), kwargs.get("json", kwargs.get("data"))
+        )
+        # SQLite 读写放到线程中，避免阻塞事件循环
+        entry = await asyncio.to_thread(self.cache.get, key)
+        if entry is not None:
+            if self.cache.is_fresh(entry):
+                return entry
+            if self.cache.is_servable_stale(entry):
+                self._revalidate_in_background(key, entry, method, url, limiter, kwargs)
+                return entry
+
+        return await self._fetch_and_store(key, entry, method, url, limiter, kwargs)
+
+    async def _fetch_and_store(
+        self,
+        key: str,
+        entry: Optional[CachedResponse],
+        method: str,
+        url: str,
+        limiter: Optional[AdaptiveLimiter],
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        """发送 (条件) 请求并更新缓存"""
+        kwargs = dict(kwargs)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            headers.update(entry.validators())
+
+        try:
+            response = await self.limited_request(method, url, limiter, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            if entry is not None:
+                logger.warning(f"Request failed, serving stale cache for {url}: {e}")
+                return entry
+            raise
+
+        if entry is not None and serves_stale_on(response.status_code):
+            logger.warning(f"HTTP {response.status_code}, serving stale cache for {url}")
+            return entry
+
+        if response.status_code == 304 and entry is not None:
+            headers = {k.lower(): v for k, v in response.headers.items()}
+            await asyncio.to_thread(self.cache.touch, key, headers)
+            entry.stored_at = time.time()
+            return entry
+
+        result = CachedResponse.from_response(response)
+        if is_cacheable(result.status_code, result.headers):
+            await asyncio.to_thread(self.cache.put, key, result)
+        return result
+
+    def _revalidate_in_background(
+        self,
+        key: str,
+        entry: CachedResponse,
+        method: str,
+        url: str,
+        limiter: Optional[AdaptiveLimiter],
+        kwargs: Dict[str, Any],
+    ) -> None:
+        """后台重新验证过期缓存 (同一 key 只保留一个任务)"""
+        if key in self._revalidating:
+            return
+
+        async def revalidate():
+            try:
+                await self._fetch_and_store(key, entry, method, url, limiter, kwargs)
+            except Exception as e:
+                logger.debug(f"Background revalidation failed for {url}: {e}")
+
+        task = asyncio.ensure_future(revalidate())
+        self._revalidating[key] = task
+        task.add_done_callback(lambda _: self._revalidating.pop(key, None))
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池统计"""
+        return {
+            "hosts": [f"{host}:{port}" for _, host, port in self._clients],
+            "requests": self._requests,
+            "http2": self.http2,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    async def aclose(self) -> None:
+        """关闭全部客户端 (等待后台重新验证结束)"""
+        revalidating = list(self._revalidating.values())
+        if revalidating:
+            await asyncio.gather(*revalidating, return_exceptions=True)
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+# 每个事件循环一个连接池 (事件循环销毁后自动释放)
+_POOLS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, HTTPPool]" = weakref.WeakKeyDictionary()
+
+
+def get_http_pool(config: Optional[Config] = None) -> HTTPPool:
+    """
+    获取当前事件循环的共享连接池
+
+    首次调用时按 config (缺省为 Config.load()) 创建，之后同一事件循环内复用。
+    """
+    loop = asyncio.get_running_loop()
+    pool = _POOLS.get(loop)
+    if pool is None:
+        pool = HTTPPool.from_config(config or Config.load())
+        _POOLS[loop] = pool
+    return pool
+
+
+async def close_http_pool() -> None:
+    """关闭当前事件循环的共享连接池 (应用退出时调用)"""
+    loop = asyncio.get_running_loop()
+    pool = _POOLS.pop(loop, None)
+    if pool is not None:
+        await pool.aclose()
@@ -0,0 +1,350 @@
+"""
+Datasheet 目录批量导入
+Parallel directory ingestion: datasheets → knowledge store
+
+- 遍历目录，PDF 在解析进程池中并发解析 (文本文件在线程中解析)，命中解析缓存时不重复解析
+- 按文件内容哈希去重: 本次运行内重复的文件、以前已导入过的内容都会跳过
+- 解析结果按批次调用 VectorStore.bulk_import: 批量生成向量，每批一条事务记录
+- 断点续传: 每批提交后把文件 (路径、大小、修改时间、内容哈希、状态) 写入检查点，
+  重新运行时大小与修改时间未变的文件不再读取；失败的文件会重试
+- 进度回调: progress(stats)
+
+示例:
+    >>> stats = await ingest_directory("./datasheets", progress=print)
+    >>> print(stats.imported, stats.failed)
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .config import Config
+from .parser import TEXT_EXTENSIONS, DatasheetParser
+from .parser.cache import file_hash
+
+logger = logging.getLogger(__name__)
+
+PDF_EXTENSIONS = ('.pdf',)
+
+# 检查点中的文件状态: 已完成的内容不再处理，failed 在下次运行时重试
+IMPORTED = "imported"
+UNIDENTIFIED = "unidentified"  # 解析成功但没有识别出型号，无法作为知识库条目
+FAILED = "failed"
+DUPLICATE = "duplicate"  # 内容与其他文件相同；该内容完成后同样视为已完成
+DONE_STATUSES = (IMPORTED, UNIDENTIFIED)
+
+
+@dataclass
+class IngestStats:
+    """导入统计"""
+    total: int = 0  # 待处理的文件数
+    processed: int = 0  # 已处理的文件数 (含跳过和失败)
+    skipped: int = 0  # 检查点中已完成、未重新读取的文件
+    duplicates: int = 0  # 内容与已导入 (或本次已处理) 的文件相同
+    unidentified: int = 0
+    failed: int = 0
+    imported: int = 0  # 已提交到知识库的文件数
+    batches: int = 0
+    started_at: float = field(default_factory=time.time)
+
+    @property
+    def elapsed(self) -> float:
+        return time.time() - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """每秒处理的文件数"""
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("started_at")
+        data["elapsed"] = round(self.elapsed, 3)
+        return data
+
+
+class IngestCheckpoint:
+    """
+    导入检查点 (SQLite)
+
+    Args:
+        path: SQLite 文件路径
+    """
+
+    FILE = "ingest_checkpoint.sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        hash TEXT NOT NULL,
+        part_number TEXT,
+        status TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_files_hash ON files(hash);
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def load(self) -> Tuple[Dict[str, Tuple[int, int, str]], Set[str]]:
+        """
+        读取已完成的记录 (重复文件只在其内容已完成时计入)
+
+        Returns:
+            ({路径: (大小, 修改时间, 状态)}, 已完成的内容哈希)
+        """
+        done = f"status IN ({','.join('?' * len(DONE_STATUSES))})"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT path, size, mtime_ns, hash, status FROM files WHERE {done} "
+                f"OR (status = ? AND hash IN (SELECT hash FROM files WHERE {done}))",
+                (*DONE_STATUSES, DUPLICATE, *DONE_STATUSES),
+            ).fetchall()
+        files = {path: (size, mtime_ns, status) for path, size, mtime_ns, _, status in rows}
+        return files, {row[3] for row in rows}
+
+    def record_many(self, rows: List[Tuple[str, int, int, str, Optional[str], str]]) -> None:
+        """写入 (路径, 大小, 修改时间, 内容哈希, 型号, 状态)，一次事务"""
+        if not rows:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files "
+                    "(path, size, mtime_ns, hash, part_number, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(*row, now) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def iter_datasheets(directory: Path) -> Iterator[Path]:
+    """按路径顺序遍历目录下支持的 datasheet 文件"""
+    extensions = PDF_EXTENSIONS + TEXT_EXTENSIONS
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                yield Path(root) / name
+
+
+def stat_datasheets(directory: Path) -> List[Tuple[Path, Optional[os.stat_result]]]:
+    """遍历目录并读取各文件的元数据 (在线程中调用)；遍历期间消失的文件元数据为 None"""
+    entries = []
+    for path in iter_datasheets(directory):
+        try:
+            entries.append((path, path.stat()))
+        except OSError:
+            entries.append((path, None))
+    return entries
+
+
+def to_part(result: Any, source: str, digest: str) -> Dict[str, Any]:
+    """ParsedDatasheet → 知识库条目数据"""
+    data = asdict(result)
+    data.pop("datasheet_url", None)
+    data["source_file"] = source
+    data["content_hash"] = digest
+    return data
+
+
+async def ingest_directory(
+    directory: str,
+    config: Optional[Config] = None,
+    store: Optional[Any] = None,
+    batch_size: int = 500,
+    concurrency: Optional[int] = None,
+    embed: bool = True,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = True,
+    progress: Optional[Callable[[IngestStats], None]] = None,
+    progress_every: int = 100,
+) -> IngestStats:
+    """
+    把目录下的 datasheet 导入知识库
+
+    Args:
+        directory: datasheet 目录 (递归遍历 .pdf/.txt/.md/.csv)
+        config: 配置 (解析进程池、解析缓存、知识库路径)
+        store: 目标 VectorStore，缺省为 config 对应的共享知识库
+        batch_size: 每批提交的条目数 (一次 bulk_import 事务)
+        concurrency: 同时解析的文件数，缺省为解析进程数的 2 倍
+        embed: 是否生成向量嵌入
+        checkpoint_path: 检查点文件，缺省为知识库目录下的 ingest_checkpoint.sqlite
+        resume: 是否跳过检查点中已完成的文件；False 时重新处理全部文件
+        progress: 进度回调 progress(stats)，每处理 progress_every 个文件、每批提交后及结束时调用
+        progress_every: 进度回调间隔 (文件数)
+
+    Returns:
+        导入统计
+    """
+    config = config or Config.load()
+    root = Path(directory)
+    if not root.is_dir():
+        raise ValueError(f"Not a directory: {directory}")
+
+    if store is None:
+        from .knowledge import get_vector_store
+        store = await get_vector_store(config)
+
+    checkpoint = IngestCheckpoint(
+        checkpoint_path or str(Path(config.vector_store_path) / IngestCheckpoint.FILE))
+    done_files, seen = await asyncio.to_thread(checkpoint.load) if resume else ({}, set())
+
+    parser = DatasheetParser(config)
+    if concurrency is None:
+        concurrency = max(2, config.pdf_workers * 2)
+
+    # 遍历与 stat 在线程中进行，不阻塞事件循环
+    entries = await asyncio.to_thread(stat_datasheets, root)
+    stats = IngestStats(total=len(entries))
+    logger.info(f"Ingesting {len(entries)} files from {root} ({len(done_files)} done previously)")
+
+    def report(force: bool = False):
+        if progress is not None and (force or stats.processed % progress_every == 0):
+            progress(stats)
+
+    files: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 4)
+    parsed: asyncio.Queue = asyncio.Queue(maxsize=batch_size * 2)
+    warned_pdf = False
+
+    async def produce():
+        for entry in entries:
+            await files.put(entry)
+        for _ in range(concurrency):
+            await files.put(None)
+
+    def finish(**counts: int):
+        for name, value in counts.items():
+            setattr(stats, name, getattr(stats, name) + value)
+        stats.processed += 1
+        report()
+
+    async def parse_one(path: Path, stat: Optional[os.stat_result]):
+        nonlocal warned_pdf
+        source = path.relative_to(root).as_posix()
+        if stat is None:
+            raise FileNotFoundError(path)
+        previous = done_files.get(source)
+        if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+            finish(skipped=1)
+            return
+
+        data = await asyncio.to_thread(path.read_bytes)
+        digest = file_hash(data)
+        row = (source, stat.st_size, stat.st_mtime_ns, digest)
+        # 同一个事件循环内检查并登记，不会被其他任务插入
+        if digest in seen:
+            # 记入检查点，下次运行按大小/修改时间直接跳过，不再读取
+            await asyncio.to_thread(checkpoint.record_many, [(*row, None, DUPLICATE)])
+            finish(duplicates=1)
+            return
+        seen.add(digest)
+
+        is_pdf = source.lower().endswith(PDF_EXTENSIONS)
+        try:
+            if is_pdf and not parser.pdf_available:
+                if not warned_pdf:
+                    logger.warning("pdfplumber not installed, PDF files are skipped")
+                    warned_pdf = True
+                raise ValueError("pdfplumber not installed")
+            result = await parser.parse_content(data, is_pdf)
+        except Exception as e:
+            logger.warning(f"Failed to parse {source}: {e}")
+            # 失败的内容允许之后的同内容文件或下次运行重试
+            seen.discard(digest)
+            await asyncio.to_thread(checkpoint.record_many, [(*row, None, FAILED)])
+            finish(failed=1)
+            return
+
+        if result.part_number == "未知":
+            await asyncio.to_thread(checkpoint.record_many, [(*row, None, UNIDENTIFIED)])
+            finish(unidentified=1)
+            return
+        await parsed.put((row, to_part(result, source, digest)))
+
+    async def work():
+        while True:
+            entry = await files.get()
+            if entry is None:
+                return
+            path, stat = entry
+            try:
+                await parse_one(path, stat)
+            except OSError as e:
+                logger.warning(f"Cannot read {path}: {e}")
+                finish(failed=1)
+
+    async def commit(batch: List[Tuple[Tuple, Dict]]):
+        """一批条目以一条事务写入知识库，成功后再写检查点"""
+        await store.bulk_import([part for _, part in batch], embed=embed)
+        await asyncio.to_thread(checkpoint.record_many, [
+            (*row, part["part_number"], IMPORTED) for row, part in batch
+        ])
+        stats.batches += 1
+        for _ in batch:
+            finish(imported=1)
+        report(force=True)
+
+    async def consume():
+        batch: List[Tuple[Tuple, Dict]] = []
+        while True:
+            item = await parsed.get()
+            if item is None:
+                break
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await commit(batch)
+                batch = []
+        if batch:
+            await commit(batch)
+
+    async def parse_all():
+        await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+        await parsed.put(None)
+
+    # 任一环节失败 (如写入知识库出错) 时取消其余任务，避免解析端阻塞在已满的队列上
+    tasks = [asyncio.create_task(parse_all()), asyncio.create_task(consume())]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.to_thread(checkpoint.close)
+
+    if stats.imported:
+        await store.save_index()
+    report(force=True)
+    logger.info(
+        f"Ingested {stats.imported} datasheets in {stats.elapsed:.1f}s "
+        f"({stats.skipped} skipped, {stats.duplicates} duplicates, "
+        f"{stats.unidentified} unidentified, {stats.failed} failed)"
+    )
+    return stats
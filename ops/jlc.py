@@ -379,17 +379,29 @@ class LCSCClient:
     
     BASE_URL = "https://api.lcsc.com"
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, pool: Any = None):
+        """pool: 连接器使用的 HTTPPool，缺省为共享连接池"""
         self.api_key = api_key
+        self.connector = None
+        if api_key:
+            from .search.vendors import LCSCConnector
+            self.connector = LCSCConnector(api_key, base_url=base_url or self.BASE_URL, pool=pool)
     
     async def search_parts(self, keyword: str, limit: int = 20) -> List[Dict]:
         """
         搜索器件
         
         v1.1.23: 优化搜索逻辑，统一数据源
+        配置 API Key 时优先查询立创开放接口，失败则回退到内置数据库
         """
+        if self.connector is not None:
+            try:
+                return await self.connector.search(keyword, limit=limit)
+            except Exception as e:
+                logger.warning(f"LCSC API search failed, falling back to builtin: {e}")
+        
         # 优先使用内置数据库
-        from .. import database
+        from . import database
         results = database.search_components(keyword, limit=limit)
         
         # 添加JLC特有信息
@@ -402,15 +414,22 @@ class LCSCClient:
         # 合并结果，去重
         seen = set(r["part_number"] for r in results)
         for jr in jlc_results:
-            if jr.get("part_number") not in seen:
+            key = jr.get("part_number") or jr.get("type")
+            if key not in seen:
                 results.append(jr)
-                seen.add(jr["part_number"])
+                seen.add(key)
         
         return results[:limit]
     
     async def get_price(self, part_number: str) -> Dict:
         """获取价格和库存"""
-        from .. import database
+        if self.connector is not None:
+            try:
+                return await self.connector.get_price(part_number)
+            except Exception as e:
+                logger.warning(f"LCSC API price lookup failed, falling back to builtin: {e}")
+        
+        from . import database
         return database.get_price_comparison(part_number)
 
 
@@ -1,12 +1,34 @@
 """
 知识库模块 - 向量存储与语义搜索
+
+持久化采用追加日志 + 快照 (见 storage.py)，单次写入不再重写整个索引。
+向量在合并快照时写入量化的二进制文件并内存映射打开 (见 vectors.py)，
+index.json 中不再保存向量。
+
+多个进程可共享同一存储目录: 磁盘读写都在线程中进行并持有进程间文件锁，
+写入与查询前同步其他进程追加的记录。内存索引只在事件循环中修改，
+单次查询在一个事件循环步骤内完成，看到的始终是某个完整写入之后的状态。
+
+打开时不解码整个快照 (见 storage.LazyIndex): 条目按需解码，关键词倒排索引与
+过滤位图在第一次需要时才构建；向量文件本身就是内存映射的。
 """
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Tuple, Union, Any
 from pathlib import Path
+import asyncio
 import logging
 import json
 
+import numpy as np
+
 from ..config import Config
+from .embedding import TextEmbedder
+from .embedding_cache import EmbeddingCache, content_hash
+from .filters import FilterIndex
+from .storage import LazyIndex, Record, RecordLog
+from .ivf import IVFIndex
+from .matrix import normalize_rows, top_k_indices
+from .text_index import TextIndex
+from .vectors import QuantizedVectors, TableState, VectorTable
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +36,40 @@ logger = logging.getLogger(__name__)
 class VectorStore:
     """向量知识库"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, embedder: Optional[Any] = None):
+        """
+        Args:
+            config: 配置
+            embedder: 文本嵌入器 (需提供 version 与 embed_batch)，缺省为本地词汇表嵌入
+        """
         self.config = config
         self.store_path = Path(config.vector_store_path)
         self.store_path.mkdir(parents=True, exist_ok=True)
         
-        self.index = {}  # 简单索引: part_number -> data
+        self.index = LazyIndex()  # 简单索引: part_number -> data (快照条目按需解码)
+        self.embedder = embedder or TextEmbedder()
+        self._query_embedder = self.embedder  # 与当前向量表一致的查询嵌入器 (模型切换期间为旧模型)
+        self.embedding_cache = (
+            EmbeddingCache.from_config(config)
+            if config.embedding_cache and config.embedding_cache_mb > 0 else None
+        )
+        self._reembedding: Optional[asyncio.Task] = None
+        self.text_index = TextIndex()  # 预计算搜索文本 + 倒排索引
+        self.filter_index = FilterIndex()  # 属性位图 (过滤先于打分)
+        self._search_indexed = False  # 以上两个索引是否已构建 (首次关键词/过滤查询时构建)
+        self.embeddings = VectorTable()  # 向量表: 内存映射的量化向量文件 + 内存增量
+        self._vectors_touched: Optional[set] = None  # 合并期间变更向量的条目
+        self.ann: Optional[IVFIndex] = None  # 近似最近邻索引 (向量足够多时构建)
+        self._ann_build: Optional[asyncio.Task] = None
+        self._ann_touched: Optional[set] = None  # 构建期间变更的条目
+        self._log = RecordLog(
+            self.store_path,
+            fsync=config.vector_store_fsync,
+            compact_min_bytes=int(config.vector_store_compact_mb * 1024 * 1024),
+        )
+        self._write_lock = asyncio.Lock()  # 进程内单写者: 追加日志与应用到内存按日志顺序进行
+        self._loaded = False
+        self._compaction: Optional[asyncio.Task] = None
         self._initialized = False
     
     async def initialize(self):
@@ -29,20 +79,186 @@ class VectorStore:
         logger.info(f"Vector store initialized with {len(self.index)} items")
     
     async def _load_index(self):
-        """加载本地索引"""
-        index_file = self.store_path / "index.json"
-        
-        if index_file.exists():
-            with open(index_file, 'r', encoding='utf-8') as f:
-                self.index = json.load(f)
+        """加载本地索引 (快照 + 重放追加日志)"""
+        self.index = await asyncio.to_thread(self._log.load)
+        self._search_indexed = False
+        self._rebuild_embeddings()
+        self._loaded = True
+        await self._load_ann()
+        self._maybe_reembed()
     
     async def save_index(self):
-        """保存索引"""
-        index_file = self.store_path / "index.json"
+        """保存索引: 立即把追加日志合并为快照 (正在重新生成向量时等待其完成)"""
+        if not self._loaded:
+            # 未加载时内存中只有本次新增的条目，先重放磁盘数据再合并
+            await self._load_index()
+        await self._wait_reembed()
+        await self._wait_compaction()
+        await self._compact()
+    
+    async def close(self):
+        """等待后台向量重建、合并与索引构建完成"""
+        await self._wait_reembed()
+        await self._wait_compaction()
+        await self._wait_ann_build()
+
+    async def _wait_ann_build(self):
+        if self._ann_build is not None:
+            await self._ann_build
+            self._ann_build = None
+    
+    async def _write(
+        self,
+        records: Union[List[Record], Callable[[], List[Record]]],
+        batch: bool = False,
+    ):
+        """
+        追加写入记录，日志过大时在后台合并为快照 (batch=True 时整批写为一条事务记录)
+
+        写入前其他进程追加的记录会先应用到内存；调用方在返回后 (不经过 await)
+        再把本次记录应用到内存，保持与日志相同的顺序。records 为函数时在持有
+        写锁、同步其他进程的记录之后调用，由当前内存内容生成要写入的记录。
+        """
+        encode = RecordLog.encode_batch if batch else RecordLog.encode
+        async with self._write_lock:
+            if self._loaded and self._log.changed():
+                await self._apply_foreign(await asyncio.to_thread(self._log.read_new))
+            if callable(records):
+                records = records()
+            foreign = await asyncio.to_thread(lambda: self._log.append_bytes(encode(records)))
+            if self._loaded:
+                await self._apply_foreign(foreign)
         
-        with open(index_file, 'w', encoding='utf-8') as f:
-            json.dump(self.index, f, ensure_ascii=False, indent=2)
+        if not self._loaded or (self._compaction is not None and not self._compaction.done()):
+            return
+        if self._reembedding is not None and not self._reembedding.done():
+            # 重新生成的向量在完成前只在日志中，此时合并会丢掉它们
+            return
+        if self._log.needs_compaction():
+            self._compaction = asyncio.ensure_future(self._background_compact())
+    
+    async def _compact(self):
+        """合并快照与向量文件 (内容在事件循环中生成一致的副本，写盘在线程中进行)"""
+        async with self._write_lock:
+            # 内存与日志 offset 之前的内容一致 (其他进程之后追加的记录保留在新日志中)
+            snapshot = RecordLog.encode_snapshot(self.index)
+            offset = self._log.offset if self._log.offset is not None else self._log.log_size()
+            expected = self._log.snapshot_id()
+            state = self.embeddings.state() if self.embeddings.dim is not None else None
+            if state is not None:
+                state.model = self._vector_file_model()
+        self._vectors_touched = set()
+        try:
+            done = await asyncio.to_thread(self._write_compaction, snapshot, offset, expected, state)
+            if done and state is not None:
+                self._reopen_vectors()
+        finally:
+            self._vectors_touched = None
+    
+    def _write_compaction(
+        self,
+        snapshot: bytes,
+        offset: int,
+        expected: Optional[tuple],
+        state: Optional[TableState],
+    ) -> bool:
+        # 先写向量文件再写快照: 中途崩溃时旧快照 + 完整日志重放仍然正确；
+        # 两者都在文件锁内写入，其他进程不会读到不匹配的快照与向量文件
+        def write_vectors():
+            if state is not None:
+                state.write(
+                    self.store_path / QuantizedVectors.FILE,
+                    dtype=self.config.vector_store_quantization,
+                    keep_exact=self.config.vector_store_rerank > 0,
+                    fsync=self.config.vector_store_fsync,
+                )
+        return self._log.compact(snapshot, offset, expected, before=write_vectors)
     
+    def _reopen_vectors(self):
+        """切换到新写入的向量文件，并补上合并期间的变更"""
+        old = self.embeddings
+        table = VectorTable(
+            QuantizedVectors.open(self.store_path / QuantizedVectors.FILE),
+            rerank=self.config.vector_store_rerank,
+        )
+        for key in self._vectors_touched:
+            if key in old:
+                table.set_many([(key, old.vector(key))])
+            else:
+                table.remove(key)
+        self.embeddings = table
+    
+    async def _background_compact(self):
+        try:
+            await self._compact()
+        except Exception as e:
+            logger.error(f"Knowledge store compaction failed: {e}")
+    
+    async def _wait_compaction(self):
+        if self._compaction is not None:
+            await self._compaction
+            self._compaction = None
+    
+    async def refresh(self):
+        """同步其他进程写入的记录 (没有变化时只比较文件元数据)"""
+        if not self._loaded or not self._log.changed():
+            return
+        async with self._write_lock:
+            await self._apply_foreign(await asyncio.to_thread(self._log.read_new))
+
+    async def _apply_foreign(self, records: Optional[List[Dict]]):
+        """应用其他进程追加的记录；快照已被其他进程替换时重新加载 (持有 _write_lock 时调用)"""
+        if records is None:
+            logger.info("Knowledge store was compacted by another process, reloading")
+            await self._wait_ann_build()
+            await self._load_index()
+            return
+        changes = RecordLog.changes(records)
+        if not changes:
+            return
+        puts = {key: entry for key, entry in changes.items() if entry is not None}
+        for key, entry in changes.items():
+            if entry is None and key in self.index:
+                self._remove_entry(key)
+        self._apply_puts(puts)
+        self._maybe_build_ann()
+
+    def _apply_puts(self, entries: Dict[str, Dict]):
+        """把已写入日志的条目应用到内存索引"""
+        self.index.update(entries)
+        if self._search_indexed:
+            self.text_index.update(entries)
+            self.filter_index.update(entries)
+        self._sync_embeddings(entries)
+
+    def _remove_entry(self, key: str):
+        del self.index[key]
+        if self._search_indexed:
+            self.text_index.remove(key)
+            self.filter_index.remove(key)
+        self._drop_embedding(key)
+
+    async def _ensure_search_indexes(self):
+        """
+        构建关键词倒排索引与过滤位图 (需要解码全部条目，只在第一次使用时进行)
+
+        在线程中构建，不阻塞事件循环；持有写锁，构建期间没有写入，
+        之后的写入由 _apply_puts/_remove_entry 增量更新。
+        """
+        if self._search_indexed:
+            return
+        async with self._write_lock:
+            if self._search_indexed:
+                return
+            index = self.index
+
+            def build():
+                self.text_index.rebuild(index)
+                self.filter_index.rebuild(index)
+
+            await asyncio.to_thread(build)
+            self._search_indexed = True
+
     async def add_datasheet(self, part_number: str, data: Dict):
         """
         添加 datasheet 到知识库
@@ -51,14 +267,16 @@ class VectorStore:
             part_number: 元器件型号
             data: datasheet 解析数据
         """
-        self.index[part_number.upper()] = {
-            "part_number": part_number.upper(),
+        key = part_number.upper()
+        entry = {
+            "part_number": key,
             "data": data,
             "embeddings": None,  # 向量嵌入（首次搜索时自动生成）
             "added_at": self._timestamp(),
         }
         
-        await self.save_index()
+        await self._write([("put", key, entry)])
+        self._apply_puts({key: entry})
         logger.info(f"Added {part_number} to knowledge base")
     
     async def search(
@@ -72,28 +290,31 @@ class VectorStore:
         
         Args:
             query: 搜索查询
-            filters: 过滤条件
+            filters: 过滤条件 (category/package/manufacturer/voltage)
             limit: 返回数量
             
         Returns:
             匹配的元器件列表
         """
+        await self.refresh()
+        await self._ensure_search_indexes()
         results = []
         query_lower = query.lower()
+        keywords = [k for k in query_lower.split() if len(k) >= 2]
         
-        # 简单关键词搜索
-        for part_number, data in self.index.items():
-            content = json.dumps(data, ensure_ascii=False).lower()
+        # 关键词搜索: 倒排索引给出候选，与过滤位图求交后只对剩余条目的预计算文本打分
+        candidates = self.text_index.candidates(keywords, query_lower)
+        allowed = self.filter_index.matching(filters)
+        if allowed is not None:
+            candidates = allowed.intersection(candidates)
+        for part_number in sorted(candidates):
+            data = self.index[part_number]
+            content = self.text_index.texts[part_number]
             
             # 计算相关性分数
             score = self._calculate_relevance(query_lower, content)
             
             if score > 0:
-                # 应用过滤器
-                if filters:
-                    if not self._matches_filters(data, filters):
-                        continue
-                
                 results.append({
                     **data,
                     "relevance_score": score
@@ -104,6 +325,59 @@ class VectorStore:
         
         return results[:limit]
     
+    async def hybrid_search(
+        self,
+        query: str,
+        filters: Optional[Dict] = None,
+        limit: int = 10,
+        candidates: Optional[int] = None,
+        rrf_k: int = 60,
+    ) -> List[Dict]:
+        """
+        混合检索: BM25 关键词排名 + 向量相似度排名，按倒数排名融合 (RRF)
+
+        过滤条件先于打分应用: 只对满足过滤条件的条目计算 BM25 与相似度。
+        两路排名都在同一事件循环步骤内完成，期间索引与向量表不会变化。
+
+        Args:
+            query: 搜索查询
+            filters: 过滤条件
+            limit: 返回数量
+            candidates: 每一路参与融合的排名长度，None 为 max(limit * 5, 50)
+            rrf_k: RRF 平滑常数，分数为 Σ 1 / (rrf_k + 名次)
+
+        Returns:
+            按融合分数排序的元器件列表 (含 relevance_score、bm25_score、similarity)
+        """
+        await self.refresh()
+        await self._ensure_search_indexes()
+        depth = candidates or max(limit * 5, 50)
+        allowed = self.filter_index.matching(filters)
+        if allowed is not None and not allowed:
+            return []
+
+        bm25 = self.text_index.bm25(query, allowed)
+        lexical = sorted(bm25, key=lambda key: (-bm25[key], key))[:depth]
+        query_embeddings = self._query_embedder.embed_batch([query])
+        similarity = dict(self._vector_search(query_embeddings, depth, allowed)[0])
+        semantic = list(similarity)
+
+        fused: Dict[str, float] = {}
+        for ranking in (lexical, semantic):
+            for rank, key in enumerate(ranking, 1):
+                fused[key] = fused.get(key, 0.0) + 1.0 / (rrf_k + rank)
+
+        ranked = sorted(fused, key=lambda key: (-fused[key], key))[:limit]
+        return [
+            {
+                **self.index[key],
+                "relevance_score": fused[key],
+                "bm25_score": bm25.get(key, 0.0),
+                "similarity": similarity.get(key),
+            }
+            for key in ranked
+        ]
+
     def _calculate_relevance(self, query: str, content: str) -> float:
         """计算相关性分数"""
         score = 0.0
@@ -123,44 +397,95 @@ class VectorStore:
         
         return min(score, 1.0)
     
-    def _matches_filters(self, data: Dict, filters: Dict) -> bool:
-        """检查是否匹配过滤器"""
-        for key, value in filters.items():
-            if key == "category":
-                if data.get("category", "").lower() != value.lower():
-                    return False
-            elif key == "voltage":
-                if value.lower() not in data.get("voltage", "").lower():
-                    return False
-            elif key == "package":
-                if value.lower() not in data.get("package", "").lower():
-                    return False
-        
-        return True
-    
     async def get_part(self, part_number: str) -> Optional[Dict]:
-        """获取特定元器件信息"""
-        return self.index.get(part_number.upper())
+        """获取特定元器件信息 (embeddings 为归一化后的向量)"""
+        await self.refresh()
+        key = part_number.upper()
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        vector = self.embeddings.vector(key)
+        return {**entry, "embeddings": vector.tolist() if vector is not None else None}
     
     async def delete_part(self, part_number: str) -> bool:
         """删除元器件"""
         key = part_number.upper()
         
+        await self.refresh()
         if key in self.index:
-            del self.index[key]
-            await self.save_index()
+            await self._write([("del", key, None)])
+            if key in self.index:
+                self._remove_entry(key)
             return True
         
         return False
     
-    async def bulk_import(self, parts: List[Dict]):
-        """批量导入"""
-        for part in parts:
+    async def bulk_import(
+        self,
+        parts: List[Dict],
+        embed: bool = True,
+        progress: Optional[Callable[[str, int, int], None]] = None,
+        chunk_size: int = 1000,
+    ) -> int:
+        """
+        批量导入 (事务: 全部生效或全部不生效)
+        
+        先暂存全部记录、批量生成向量，再以一条事务记录写入日志 (一次 fsync)，
+        写入成功后才更新内存索引。
+        
+        Args:
+            parts: 器件数据列表，缺少 part_number 的条目会被跳过
+            embed: 是否同时生成向量嵌入
+            progress: 进度回调 progress(stage, done, total)，stage 为 stage/embed/write
+            chunk_size: 每处理多少条让出一次事件循环并回调进度
+            
+        Returns:
+            导入的器件数
+        """
+        def report(stage: str, done: int, total: int):
+            if progress is not None:
+                progress(stage, done, total)
+        
+        # 1. 暂存
+        timestamp = self._timestamp()
+        staged: Dict[str, Dict] = {}
+        for i, part in enumerate(parts, 1):
+            if not isinstance(part, dict):
+                raise ValueError(f"Invalid part at position {i - 1}: {part!r}")
             part_number = part.get("part_number")
             if part_number:
-                await self.add_datasheet(part_number, part)
+                key = str(part_number).upper()
+                staged[key] = {
+                    "part_number": key,
+                    "data": part,
+                    "embeddings": None,
+                    "added_at": timestamp,
+                }
+            if i % chunk_size == 0:
+                report("stage", i, len(parts))
+                await asyncio.sleep(0)
+        report("stage", len(parts), len(parts))
+        
+        # 2. 批量生成向量
+        entries = list(staged.values())
+        if embed:
+            for start in range(0, len(entries), chunk_size):
+                chunk = entries[start:start + chunk_size]
+                vectors = self.embed_texts([self._embedding_text(e) for e in chunk])
+                for entry, vector in zip(chunk, vectors):
+                    entry["embeddings"] = vector.tolist()
+                    entry["embedding_model"] = self.embedding_model
+                report("embed", start + len(chunk), len(entries))
+                await asyncio.sleep(0)
         
-        logger.info(f"Bulk imported {len(parts)} parts")
+        # 3. 一次写入 (单行事务记录)，成功后再更新内存索引
+        await self._write([("put", e["part_number"], e) for e in entries], batch=True)
+        self._apply_puts(staged)
+        self._maybe_build_ann()
+        report("write", len(entries), len(entries))
+        
+        logger.info(f"Bulk imported {len(entries)} parts ({len(parts) - len(entries)} skipped or duplicated)")
+        return len(entries)
     
     def _timestamp(self) -> str:
         """生成时间戳"""
@@ -169,100 +494,327 @@ class VectorStore:
     
     async def create_embeddings(self, model: str = "text-embedding-3-small"):
         """
-        创建向量嵌入
+        为缺少向量 (或向量来自其他嵌入模型) 的条目创建向量嵌入
 
         Args:
             model: 嵌入模型名称
         """
-        logger.info(f"Creating embeddings with model: {model}")
+        logger.info(f"Creating embeddings with model: {model} ({self.embedding_model})")
+
+        # 简单实现：使用 TF-IDF 风格的文本特征作为向量，内容未变的条目直接取自缓存
+        pending = [
+            (pn, data) for pn, data in self.index.items()
+            if pn not in self.embeddings or data.get("embedding_model") != self.embedding_model
+        ]
+        vectors = self.embed_texts([self._embedding_text(data) for _, data in pending])
+        originals = dict(pending)
+        updated: Dict[str, Dict] = {}
 
-        # 简单实现：使用 TF-IDF 风格的文本特征作为向量
-        for part_number, data in self.index.items():
-            if data.get("embeddings") is None:
-                # 使用文本内容生成简单向量表示
-                text_content = json.dumps(data.get("data", {}), ensure_ascii=False)
-                embedding = self._generate_text_embedding(text_content)
-                data["embeddings"] = embedding
-                logger.debug(f"Generated embedding for {part_number}")
+        def unchanged_records():
+            # 在写锁内生成副本: 计算向量期间被修改或删除的条目不写入，内存中的条目保持不变
+            records = []
+            for (key, data), embedding in zip(pending, vectors):
+                if self.index.get(key) is not data:
+                    continue
+                updated[key] = {
+                    **data, "embeddings": embedding.tolist(), "embedding_model": self.embedding_model
+                }
+                records.append(("put", key, updated[key]))
+            return records
 
-        await self.save_index()
+        await self._write(unchanged_records)
+        # 写入成功后再更新内存；写入期间被其他进程替换的条目以替换后的为准
+        self._apply_puts({key: entry for key, entry in updated.items() if self.index.get(key) is originals[key]})
+        self._maybe_build_ann()
         logger.info(f"Created embeddings for {len(self.index)} parts")
 
-    def _generate_text_embedding(self, text: str) -> List[float]:
+    def _rebuild_embeddings(self):
+        """打开向量文件，并应用快照/日志中内联的向量"""
+        base = QuantizedVectors.open(self.store_path / QuantizedVectors.FILE)
+        self.embeddings = VectorTable(base, rerank=self.config.vector_store_rerank)
+        self.embeddings.retain(self.index)
+        self.ann = None
+        # 快照中的条目不带向量 (在向量文件中)，只需处理日志重放的条目
+        self._sync_embeddings(self.index.decoded())
+
+    def _sync_embeddings(self, entries: Dict[str, Dict]):
+        """
+        把条目中内联的向量移入向量表与 ANN 索引，之后条目不再持有向量
+
+        条目没有 embeddings 字段表示向量在向量文件中 (快照)；
+        字段为 None 表示没有向量 (写入时已重置)。
+        """
+        items = []
+        for key, entry in entries.items():
+            if "embeddings" not in entry:
+                continue
+            vector = entry.pop("embeddings")
+            if vector and (self.embeddings.dim is None or len(vector) == self.embeddings.dim):
+                items.append((key, vector))
+            else:
+                if vector:
+                    logger.warning(f"Skipping embedding of {key}: dimension {len(vector)} "
+                                   f"!= {self.embeddings.dim}")
+                self._drop_embedding(key)
+        if items and self.embeddings.dim is None:
+            # 首批向量决定维度
+            dim = len(items[0][1])
+            items = [(k, v) for k, v in items if len(v) == dim]
+        self.embeddings.set_many(items)
+        keys = [key for key, _ in items]
+        if self._vectors_touched is not None:
+            self._vectors_touched.update(keys)
+        self._sync_ann(keys)
+
+    def _drop_embedding(self, key: str):
+        self.embeddings.remove(key)
+        if self._vectors_touched is not None:
+            self._vectors_touched.add(key)
+        if self._ann_touched is not None:
+            self._ann_touched.add(key)
+        if self.ann is not None:
+            self.ann.remove(key)
+
+    def _sync_ann(self, keys: List[str]):
+        """把矩阵中这些条目的向量同步到 ANN 索引"""
+        if not keys:
+            return
+        if self._ann_touched is not None:
+            self._ann_touched.update(keys)
+        if self.ann is not None:
+            self.ann.add(keys, self.embeddings.vectors(keys))
+
+    # ---------- 近似最近邻索引 ----------
+
+    def _ann_enabled(self) -> bool:
+        return self.config.vector_index == "ivf"
+
+    async def _load_ann(self):
+        """加载已训练的 IVF 中心，并把当前向量分配到倒排表"""
+        if not self._ann_enabled() or not len(self.embeddings):
+            return
+        ivf = IVFIndex.load(self.store_path, nprobe=self.config.ivf_nprobe)
+        if ivf is not None and ivf.dim == self.embeddings.dim:
+            await self._install_ann(lambda keys, vectors: self._populate_ann(ivf, keys, vectors))
+        self._maybe_build_ann()
+
+    def _maybe_build_ann(self):
+        """向量数达到阈值 (或比上次训练时增长 4 倍) 时在后台 (重新) 训练"""
+        if not self._ann_enabled() or (self._ann_build is not None and not self._ann_build.done()):
+            return
+        count = len(self.embeddings)
+        if count < self.config.ivf_min_size:
+            return
+        if self.ann is None or count >= 4 * max(1, self.ann.trained_size):
+            self._ann_build = asyncio.ensure_future(self._background_build_ann())
+
+    async def _background_build_ann(self):
+        try:
+            await self.build_ann_index()
+        except Exception as e:
+            logger.error(f"ANN index build failed: {e}")
+
+    async def build_ann_index(self, nlist: Optional[int] = None):
         """
-        生成文本的简单向量表示 (TF-IDF 风格)
+        训练并构建 IVF 索引 (在线程中进行，完成后保存到 ivf.npz)
 
         Args:
-            text: 输入文本
+            nlist: 倒排表数量，None 时使用配置 (0 表示按数据量自动选择)
+        """
+        nlist = nlist or self.config.ivf_nlist or None
+        nprobe = self.config.ivf_nprobe
 
-        Returns:
-            嵌入向量
+        def build(keys, vectors):
+            ivf = IVFIndex.train(vectors, nlist=nlist, nprobe=nprobe)
+            return self._populate_ann(ivf, keys, vectors)
+
+        ivf = await self._install_ann(build)
+        if ivf is not None:
+            await asyncio.to_thread(ivf.save, self.store_path, self.config.vector_store_fsync)
+
+    @staticmethod
+    def _populate_ann(ivf: IVFIndex, keys: List[str], vectors) -> IVFIndex:
+        ivf.add(keys, vectors)
+        return ivf
+
+    async def _install_ann(self, make: Callable) -> Optional[IVFIndex]:
+        """在线程中由当前向量生成索引，再补上期间发生的变更后启用"""
+        if not len(self.embeddings):
+            return None
+        state = self.embeddings.state()
+        self._ann_touched = set()
+        try:
+            ivf = await asyncio.to_thread(lambda: make(*state.materialize()))
+            for key in self._ann_touched:
+                if key in self.embeddings:
+                    ivf.add([key], self.embeddings.vectors([key]))
+                else:
+                    ivf.remove(key)
+        finally:
+            self._ann_touched = None
+        self.ann = ivf
+        return ivf
+
+    @staticmethod
+    def _embedding_text(entry: Dict) -> str:
+        """用于生成向量的文本 (条目的 datasheet 数据)"""
+        return json.dumps(entry.get("data", {}), ensure_ascii=False)
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """批量生成文本向量 (len(texts) x VECTOR_DIM 矩阵)"""
+        return self.embedder.embed_batch(texts)
+
+    @property
+    def embedding_model(self) -> str:
+        """当前嵌入模型/版本标识 (记录在条目的 embedding_model 字段)"""
+        return self.embedder.version
+
+    def embed_texts(self, texts: List[str], embedder: Optional[Any] = None) -> np.ndarray:
         """
-        import hashlib
-
-        # 综合电子元器件词汇表（扩展至128维）
-        vocabulary = [
-            # 微控制器 & 处理器
-            "arduino", "raspberry", "esp32", "stm32", "nrf52", "k210", "rp2040", "atmega",
-            "pic", "avr", "cortex", "arm", "riscv", "8051", "mcu", "cpu", "soc", "fpga",
-            # 传感器
-            "sensor", "temperature", "humidity", "pressure", "accelerometer", "gyroscope",
-            "magnetometer", "proximity", "light", "infrared", "ultrasonic", "motion", "imu",
-            "bme280", "dht11", "dht22", "ds18b20", "mpu6050", "bmp280", "bh1750", "sgp30",
-            # 电源管理
-            "voltage", "current", "power", "battery", "charger", "ldo", "dc-dc", "buck",
-            "boost", "linear", "switching", "regulation", "reference", "tl431", "lm317",
-            # 通信模块
-            "bluetooth", "wifi", "wireless", "i2c", "spi", "uart", "gpio", "pwm", "can",
-            "rs485", "ethernet", "usb", "usb-c", "hdmi", "mipi", "dvp", "usb-otg",
-            # 无线通信
-            "lora", "nbiot", "gprs", "4g", "5g", "gps", "rf", "subghz", "zigbee", "mqtt",
-            # 显示 & 输入
-            "led", "oled", "lcd", "display", "touch", "seven-segment", "matrix", "tft",
-            # 电机 & 执行器
-            "motor", "servo", "stepper", "driver", "relay", "solenoid", "dc-motor",
-            # 存储 & 存储器
-            "memory", "flash", "eeprom", "sd-card", "fram", "secure", "crypto", "at24c",
-            # 音频 & 多媒体
-            "audio", "microphone", "speaker", "codec", "amplifier", "dac", "adc", "pdm",
-            # 接口 & 连接器
-            "connector", "terminal", "header", "socket", "jack", "plug", "receptacle",
-            # 模拟电路
-            "opamp", "operational", "amplify", "filter", "comparator", "mosfet", "transistor",
-            "bjt", "igbt", "diode", "led", "photodiode", "optocoupler", "triac", "scr",
-            # 被动元件
-            "resistor", "capacitor", "inductor", "transformer", "ferrite", "crystal",
-            # 特殊功能
-            "camera", "vision", "ai", "machine", "learning", "neural", "edge", "iot",
-            # 封装类型
-            "qfp", "bga", "soic", "dip", "ssop", "tssop", "vfqfpn", "wlcsp", "dfn", "qfn",
+        批量生成向量，按 (内容哈希, 模型) 复用缓存，只计算未缓存的文本
+
+        Args:
+            texts: 文本列表
+            embedder: 使用的嵌入器，缺省为当前嵌入器
+        """
+        compute = self.embed_batch if embedder is None else embedder.embed_batch
+        if self.embedding_cache is None or not texts:
+            return compute(texts)
+        model = (embedder or self.embedder).version
+        hashes = [content_hash(text) for text in texts]
+        cached = self.embedding_cache.get_many(model, hashes)
+        missing: Dict[str, str] = {}
+        for key, text in zip(hashes, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        if missing:
+            computed = compute(list(missing.values()))
+            fresh = dict(zip(missing, computed))
+            self.embedding_cache.put_many(model, fresh.items())
+            cached.update(fresh)
+        return np.stack([cached[key] for key in hashes]).astype(np.float32)
+
+    # ---------- 嵌入模型切换 ----------
+
+    def _stale_keys(self) -> List[str]:
+        """向量由其他嵌入模型生成的条目"""
+        model = self.embedding_model
+        base = self.embeddings.base
+        entries = self.index.items()
+        if base is not None and base.model == model:
+            # 未解码的快照条目的向量都在向量文件中，模型与文件头一致
+            entries = list(self.index.decoded().items())
+        return [
+            key for key, entry in entries
+            if key in self.embeddings and entry.get("embedding_model") != model
         ]
 
-        # 生成 128 维向量
-        vector_dim = 128
-        vector = [0.0] * vector_dim
+    def _vector_file_model(self) -> Optional[str]:
+        """合并时写入向量文件头的嵌入模型 (全部向量一致时)，在事件循环中计算"""
+        models = set()
+        base = self.embeddings.base
+        decoded = self.index.decoded()
+        if base is not None and len(decoded) < len(self.index):
+            models.add(base.model)
+        for key, entry in decoded.items():
+            if key in self.embeddings:
+                models.add(entry.get("embedding_model"))
+        return models.pop() if len(models) == 1 else None
 
-        text_lower = text.lower()
-        words = set(text_lower.split())
+    def _maybe_reembed(self):
+        if self._reembedding is not None and not self._reembedding.done():
+            return
+        if self._stale_keys():
+            self._reembedding = asyncio.ensure_future(self._background_reembed())
+
+    async def set_embedder(self, embedder: Any):
+        """
+        切换嵌入模型: 后台为全部条目重新生成向量，完成前查询继续使用旧模型与旧向量
+        """
+        if self._reembedding is None or self._reembedding.done():
+            self._query_embedder = self.embedder
+        self.embedder = embedder
+        self._maybe_reembed()
+        if self._reembedding is None or self._reembedding.done():
+            self._query_embedder = embedder
+
+    async def _background_reembed(self):
+        try:
+            # 期间再次切换模型时继续重建，直到全部向量与当前模型一致
+            while self._stale_keys():
+                await self._reembed()
+        except Exception as e:
+            logger.error(f"Re-embedding with {self.embedding_model} failed: {e}")
+
+    async def _wait_reembed(self):
+        if self._reembedding is not None:
+            await self._reembedding
+            self._reembedding = None
+
+    async def _reembed(self, chunk_size: int = 1000):
+        """
+        用当前模型重新生成过期向量
+
+        新向量分块写入日志 (期间暂停合并)，全部完成后一次性切换到内存中的向量表；
+        期间被修改或删除的条目以修改后的为准。
+        """
+        embedder = self.embedder
+        model = embedder.version
+        done: Dict[str, Dict] = {}
+        originals: Dict[str, Dict] = {}
+        logger.info(f"Re-embedding knowledge base with {model}")
+        while self.embedding_model == model:
+            stale = [key for key in self._stale_keys() if key not in done]
+            if not stale:
+                break
+            for start in range(0, len(stale), chunk_size):
+                entries = {key: self.index[key] for key in stale[start:start + chunk_size] if key in self.index}
+                vectors = self.embed_texts([self._embedding_text(e) for e in entries.values()], embedder)
 
-        for i, vocab_word in enumerate(vocabulary[:vector_dim]):
-            if vocab_word in text_lower:
-                # 多次出现增加权重
-                count = text_lower.count(vocab_word)
-                vector[i] = min(1.0, 0.1 + 0.1 * count)
+                def unchanged_records():
+                    # 在写锁内生成: 计算向量期间被修改或删除的条目不写入，避免覆盖更新的记录
+                    records = []
+                    for (key, entry), vector in zip(entries.items(), vectors):
+                        if self.index.get(key) is not entry:
+                            continue
+                        originals[key] = entry
+                        done[key] = {**entry, "embeddings": vector.tolist(), "embedding_model": model}
+                        records.append(("put", key, done[key]))
+                    return records
 
-        # 如果向量全为0，添加基于文本哈希的特征
-        if all(v == 0.0 for v in vector):
-            hash_val = int(hashlib.md5(text_lower.encode()).hexdigest(), 16)
-            for i in range(min(8, vector_dim)):
-                vector[i] = ((hash_val >> (i * 4)) & 0xF) / 15.0
+                await self._write(unchanged_records, batch=True)
+                await asyncio.sleep(0)
 
-        return vector
+        # 切换: 只替换期间未被修改的条目
+        current = {key: entry for key, entry in done.items() if self.index.get(key) is originals[key]}
+        self.index.update(current)
+        self._sync_embeddings(current)
+        self._query_embedder = embedder
+        if self.embedding_cache is not None and model == self.embedding_model:
+            self.embedding_cache.prune(model)
+        self.ann = None  # 中心由旧向量训练，重新训练前使用精确搜索
+        self._maybe_build_ann()
+        logger.info(f"Re-embedded {len(current)} parts with {model}")
+        if self._log.needs_compaction() and (self._compaction is None or self._compaction.done()):
+            self._compaction = asyncio.ensure_future(self._background_compact())
+
+    def _generate_text_embedding(self, text: str) -> List[float]:
+        """
+        生成文本的简单向量表示 (词汇表计数，见 embedding.py)
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            嵌入向量
+        """
+        return self.embedder.embed_batch([text])[0].tolist()
 
     async def semantic_search(
         self,
         query: str,
-        top_k: int = 5
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
     ) -> List[Dict]:
         """
         语义搜索 (使用向量相似度)
@@ -270,25 +822,75 @@ class VectorStore:
         Args:
             query: 查询文本
             top_k: 返回前 k 个结果
+            filters: 过滤条件 (先于相似度计算应用)
 
         Returns:
             按相似度排序的结果
         """
-        query_embedding = self._generate_text_embedding(query)
+        return (await self.semantic_search_batch([query], top_k, filters=filters))[0]
 
-        results = []
-        for part_number, data in self.index.items():
-            embeddings = data.get("embeddings")
-            if embeddings:
-                similarity = self._cosine_similarity(query_embedding, embeddings)
-                results.append({
-                    **data,
-                    "similarity": similarity
-                })
+    async def semantic_search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        filters: Optional[Dict] = None,
+    ) -> List[List[Dict]]:
+        """
+        批量语义搜索 (一次矩阵乘法计算全部查询的相似度)
 
-        # 按相似度排序
-        results.sort(key=lambda x: x.get("similarity", 0), reverse=True)
-        return results[:top_k]
+        向量数达到 ivf_min_size 后使用 IVF 近似索引，只扫描 nprobe 个倒排表。
+
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询返回前 k 个结果
+            nprobe: 扫描的倒排表数量 (召回/延迟权衡)，None 使用配置
+            filters: 过滤条件 (先于相似度计算应用)
+
+        Returns:
+            与 queries 一一对应的结果列表
+        """
+        if not queries:
+            return []
+        await self.refresh()
+        if filters:
+            await self._ensure_search_indexes()
+        allowed = self.filter_index.matching(filters)
+        query_embeddings = self._query_embedder.embed_batch(queries)
+        matches = self._vector_search(query_embeddings, top_k, allowed, nprobe)
+        return [
+            [{**self.index[part_number], "similarity": similarity} for part_number, similarity in hits]
+            for hits in matches
+        ]
+
+    def _vector_search(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        allowed: Optional[set] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        向量相似度检索 (allowed 为过滤后的条目，None 表示不限制)
+
+        过滤后剩余条目较少时直接对它们的向量精确计算；剩余条目足够多且有 IVF 索引时，
+        在探测到的倒排表中只对剩余条目打分。
+        """
+        ann = self.ann if self.ann is not None and self.ann.dim == self.embeddings.dim else None
+        if allowed is None:
+            if ann is not None:
+                return ann.search_batch(normalize_rows(query_embeddings), top_k, nprobe)
+            return self.embeddings.search_batch(query_embeddings, top_k)
+        if ann is not None and len(allowed) >= self.config.ivf_min_size:
+            return ann.search_batch(normalize_rows(query_embeddings), top_k, nprobe, allowed=allowed)
+        keys = [key for key in sorted(allowed) if key in self.embeddings]
+        if not keys:
+            return [[] for _ in query_embeddings]
+        scores = normalize_rows(query_embeddings) @ self.embeddings.vectors(keys).T
+        return [
+            [(keys[i], float(row[i])) for i in top_k_indices(row, top_k)]
+            for row in scores
+        ]
 
     def _cosine_similarity(self, vec_a: List[float], vec_b: List[float]) -> float:
         """
@@ -312,3 +914,27 @@ class VectorStore:
             return 0.0
 
         return dot_product / (magnitude_a * magnitude_b)
+
+
+# 进程级共享知识库 (按存储路径)，避免每个请求重新加载快照与日志
+_STORES: Dict[str, VectorStore] = {}
+
+
+async def get_vector_store(config: Optional[Config] = None) -> VectorStore:
+    """
+    获取 (或创建并初始化) 指定路径的共享知识库
+
+    打开只内存映射快照，不解码条目；已缓存的实例按磁盘版本 (快照文件标识与
+    日志长度) 同步其他进程的写入，版本未变时只有两次 stat。
+    """
+    config = config or Config.load()
+    key = str(Path(config.vector_store_path).resolve())
+    store = _STORES.get(key)
+    if store is None:
+        store = VectorStore(config)
+        await store.initialize()
+        # 并发初始化时以先完成的为准
+        store = _STORES.setdefault(key, store)
+    else:
+        await store.refresh()
+    return store
@@ -0,0 +1,134 @@
+"""
+本地文本嵌入 - 电子元器件词汇表向量
+Local vocabulary-based text embeddings
+
+每个维度对应词汇表中的一个词，取值 min(1, 0.1 + 0.1 x 出现次数)；
+没有任何词命中时用文本哈希生成少量特征，保证向量非零。
+
+分词只扫描一遍文本，词元经预编译的 词 → 维度 映射计数 (不再对每个词重复扫描全文):
+- 带连字符的词元同时计入整体与各部分 ("usb-c" → usb-c, usb, c)
+- 型号前缀: 词元以词汇开头且其后为数字，或词汇本身含数字时计入
+  ("stm32f103c8t6" → stm32, "atmega328p" → atmega)
+
+示例:
+    >>> embedder = TextEmbedder()
+    >>> embedder.embed_batch(["ESP32 WiFi module", "LM358 opamp"]).shape
+    (2, 128)
+"""
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+import hashlib
+import re
+
+import numpy as np
+
+# 向量维度
+VECTOR_DIM = 128
+
+# 嵌入算法版本，词汇表或计算方式改变时递增
+EMBEDDING_VERSION = "vocab-v2"
+
+# 综合电子元器件词汇表 (只使用前 VECTOR_DIM 个)
+VOCABULARY = [
+    # 微控制器 & 处理器
+    "arduino", "raspberry", "esp32", "stm32", "nrf52", "k210", "rp2040", "atmega",
+    "pic", "avr", "cortex", "arm", "riscv", "8051", "mcu", "cpu", "soc", "fpga",
+    # 传感器
+    "sensor", "temperature", "humidity", "pressure", "accelerometer", "gyroscope",
+    "magnetometer", "proximity", "light", "infrared", "ultrasonic", "motion", "imu",
+    "bme280", "dht11", "dht22", "ds18b20", "mpu6050", "bmp280", "bh1750", "sgp30",
+    # 电源管理
+    "voltage", "current", "power", "battery", "charger", "ldo", "dc-dc", "buck",
+    "boost", "linear", "switching", "regulation", "reference", "tl431", "lm317",
+    # 通信模块
+    "bluetooth", "wifi", "wireless", "i2c", "spi", "uart", "gpio", "pwm", "can",
+    "rs485", "ethernet", "usb", "usb-c", "hdmi", "mipi", "dvp", "usb-otg",
+    # 无线通信
+    "lora", "nbiot", "gprs", "4g", "5g", "gps", "rf", "subghz", "zigbee", "mqtt",
+    # 显示 & 输入
+    "led", "oled", "lcd", "display", "touch", "seven-segment", "matrix", "tft",
+    # 电机 & 执行器
+    "motor", "servo", "stepper", "driver", "relay", "solenoid", "dc-motor",
+    # 存储 & 存储器
+    "memory", "flash", "eeprom", "sd-card", "fram", "secure", "crypto", "at24c",
+    # 音频 & 多媒体
+    "audio", "microphone", "speaker", "codec", "amplifier", "dac", "adc", "pdm",
+    # 接口 & 连接器
+    "connector", "terminal", "header", "socket", "jack", "plug", "receptacle",
+    # 模拟电路
+    "opamp", "operational", "amplify", "filter", "comparator", "mosfet", "transistor",
+    "bjt", "igbt", "diode", "led", "photodiode", "optocoupler", "triac", "scr",
+    # 被动元件
+    "resistor", "capacitor", "inductor", "transformer", "ferrite", "crystal",
+    # 特殊功能
+    "camera", "vision", "ai", "machine", "learning", "neural", "edge", "iot",
+    # 封装类型
+    "qfp", "bga", "soic", "dip", "ssop", "tssop", "vfqfpn", "wlcsp", "dfn", "qfn",
+]
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+class TextEmbedder:
+    """
+    词汇表嵌入器
+
+    Args:
+        vocabulary: 词汇表 (只使用前 dim 个)
+        dim: 向量维度
+    """
+
+    version = f"local-{EMBEDDING_VERSION}"
+
+    def __init__(self, vocabulary: Sequence[str] = VOCABULARY, dim: int = VECTOR_DIM):
+        self.dim = dim
+        self.positions: Dict[str, Tuple[int, ...]] = {}
+        for i, word in enumerate(vocabulary[:dim]):
+            self.positions[word] = self.positions.get(word, ()) + (i,)
+        self._prefix_lengths = sorted({len(word) for word in self.positions})
+        self._hits = lru_cache(maxsize=65536)(self._token_hits)
+
+    def _token_hits(self, token: str) -> Tuple[int, ...]:
+        """单个词元命中的维度"""
+        hits = self.positions.get(token, ())
+        if "-" in token:
+            for part in token.split("-"):
+                hits += self.positions.get(part, ())
+            return hits
+        if hits:
+            return hits
+        for length in self._prefix_lengths:
+            if length >= len(token):
+                break
+            word = token[:length]
+            if word in self.positions and (token[length].isdigit() or any(c.isdigit() for c in word)):
+                hits += self.positions[word]
+        return hits
+
+    def counts(self, text: str) -> List[int]:
+        """文本命中的维度列表 (重复出现即重复计入)"""
+        hits = self._hits
+        return [i for token in _TOKEN_RE.findall(text.lower()) for i in hits(token)]
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """批量生成向量 (len(texts) x dim，float32)，整批一次计数"""
+        rows: List[int] = []
+        cols: List[int] = []
+        for row, text in enumerate(texts):
+            hits = self.counts(text)
+            rows.extend([row] * len(hits))
+            cols.extend(hits)
+        counts = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(counts, (rows, cols), 1.0)
+        matrix = np.where(counts > 0, np.minimum(1.0, 0.1 + 0.1 * counts), 0.0).astype(np.float32)
+
+        # 没有任何词命中: 添加基于文本哈希的特征
+        for row in np.flatnonzero(~counts.any(axis=1)):
+            hash_val = int(hashlib.md5(texts[row].lower().encode()).hexdigest(), 16)
+            for i in range(min(8, self.dim)):
+                matrix[row, i] = ((hash_val >> (i * 4)) & 0xF) / 15.0
+        return matrix
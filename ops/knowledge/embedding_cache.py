@@ -0,0 +1,142 @@
+"""
+知识库向量缓存 - 按 (内容哈希, 嵌入模型) 持久化
+Content-hash keyed embedding cache (SQLite)
+
+重新导入内容未变的 datasheet 时直接复用已计算的向量；嵌入模型/版本是 key 的一部分，
+不同模型的向量不会混用。模型升级完成后可用 prune() 清理旧模型的向量。
+只读的进程 (如搜索) 不会创建 SQLite 文件，第一次写入时才创建。
+"""
+from typing import Any, Dict, Iterable, Sequence, Tuple
+from pathlib import Path
+import hashlib
+import logging
+import sqlite3
+import time
+
+import numpy as np
+
+from ..cache import SQLiteLRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """嵌入文本的内容哈希"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache(SQLiteLRUCache):
+    """
+    向量缓存
+
+    Args:
+        path: SQLite 文件路径
+        max_bytes: 缓存总大小上限 (字节，按向量字节数计)
+    """
+
+    FILE = "embedding_cache.sqlite"
+
+    TABLE = "embeddings"
+    KEY_COLUMNS = ("hash", "model")
+    LAZY = True
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS embeddings (
+        hash TEXT NOT NULL,
+        model TEXT NOT NULL,
+        vector BLOB NOT NULL,
+        stored_at REAL NOT NULL,
+        accessed_at REAL NOT NULL DEFAULT 0,
+        size INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (hash, model)
+    );
+    """
+
+    INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_embeddings_accessed ON embeddings(accessed_at);
+    """
+
+    # SQLite 单条语句的参数上限较低，分批查询
+    _BATCH = 500
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        super().__init__(path, max_bytes)
+
+    @classmethod
+    def from_config(cls, config: Any) -> "EmbeddingCache":
+        """根据 Config 创建缓存 (位于知识库目录下)"""
+        return cls(
+            path=str(Path(config.vector_store_path) / cls.FILE),
+            max_bytes=config.embedding_cache_mb * 1024 * 1024,
+        )
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(embeddings)")}
+        if "size" not in columns:
+            # 旧版本的缓存文件没有 LRU 所需的列
+            conn.execute("ALTER TABLE embeddings ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            conn.execute("ALTER TABLE embeddings ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            conn.execute("UPDATE embeddings SET accessed_at = stored_at, size = LENGTH(vector)")
+        conn.executescript(self.INDEXES)
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """批量读取，返回命中的 {hash: vector} (命中的条目更新访问时间)"""
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        now = time.time()
+        with self._lock:
+            conn = self._connection(create=False)
+            # 文件尚未创建时全部未命中
+            starts = range(0, len(unique), self._BATCH) if conn is not None else range(0)
+            for start in starts:
+                chunk = unique[start:start + self._BATCH]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    (model, *chunk),
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                if rows:
+                    conn.execute(
+                        f"UPDATE embeddings SET accessed_at = ? WHERE model = ? AND hash IN ({placeholders})",
+                        (now, model, *chunk),
+                    )
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        """批量写入 (一次事务)，必要时淘汰最久未访问的向量"""
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, model, blob, now, now, len(blob)))
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection(create=True)
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings "
+                    "(hash, model, vector, stored_at, accessed_at, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._evict_locked(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def prune(self, keep_model: str) -> int:
+        """删除其他模型的向量，返回删除条数"""
+        with self._lock:
+            conn = self._connection(create=False)
+            if conn is None:
+                return 0
+            cursor = conn.execute("DELETE FROM embeddings WHERE model != ?", (keep_model,))
+        if cursor.rowcount:
+            logger.info(f"Pruned {cursor.rowcount} cached embeddings of old models")
+        return cursor.rowcount
@@ -0,0 +1,176 @@
+"""
+知识库属性过滤索引 - 按属性值维护位图
+Attribute bitmaps for pre-filtering (category / package / manufacturer / voltage)
+
+- 每个条目分配一个槽位 (删除后槽位复用)，属性值 → 位图 (Python int 的二进制位)
+- 批量写入 (重建、update) 先按属性值收集槽位，每个位图只构造一次，重建为线性时间
+- 过滤时先对各属性的位图求交集，再只对剩余条目打分 (关键词、向量、ANN 均适用)
+- category/manufacturer 忽略大小写完全匹配，package 为子串匹配
+- voltage 按数值匹配: 条目的电压值解析为范围 ("2.0-3.6V" → 2.0~3.6)，查询数值
+  (如 "3.3" / "3.3V") 落在范围内即匹配；无法解析为数值的查询或条目按子串匹配
+- 子串与数值匹配只需扫描不同的属性值 (远少于条目数)
+
+属性值取自 datasheet 数据的顶层字段，缺失时取 specifications/specs 中的同名字段。
+"""
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+import re
+
+import numpy as np
+
+FILTER_FIELDS = ("category", "package", "manufacturer", "voltage")
+EXACT_FIELDS = frozenset({"category", "manufacturer"})
+
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+_VOLTAGE_QUERY = re.compile(r'\s*(\d+(?:\.\d+)?)\s*v?\s*')
+
+
+def attribute(data: Dict, field: str) -> str:
+    """条目数据中某属性的规范化 (小写) 值，缺失为空字符串"""
+    value = data.get(field)
+    if value in (None, ""):
+        specs = data.get("specifications") or data.get("specs") or {}
+        value = specs.get(field) if isinstance(specs, dict) else None
+    return str(value).strip().lower() if value not in (None, "") else ""
+
+
+@lru_cache(maxsize=4096)
+def voltage_range(value: str) -> Optional[Tuple[float, float]]:
+    """电压属性值 → (最低, 最高)，不含数字时为 None"""
+    numbers = [float(number) for number in _NUMBER.findall(value)]
+    return (min(numbers), max(numbers)) if numbers else None
+
+
+def voltage_query(value: str) -> Optional[float]:
+    """电压过滤值 → 数值 ("3.3" / "3.3V")，不是单个数值时为 None"""
+    match = _VOLTAGE_QUERY.fullmatch(value)
+    return float(match.group(1)) if match else None
+
+
+def slots_to_bits(slots: List[int]) -> int:
+    """槽位列表 → 位图 (一次构造，避免逐位 | 复制大整数)"""
+    if len(slots) == 1:
+        return 1 << slots[0]
+    flags = np.zeros(max(slots) + 1, dtype=np.uint8)
+    flags[slots] = 1
+    return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+
+
+class FilterIndex:
+    """属性位图索引"""
+
+    def __init__(self):
+        self._slots: Dict[str, int] = {}  # 条目键 → 槽位
+        self._keys: List[Optional[str]] = []  # 槽位 → 条目键
+        self._free: List[int] = []
+        self._values: Dict[str, Dict[str, str]] = {}  # 条目键 → {属性: 值}
+        self.bitmaps: Dict[str, Dict[str, int]] = {field: {} for field in FILTER_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def rebuild(self, index: Dict[str, Dict]) -> None:
+        """由完整索引重建 (槽位连续分配)"""
+        self._slots.clear()
+        self._keys.clear()
+        self._free.clear()
+        self._values.clear()
+        for bitmaps in self.bitmaps.values():
+            bitmaps.clear()
+        self.update(index)
+
+    def update(self, entries: Dict[str, Dict]) -> None:
+        """新增或替换多个条目 (每个属性值的位图只合并一次)"""
+        added: Dict[Tuple[str, str], List[int]] = {}
+        for key, entry in entries.items():
+            self.remove(key)
+            slot = self._free.pop() if self._free else len(self._keys)
+            if slot == len(self._keys):
+                self._keys.append(key)
+            else:
+                self._keys[slot] = key
+            self._slots[key] = slot
+            data = entry.get("data") or {}
+            values = {field: attribute(data, field) for field in FILTER_FIELDS}
+            self._values[key] = values
+            for field, value in values.items():
+                added.setdefault((field, value), []).append(slot)
+        for (field, value), slots in added.items():
+            bitmaps = self.bitmaps[field]
+            bitmaps[value] = bitmaps.get(value, 0) | slots_to_bits(slots)
+
+    def add(self, key: str, entry: Dict) -> None:
+        """新增或替换条目"""
+        self.update({key: entry})
+
+    def remove(self, key: str) -> None:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        bit = 1 << slot
+        for field, value in self._values.pop(key).items():
+            bitmaps = self.bitmaps[field]
+            remaining = bitmaps[value] & ~bit
+            if remaining:
+                bitmaps[value] = remaining
+            else:
+                del bitmaps[value]
+        self._keys[slot] = None
+        self._free.append(slot)
+
+    # ---------- 查询 ----------
+
+    def _field_mask(self, field: str, value: str) -> int:
+        bitmaps = self.bitmaps[field]
+        value = str(value).strip().lower()
+        if field in EXACT_FIELDS:
+            return bitmaps.get(value, 0)
+        target = voltage_query(value) if field == "voltage" else None
+        mask = 0
+        for candidate, bits in bitmaps.items():
+            bounds = voltage_range(candidate) if target is not None else None
+            if bounds is not None:
+                matched = bounds[0] <= target <= bounds[1]
+            else:
+                matched = value in candidate
+            if matched:
+                mask |= bits
+        return mask
+
+    def mask(self, filters: Dict) -> Optional[int]:
+        """
+        满足全部过滤条件的条目位图
+
+        Returns:
+            位图；过滤条件不含已索引属性时返回 None (不限制)
+        """
+        result: Optional[int] = None
+        for field, value in filters.items():
+            if field not in self.bitmaps or value is None:
+                continue
+            bits = self._field_mask(field, value)
+            result = bits if result is None else result & bits
+            if not result:
+                return 0
+        return result
+
+    def keys(self, mask: int) -> List[str]:
+        """位图 → 条目键 (按槽位顺序)"""
+        if not mask:
+            return []
+        size = (mask.bit_length() + 7) // 8
+        bits = np.unpackbits(np.frombuffer(mask.to_bytes(size, "little"), dtype=np.uint8), bitorder="little")
+        return [self._keys[slot] for slot in np.flatnonzero(bits)]
+
+    def matching(self, filters: Optional[Dict]) -> Optional[set]:
+        """
+        满足过滤条件的条目键集合
+
+        Returns:
+            键集合；没有 (可用的) 过滤条件时返回 None
+        """
+        if not filters:
+            return None
+        mask = self.mask(filters)
+        return None if mask is None else set(self.keys(mask))
+
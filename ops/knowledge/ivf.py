@@ -0,0 +1,260 @@
+"""
+知识库近似最近邻索引 - IVF (倒排文件 + k-means 粗量化)
+Approximate nearest neighbour search with an inverted-file index (NumPy only)
+
+- 训练: 在抽样向量上做球面 k-means (余弦距离)，得到 nlist 个中心
+- 插入: 向量归入最相似的中心所在的倒排表，支持增量插入/删除
+- 查询: 只扫描与查询最相似的 nprobe 个倒排表；nprobe 越大召回越高、延迟越高，
+  nprobe = nlist 时等价于精确搜索
+- 持久化: 只保存训练好的中心 (ivf.npz，与 index.json 同目录)；
+  倒排表在加载时由向量矩阵一次矩阵乘法重新分配，不会与追加日志不一致
+
+向量都应已 L2 归一化 (见 matrix.py)，相似度即点积。
+
+示例:
+    >>> ivf = IVFIndex.train(vectors, nlist=1024)
+    >>> ivf.add(keys, vectors)
+    >>> ivf.search(query, top_k=10, nprobe=16)
+"""
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+from pathlib import Path
+import io
+import logging
+
+import numpy as np
+
+from .matrix import normalize_rows, top_k_indices
+from .storage import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+def default_nlist(count: int) -> int:
+    """按数据量选择倒排表数量 (约 4·sqrt(n))"""
+    return max(1, int(4 * count ** 0.5))
+
+
+def kmeans(
+    vectors: np.ndarray,
+    nlist: int,
+    iterations: int = 20,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    球面 k-means: 以点积为相似度，中心每轮重新归一化
+
+    Args:
+        vectors: 已归一化的训练向量 (n x dim)
+        nlist: 中心数量 (不超过 n)
+        iterations: 迭代次数
+        seed: 随机种子
+
+    Returns:
+        归一化的中心 (nlist x dim)
+    """
+    rng = np.random.default_rng(seed)
+    n = vectors.shape[0]
+    nlist = min(nlist, n)
+    centroids = vectors[rng.choice(n, nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            # 空簇重新取随机样本作为中心
+            sums[empty] = vectors[rng.choice(n, int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    IVF-Flat 倒排索引
+
+    Args:
+        centroids: 训练好的中心 (nlist x dim，已归一化)
+        nprobe: 默认查询的倒排表数量
+        trained_size: 训练时的数据量 (用于判断是否需要重新训练)
+    """
+
+    FILE = "ivf.npz"
+
+    def __init__(self, centroids: np.ndarray, nprobe: int = 8, trained_size: int = 0):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.nlist, self.dim = self.centroids.shape
+        self.nprobe = nprobe
+        self.trained_size = trained_size
+        self._vectors: List[np.ndarray] = [np.zeros((0, self.dim), dtype=np.float32)] * self.nlist
+        self._keys: List[List[str]] = [[] for _ in range(self.nlist)]
+        self._where: Dict[str, Tuple[int, int]] = {}  # 型号 → (倒排表, 位置)
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        sample_size: int = 256,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """
+        训练中心
+
+        Args:
+            vectors: 已归一化的向量 (n x dim)
+            nlist: 倒排表数量，None 表示按数据量自动选择
+            nprobe: 默认查询的倒排表数量
+            sample_size: 每个中心最多使用的训练样本数 (控制训练耗时)
+        """
+        n = vectors.shape[0]
+        if n == 0:
+            raise ValueError("Cannot train an IVF index without vectors")
+        nlist = min(nlist or default_nlist(n), n)
+        sample = vectors
+        if n > nlist * sample_size:
+            rng = np.random.default_rng(seed)
+            sample = vectors[rng.choice(n, nlist * sample_size, replace=False)]
+        centroids = kmeans(np.asarray(sample, dtype=np.float32), nlist, seed=seed)
+        logger.info(f"Trained IVF index: {len(centroids)} lists on {len(sample)} of {n} vectors")
+        return cls(centroids, nprobe=nprobe, trained_size=n)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._where
+
+    # ---------- 写入 ----------
+
+    def assign(self, vectors: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        """向量 → 最相似中心的下标 (分块计算，控制内存)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        result = np.empty(vectors.shape[0], dtype=np.intp)
+        for start in range(0, vectors.shape[0], chunk):
+            block = vectors[start:start + chunk]
+            result[start:start + chunk] = np.argmax(block @ self.centroids.T, axis=1)
+        return result
+
+    def add(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        """插入或替换 (vectors 需已归一化)"""
+        if not len(keys):
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        for key in keys:
+            self.remove(key)
+        lists = self.assign(vectors)
+        order = np.argsort(lists, kind="stable")
+        bounds = np.flatnonzero(np.diff(lists[order])) + 1
+        for group in np.split(order, bounds):
+            c = int(lists[group[0]])
+            start = len(self._keys[c])
+            self._vectors[c] = np.concatenate([self._vectors[c][:start], vectors[group]])
+            for offset, i in enumerate(group):
+                self._keys[c].append(keys[i])
+                self._where[keys[i]] = (c, start + offset)
+
+    def remove(self, key: str) -> None:
+        """删除 (倒排表最后一项移到空位)"""
+        where = self._where.pop(key, None)
+        if where is None:
+            return
+        c, pos = where
+        last = len(self._keys[c]) - 1
+        if pos != last:
+            moved = self._keys[c][last]
+            self._keys[c][pos] = moved
+            self._vectors[c][pos] = self._vectors[c][last]
+            self._where[moved] = (c, pos)
+        self._keys[c].pop()
+        self._vectors[c] = self._vectors[c][:last]
+
+    # ---------- 查询 ----------
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        allowed: Optional[Collection[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """单个查询 (query 需已归一化)"""
+        return self.search_batch(np.asarray(query, dtype=np.float32)[None, :], top_k, nprobe, allowed)[0]
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        allowed: Optional[Collection[str]] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        批量查询: 每个查询只扫描最相似的 nprobe 个倒排表
+
+        allowed 不为 None 时，倒排表中只有属于 allowed 的向量参与打分 (过滤先于打分)。
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        coarse = queries @ self.centroids.T
+        results = []
+        for query, centroid_scores in zip(queries, coarse):
+            probes = top_k_indices(centroid_scores, nprobe)
+            keys: List[str] = []
+            blocks = []
+            for c in probes:
+                if not self._keys[c]:
+                    continue
+                if allowed is None:
+                    keys.extend(self._keys[c])
+                    blocks.append(self._vectors[c])
+                    continue
+                rows = [i for i, key in enumerate(self._keys[c]) if key in allowed]
+                if rows:
+                    keys.extend(self._keys[c][i] for i in rows)
+                    blocks.append(self._vectors[c][rows])
+            if not blocks:
+                results.append([])
+                continue
+            scores = np.concatenate(blocks) @ query
+            top = top_k_indices(scores, top_k)
+            results.append([(keys[i], float(scores[i])) for i in top])
+        return results
+
+    # ---------- 持久化 ----------
+
+    def save(self, directory: Path, fsync: bool = True) -> None:
+        """保存训练好的中心 (倒排表加载时重新分配)"""
+        buffer = io.BytesIO()
+        np.savez(buffer, centroids=self.centroids, trained_size=self.trained_size)
+        atomic_write(Path(directory) / self.FILE, buffer.getvalue(), fsync=fsync)
+
+    @classmethod
+    def load(cls, directory: Path, nprobe: int = 8) -> Optional["IVFIndex"]:
+        """加载中心，文件不存在或损坏时返回 None"""
+        path = Path(directory) / cls.FILE
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(data["centroids"], nprobe=nprobe, trained_size=int(data["trained_size"]))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable IVF index {path}: {e}")
+            return None
+
+
+def recall_at_k(
+    exact: List[List[Tuple[str, float]]],
+    approximate: List[List[Tuple[str, float]]],
+) -> float:
+    """近似结果相对精确结果的平均召回率"""
+    if not exact:
+        return 1.0
+    total = 0.0
+    for truth, found in zip(exact, approximate):
+        expected = {key for key, _ in truth}
+        if expected:
+            total += len(expected & {key for key, _ in found}) / len(expected)
+        else:
+            total += 1.0
+    return total / len(exact)
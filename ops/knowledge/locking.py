@@ -0,0 +1,101 @@
+"""
+知识库文件锁 - 多进程单写者协调
+Cross-process file lock (fcntl on POSIX, msvcrt on Windows)
+
+多个 API worker 进程共享同一个知识库目录时，追加日志、读取新记录与合并快照
+都在该锁内进行；同一进程内的线程之间同样互斥，并允许同一线程重入。
+"""
+from pathlib import Path
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+logger = logging.getLogger(__name__)
+
+
+class FileLock:
+    """
+    可重入的进程间排他锁
+
+    Args:
+        path: 锁文件路径 (不存在时创建，内容无意义)
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        if fcntl is None and msvcrt is None:
+            logger.warning("No file locking available; knowledge store is only safe within one process")
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = self._lock_file()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                self._unlock_file(fd)
+            finally:
+                self._thread_lock.release()
+        else:
+            self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    def _lock_file(self):
+        if fcntl is None and msvcrt is None:
+            return None
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                # msvcrt.locking 阻塞约 10 秒后报错，持续重试
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.05)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def _unlock_file(self, fd) -> None:
+        if fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
@@ -0,0 +1,148 @@
+"""
+知识库向量矩阵 - 预归一化 float32 矩阵 + 批量余弦相似度
+Contiguous embedding matrix for batched cosine similarity
+
+- 全部向量存放在一个连续的 float32 矩阵中，每行写入时即归一化 (L2 = 1)，
+  余弦相似度因此就是点积，查询时不再重复计算两边的模长
+- 行号 ↔ 型号 双向映射；删除时用最后一行填补空位，矩阵始终紧凑
+- 单次查询为一次矩阵-向量乘法 + argpartition 取 top-k，
+  批量查询为一次矩阵-矩阵乘法
+
+示例:
+    >>> matrix = EmbeddingMatrix()
+    >>> matrix.set("LM358", vector)
+    >>> matrix.search(query_vector, top_k=5)
+    [("LM358", 0.93), ...]
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """按行 L2 归一化 (零向量保持为零)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    np.maximum(norms, np.finfo(np.float32).tiny, out=norms)
+    return vectors / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """scores 中最大的 k 个下标，按分数降序 (同分时下标小的在前)"""
+    n = scores.shape[-1]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+class EmbeddingMatrix:
+    """
+    预归一化向量矩阵
+
+    Args:
+        dim: 向量维度，None 表示由第一个写入的向量决定
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self.keys: List[str] = []  # 行号 → 型号
+        self.row_of: Dict[str, int] = {}  # 型号 → 行号
+        self._rows = np.zeros((0, dim or 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.row_of
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """有效行组成的矩阵视图 (n x dim)"""
+        return self._rows[:len(self.keys)]
+
+    # ---------- 写入 ----------
+
+    def _reserve(self, count: int) -> None:
+        """保证容量至少为 count 行 (按倍数扩容)"""
+        capacity = self._rows.shape[0]
+        if count <= capacity:
+            return
+        rows = np.zeros((max(count, capacity * 2, 64), self.dim), dtype=np.float32)
+        rows[:len(self.keys)] = self.matrix
+        self._rows = rows
+
+    def _check(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError(f"Expected a 2-D array of vectors, got shape {vectors.shape}")
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._rows = np.zeros((0, self.dim), dtype=np.float32)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} != {self.dim}")
+        return vectors
+
+    def set(self, key: str, vector: Sequence[float]) -> None:
+        """新增或替换一行"""
+        self.set_many([(key, vector)])
+
+    def set_many(self, items: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        """批量新增或替换 (一次归一化)"""
+        items = list(items)
+        if not items:
+            return
+        vectors = normalize_rows(self._check([vector for _, vector in items]))
+        self._reserve(len(self.keys) + len(items))
+        for (key, _), vector in zip(items, vectors):
+            row = self.row_of.get(key)
+            if row is None:
+                row = self.row_of[key] = len(self.keys)
+                self.keys.append(key)
+            self._rows[row] = vector
+
+    def remove(self, key: str) -> None:
+        """删除一行 (最后一行移到空位)"""
+        row = self.row_of.pop(key, None)
+        if row is None:
+            return
+        last = len(self.keys) - 1
+        if row != last:
+            moved = self.keys[last]
+            self._rows[row] = self._rows[last]
+            self.keys[row] = moved
+            self.row_of[moved] = row
+        self.keys.pop()
+
+    def clear(self) -> None:
+        self.keys.clear()
+        self.row_of.clear()
+        self._rows = np.zeros((0, self.dim or 0), dtype=np.float32)
+
+    # ---------- 查询 ----------
+
+    def search(self, query: Sequence[float], top_k: int = 5) -> List[Tuple[str, float]]:
+        """单个查询的 top-k (型号, 余弦相似度)"""
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(
+        self,
+        queries: Sequence[Sequence[float]],
+        top_k: int = 5,
+    ) -> List[List[Tuple[str, float]]]:
+        """批量查询: 一次矩阵乘法得到全部相似度"""
+        if not len(queries):
+            return []
+        if not len(self.keys) or self.dim is None:
+            return [[] for _ in queries]
+        queries = normalize_rows(self._check(queries))
+        scores = queries @ self.matrix.T  # (q x n)
+        results = []
+        for row_scores in scores:
+            top = top_k_indices(row_scores, top_k)
+            results.append([(self.keys[i], float(row_scores[i])) for i in top])
+        return results
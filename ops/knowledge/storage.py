@@ -0,0 +1,481 @@
+"""
+知识库持久化 - 追加日志 + 快照
+Append-only record log with snapshot compaction
+
+磁盘布局 (vector_store_path 目录下):
+    index.json  快照: {part_number: entry}，每个条目一行的紧凑 JSON
+    index.log   追加日志: 每行一条 JSON 记录
+                {"op": "put", "key": "...", "entry": {...}} / {"op": "del", "key": "..."}
+                批量事务写为一行: {"op": "batch", "records": [...]}
+
+- 写入只追加日志 (flush + fsync)，单次写入代价与索引大小无关
+- 打开时加载快照并重放日志；日志末尾因崩溃写了一半的行会被截掉
+- 日志超过阈值时合并为新快照: 临时文件 + fsync + 原子 rename，
+  合并期间新追加的记录会保留到新日志中
+- 批量事务只占一行日志，崩溃时要么整批重放、要么整批丢弃
+- 记录为幂等的 put/del，快照替换后、日志截断前崩溃，重放结果仍然正确
+
+多进程 (多个 API worker 共享同一目录):
+- 追加、读取新记录、加载与合并都持有进程间文件锁 index.lock (见 locking.py)，
+  读者不会看到其他进程写了一半的日志行，也不会误把它当作崩溃残行截掉
+- 每个进程记录已应用到内存的日志位置 (offset) 与快照文件标识；
+  read_new() 返回其他进程追加的记录，快照被其他进程替换时返回 None (需要重新加载)
+- 合并时若快照已被其他进程替换则放弃，避免用过期的偏移截断新日志
+
+快照按需解码 (LazyIndex): 打开时只内存映射 index.json 并记录每行条目的位置，
+条目在第一次访问时才 json 解码；合并时未访问过的条目直接复制原始字节。
+旧格式 (整个对象写在一行) 的快照仍按原方式一次性加载。
+"""
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Tuple, Union
+from pathlib import Path
+import json
+import logging
+import mmap
+import os
+
+from .locking import FileLock
+
+logger = logging.getLogger(__name__)
+
+# (op, key, entry) 三元组，op 为 "put" / "del"
+Record = Tuple[str, str, Optional[Dict]]
+
+
+def _fsync_dir(path: Path) -> None:
+    """同步目录项，保证 rename 落盘 (Windows 不支持，忽略)"""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: Path, data: Union[bytes, Iterable[bytes]], fsync: bool = True) -> None:
+    """写入临时文件后原子替换目标文件 (data 可为分段的 bytes，避免拼接大文件)"""
+    tmp = path.with_name(path.name + ".tmp")
+    chunks = [data] if isinstance(data, (bytes, bytearray, memoryview)) else data
+    with open(tmp, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if fsync:
+        _fsync_dir(path.parent)
+
+
+def _escaped(buffer, position: int) -> bool:
+    """position 处的字符前是否有奇数个反斜杠"""
+    count = 0
+    while buffer[position - 1 - count] == 0x5C:
+        count += 1
+    return count % 2 == 1
+
+
+class LazyIndex(MutableMapping):
+    """
+    按需解码的快照索引 {part_number: entry}
+
+    快照中的条目在第一次读取时解码并缓存 (之后返回同一对象)；
+    写入与删除只修改内存，不影响映射的快照文件。
+    """
+
+    def __init__(self, data: Optional[Dict[str, Dict]] = None):
+        self._buffer: Union[mmap.mmap, bytes] = b""
+        self._spans: Dict[str, Tuple[int, int, int]] = {}  # 快照键 → (行首, 值起点, 值终点)
+        self._deleted: set = set()  # 已删除的快照键
+        self._entries: Dict[str, Dict] = {}  # 已解码或写入的条目
+        self._added: Dict[str, None] = {}  # 不在快照中的键 (保持插入顺序)
+        if data:
+            self.update(data)
+
+    @classmethod
+    def open(cls, path: Path) -> "LazyIndex":
+        """内存映射打开快照 (文件不存在时为空索引)"""
+        index = cls()
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    return index
+                if os.name == "nt":
+                    # Windows 无法替换仍被映射的文件 (合并快照时)，读入内存
+                    buffer = f.read()
+                else:
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return index
+        spans = cls._scan(buffer) if buffer[:3] == b'{\n"' else None
+        if spans is None:
+            # 旧格式 (如 json.dump(indent=2) 写出的快照): 一次性解码
+            data = json.loads(buffer[:]) or {}
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+            index.update(data)
+            return index
+        index._buffer = buffer
+        index._spans = spans
+        return index
+
+    @staticmethod
+    def _scan(buffer) -> Optional[Dict[str, Tuple[int, int, int]]]:
+        """
+        记录每行 "key":{...} 的位置 (只解码键)
+
+        任何一行不是完整的 "key":{...} 时返回 None (不是逐行格式，交给 json.loads)
+        """
+        spans: Dict[str, Tuple[int, int, int]] = {}
+        start = 2
+        size = len(buffer)
+        while start < size:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                end = size
+            if buffer[start] != 0x22:
+                # 只允许最后一行的 "}"
+                if buffer[start:end] != b"}" or buffer[end + 1:].strip():
+                    return None
+                break
+            quote = buffer.find(b'"', start + 1)
+            while quote > 0 and _escaped(buffer, quote):  # 键中转义的引号
+                quote = buffer.find(b'"', quote + 1)
+            stop = end - 1 if buffer[end - 1] == 0x2C else end  # 去掉行尾逗号
+            if (quote < 0 or quote + 2 >= stop or buffer[quote + 1:quote + 3] != b":{"
+                    or buffer[stop - 1] != 0x7D):
+                return None
+            spans[json.loads(buffer[start:quote + 1])] = (start, quote + 2, stop)
+            start = end + 1
+        else:
+            return None  # 缺少结尾的 "}"
+        return spans
+
+    # ---------- Mapping ----------
+
+    def __getitem__(self, key: str) -> Dict:
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        if key in self._spans and key not in self._deleted:
+            _, start, stop = self._spans[key]
+            entry = self._entries[key] = json.loads(self._buffer[start:stop])
+            return entry
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, entry: Dict) -> None:
+        self._entries[key] = entry
+        if key in self._spans:
+            self._deleted.discard(key)
+        else:
+            self._added[key] = None
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._entries.pop(key, None)
+        if key in self._spans:
+            self._deleted.add(key)
+        else:
+            del self._added[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._added or (key in self._spans and key not in self._deleted)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._spans:
+            if key not in self._deleted:
+                yield key
+        yield from list(self._added)
+
+    def __len__(self) -> int:
+        return len(self._spans) - len(self._deleted) + len(self._added)
+
+    def pop(self, key: str, *default):
+        """删除并返回条目 (尚未解码的快照条目不解码，返回 None)"""
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        entry = self._entries.get(key)
+        del self[key]
+        return entry
+
+    # ---------- 按需解码 ----------
+
+    def decoded(self) -> Dict[str, Dict]:
+        """已解码或写入过的条目 (未访问过的快照条目不在其中)"""
+        return self._entries
+
+    def is_decoded(self, key: str) -> bool:
+        return key in self._entries
+
+    def encode_lines(self) -> Iterator[bytes]:
+        """快照各行 (未解码的条目直接复制原始字节)"""
+        for key in self:
+            entry = self._entries.get(key)
+            if entry is None:
+                line_start, _, stop = self._spans[key]
+                yield self._buffer[line_start:stop]
+            else:
+                yield RecordLog.encode_entry(key, entry)
+
+
+class RecordLog:
+    """
+    追加日志存储
+
+    Args:
+        directory: 存储目录
+        fsync: 每次追加后是否 fsync (关闭可提高写入速度，但掉电可能丢失最近写入)
+        compact_min_bytes: 日志至少达到该大小才考虑合并
+        compact_ratio: 日志大小超过快照大小的该倍数时合并
+    """
+
+    SNAPSHOT = "index.json"
+    LOG = "index.log"
+    LOCK = "index.lock"
+
+    def __init__(
+        self,
+        directory: Path,
+        fsync: bool = True,
+        compact_min_bytes: int = 4 * 1024 * 1024,
+        compact_ratio: float = 1.0,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.directory / self.SNAPSHOT
+        self.log_path = self.directory / self.LOG
+        self.fsync = fsync
+        self.compact_min_bytes = compact_min_bytes
+        self.compact_ratio = compact_ratio
+        self.lock = FileLock(self.directory / self.LOCK)
+        self.offset: Optional[int] = None  # 已应用到内存的日志位置 (load 之前为 None)
+        self._snapshot_id: Optional[Tuple] = None
+
+    # ---------- 读取 ----------
+
+    def _stat_snapshot(self) -> Optional[Tuple]:
+        """快照文件标识 (原子替换后 inode/mtime 改变)"""
+        try:
+            st = self.snapshot_path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def load(self) -> LazyIndex:
+        """加载快照 (内存映射，条目按需解码) 并重放日志"""
+        with self.lock:
+            index = LazyIndex.open(self.snapshot_path)
+            self._snapshot_id = self._stat_snapshot()
+            records, self.offset = self._read_from(0)
+            for record in records:
+                self._apply(index, record)
+            logger.debug(f"Replayed {len(records)} records from {self.log_path}")
+        return index
+
+    def _read_from(self, start: int) -> Tuple[List[Dict], int]:
+        """读取 start 之后的完整记录 (持有锁时调用)，返回记录与读取结束位置"""
+        records: List[Dict] = []
+        good = start  # 最后一条完整记录的结束位置
+        if not self.log_path.exists():
+            return records, good
+        with open(self.log_path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good += len(line)
+        if good < self.log_size():
+            # 持有锁时不会有进行中的追加: 剩余部分是崩溃时写了一半的尾部，
+            # 截掉，避免后续追加接在残行后面
+            logger.warning(f"Discarding truncated tail of {self.log_path}")
+            os.truncate(self.log_path, good)
+        return records, good
+
+    def changed(self) -> bool:
+        """其他进程是否写入过 (只比较文件元数据，不加锁)"""
+        if self.offset is None:
+            return False
+        return self.log_size() != self.offset or self._stat_snapshot() != self._snapshot_id
+
+    def read_new(self) -> Optional[List[Dict]]:
+        """
+        其他进程在 offset 之后追加的记录
+
+        Returns:
+            记录列表；快照已被其他进程合并替换时返回 None，调用方应重新 load()
+        """
+        with self.lock:
+            if self.offset is None:
+                return []
+            if self._stat_snapshot() != self._snapshot_id or self.log_size() < self.offset:
+                return None
+            records, self.offset = self._read_from(self.offset)
+            return records
+
+    @classmethod
+    def changes(cls, records: Iterable[Dict]) -> Dict[str, Optional[Dict]]:
+        """把记录折叠为每个键的最终状态 (None 表示已删除)"""
+        result: Dict[str, Optional[Dict]] = {}
+        for record in records:
+            op = record.get("op")
+            if op == "put":
+                result[record["key"]] = record["entry"]
+            elif op == "del":
+                result[record["key"]] = None
+            elif op == "batch":
+                result.update(cls.changes(record["records"]))
+        return result
+
+    @classmethod
+    def _apply(cls, index: MutableMapping, record: Dict) -> None:
+        op = record.get("op")
+        if op == "put":
+            index[record["key"]] = record["entry"]
+        elif op == "del":
+            index.pop(record["key"], None)
+        elif op == "batch":
+            for inner in record["records"]:
+                cls._apply(index, inner)
+
+    # ---------- 写入 ----------
+
+    @staticmethod
+    def _record(op: str, key: str, entry: Optional[Dict]) -> Dict:
+        record = {"op": op, "key": key}
+        if op == "put":
+            record["entry"] = entry
+        return record
+
+    @classmethod
+    def encode(cls, records: Iterable[Record]) -> bytes:
+        """把记录编码为日志行 (每条记录一行)"""
+        lines = [
+            json.dumps(cls._record(*r), ensure_ascii=False, separators=(",", ":"))
+            for r in records
+        ]
+        return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+    @classmethod
+    def encode_batch(cls, records: Iterable[Record]) -> bytes:
+        """把一批记录编码为单行事务记录 (整批原子生效)"""
+        batch = {"op": "batch", "records": [cls._record(*r) for r in records]}
+        if not batch["records"]:
+            return b""
+        return (json.dumps(batch, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def append(self, records: Iterable[Record]) -> Optional[List[Dict]]:
+        """追加记录 (一次写入，一次 fsync)"""
+        return self.append_bytes(self.encode(records))
+
+    def append_bytes(self, payload: bytes) -> Optional[List[Dict]]:
+        """
+        追加已编码的记录
+
+        Returns:
+            追加之前其他进程写入的记录 (同 read_new()，需先于本次记录应用到内存)
+        """
+        with self.lock:
+            foreign = self.read_new()
+            if payload:
+                with open(self.log_path, "ab") as f:
+                    f.write(payload)
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+                if foreign is not None and self.offset is not None:
+                    self.offset += len(payload)
+            return foreign
+
+    def log_size(self) -> int:
+        try:
+            return self.log_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def snapshot_size(self) -> int:
+        try:
+            return self.snapshot_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def needs_compaction(self) -> bool:
+        size = self.log_size()
+        return size >= self.compact_min_bytes and size >= self.snapshot_size() * self.compact_ratio
+
+    # ---------- 合并 ----------
+
+    @staticmethod
+    def encode_entry(key: str, entry: Dict) -> bytes:
+        """快照中的一行 "key":{...} (ensure_ascii=False 不会产生字面换行)"""
+        return (json.dumps(key, ensure_ascii=False) + ":"
+                + json.dumps(entry, ensure_ascii=False, separators=(",", ":"))).encode("utf-8")
+
+    @classmethod
+    def encode_snapshot(cls, index: Mapping[str, Dict]) -> bytes:
+        """编码快照: 合法的 JSON 对象，每个条目一行 (LazyIndex 可据此按行定位)"""
+        if isinstance(index, LazyIndex):
+            lines = list(index.encode_lines())
+        else:
+            lines = [cls.encode_entry(key, entry) for key, entry in index.items()]
+        return b"{\n" + b",\n".join(lines) + b"\n}\n"
+
+    def snapshot_id(self) -> Optional[Tuple]:
+        """最近一次 load()/合并时的快照标识 (传给 compact() 做一致性检查)"""
+        return self._snapshot_id
+
+    def compact(
+        self,
+        snapshot: bytes,
+        log_offset: int,
+        expected_snapshot: Union[Tuple, None, bool] = False,
+        before: Optional[Callable[[], None]] = None,
+    ) -> bool:
+        """
+        写入新快照，并丢弃已包含在快照中的日志前缀
+
+        Args:
+            snapshot: encode_snapshot() 得到的快照内容
+            log_offset: 生成快照时的日志大小 (之后追加的记录保留)
+            expected_snapshot: 生成快照时的快照标识 (snapshot_id())，与磁盘不一致时放弃合并；
+                False 表示不检查
+            before: 持有锁、写快照之前执行 (如写入对应的向量文件)
+
+        Returns:
+            是否完成合并
+        """
+        with self.lock:
+            if expected_snapshot is not False and self._stat_snapshot() != expected_snapshot:
+                logger.info("Skipping compaction: snapshot was replaced by another process")
+                return False
+            if before is not None:
+                before()
+            atomic_write(self.snapshot_path, snapshot, fsync=self.fsync)
+
+            tail = b""
+            if self.log_path.exists():
+                with open(self.log_path, "rb") as f:
+                    f.seek(log_offset)
+                    tail = f.read()
+            if tail:
+                atomic_write(self.log_path, tail, fsync=self.fsync)
+            elif self.log_path.exists():
+                self.log_path.unlink()
+                if self.fsync:
+                    _fsync_dir(self.directory)
+            self._snapshot_id = self._stat_snapshot()
+            if self.offset is not None:
+                self.offset = max(0, self.offset - log_offset)
+        logger.info(f"Compacted knowledge store: snapshot {len(snapshot)} bytes, "
+                    f"{len(tail)} bytes of log kept")
+        return True
@@ -0,0 +1,173 @@
+"""
+知识库关键词索引 - 预计算搜索文本 + 倒排索引
+Precomputed search text & token inverted index
+
+- 每个条目在写入时生成一次规范化 (小写) 搜索文本，不含向量嵌入等字段
+- 倒排索引: 词元 → 条目集合，增删条目时增量维护
+- 查询时先由倒排索引得到候选集合，再只对候选计算相关性
+- 倒排表记录词频与文档长度，可直接计算 BM25 分数
+
+关键词按子串匹配 (与原先对整条 JSON 做子串判断的语义一致): 关键词拆出的
+每个词元都必须是某个已索引词元的子串，因此先在词表 (远小于条目数 x 文本长度)
+中查找包含它的词元，再合并对应的倒排表。
+"""
+from typing import Collection, Dict, Iterable, List, Optional, Set
+from collections import Counter
+import json
+import math
+import re
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_text(entry: Dict) -> str:
+    """条目的规范化搜索文本 (型号 + datasheet 数据，小写)"""
+    content = {"part_number": entry.get("part_number"), "data": entry.get("data", {})}
+    return json.dumps(content, ensure_ascii=False).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """把 (已小写的) 文本切分为词元"""
+    return _TOKEN_RE.findall(text)
+
+
+class TextIndex:
+    """
+    关键词倒排索引
+
+    texts 保存每个条目的搜索文本，postings 保存词元 → {条目键: 词频}。
+
+    Args:
+        k1: BM25 词频饱和参数
+        b: BM25 文档长度归一化参数
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.texts: Dict[str, str] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}  # 条目键 → 词元数
+        self._total_length = 0
+        self._tokens: Dict[str, Set[str]] = {}  # 条目键 → 词元集合 (删除时使用)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def rebuild(self, index: Dict[str, Dict]) -> None:
+        """由完整索引重建"""
+        self.texts.clear()
+        self.postings.clear()
+        self.lengths.clear()
+        self._total_length = 0
+        self._tokens.clear()
+        for key, entry in index.items():
+            self.add(key, entry)
+
+    def add(self, key: str, entry: Dict) -> None:
+        """新增或替换条目"""
+        if key in self.texts:
+            self.remove(key)
+        text = search_text(entry)
+        counts = Counter(tokenize(text))
+        self.texts[key] = text
+        self._tokens[key] = set(counts)
+        length = sum(counts.values())
+        self.lengths[key] = length
+        self._total_length += length
+        for token, tf in counts.items():
+            self.postings.setdefault(token, {})[key] = tf
+
+    def remove(self, key: str) -> None:
+        self.texts.pop(key, None)
+        self._total_length -= self.lengths.pop(key, 0)
+        for token in self._tokens.pop(key, ()):
+            keys = self.postings.get(token)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del self.postings[token]
+
+    def update(self, entries: Dict[str, Dict]) -> None:
+        for key, entry in entries.items():
+            self.add(key, entry)
+
+    # ---------- 查询 ----------
+
+    def _matching_tokens(self, fragment: str) -> List[str]:
+        """词表中包含 fragment 的词元"""
+        return [token for token in self.postings if fragment in token]
+
+    def _containing(self, fragment: str) -> Set[str]:
+        """包含 fragment (作为某词元子串) 的条目集合"""
+        keys: Set[str] = set()
+        for token in self._matching_tokens(fragment):
+            keys.update(self.postings[token])
+        return keys
+
+    def _keyword_candidates(self, keyword: str) -> Optional[Set[str]]:
+        """
+        可能包含 keyword 子串的条目 (超集)
+
+        关键词中的每个词元都必须出现在某个已索引词元中；关键词不含任何词元
+        (如纯标点) 时返回 None，表示无法用倒排索引缩小范围。
+        """
+        fragments = tokenize(keyword)
+        if not fragments:
+            return None
+        result: Optional[Set[str]] = None
+        for fragment in sorted(set(fragments), key=len, reverse=True):
+            keys = self._containing(fragment)
+            result = keys if result is None else result & keys
+            if not result:
+                return set()
+        return result
+
+    def candidates(self, keywords: Iterable[str], query: str) -> Iterable[str]:
+        """
+        可能与查询匹配的条目键
+
+        Args:
+            keywords: 参与打分的关键词 (已小写)
+            query: 完整查询 (已小写)，整体匹配同样计分
+        """
+        result: Set[str] = set()
+        for term in [*keywords, query]:
+            keys = self._keyword_candidates(term)
+            if keys is None:
+                return self.texts.keys()
+            result |= keys
+        return result
+
+    # ---------- BM25 ----------
+
+    def bm25(self, query: str, allowed: Optional[Collection[str]] = None) -> Dict[str, float]:
+        """
+        BM25 打分 (只遍历查询词元的倒排表)
+
+        查询词元在词表中不存在时，退化为包含它的词元 (如型号前缀 "stm32" → "stm32f103c8t6")。
+
+        Args:
+            query: 查询文本
+            allowed: 只为这些条目打分 (过滤条件)，None 表示不限制
+
+        Returns:
+            {条目键: 分数}，只包含至少命中一个词元的条目
+        """
+        count = len(self.texts)
+        if not count:
+            return {}
+        average = self._total_length / count or 1.0
+        scores: Dict[str, float] = {}
+        for fragment in set(tokenize(query.lower())):
+            tokens = [fragment] if fragment in self.postings else self._matching_tokens(fragment)
+            for token in tokens:
+                posting = self.postings[token]
+                df = len(posting)
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                for key, tf in posting.items():
+                    if allowed is not None and key not in allowed:
+                        continue
+                    norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[key] / average)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return scores
@@ -0,0 +1,404 @@
+"""
+知识库向量文件 - 量化 + 内存映射
+Quantized, memory-mapped embedding storage
+
+向量不再以 JSON 浮点数组保存在 index.json 中，而是合并快照时写入单独的二进制文件
+embeddings.bin，打开时内存映射 (只读，多个 worker 进程共享同一份页缓存):
+
+    OPSVEC01 | uint32 头长度 | JSON 头 | (64 字节对齐的) 各段:
+        codes  量化向量 (n x dim)，int8 或 float16
+        scale  int8 时每个向量的缩放因子 (n，float32)
+        exact  可选的 float16 重排向量 (n x dim)，只在 int8 量化时保存
+        keys   型号列表 (JSON)
+
+向量均已 L2 归一化。相似度直接在量化数据上分块计算；开启重排时，
+量化打分取 top_k x rerank 个候选，再用 float16 向量重排 (误差约 1e-3，远小于 int8)。
+float16 量化本身已足够精确，不另存重排向量。int8 + 重排每维 3 字节，仍小于 float32。
+
+Windows 无法替换仍被映射的文件 (合并时 os.replace)，在 Windows 上各段读入内存。
+
+VectorTable 把只读的向量文件 (上次合并时的状态) 与内存中的增量
+(EmbeddingMatrix，此后新增/修改的向量) 组合成一张表，下次合并时写回新文件。
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+import json
+import logging
+import os
+import struct
+
+import numpy as np
+
+from .matrix import EmbeddingMatrix, normalize_rows, top_k_indices
+from .storage import atomic_write
+
+logger = logging.getLogger(__name__)
+
+_ALIGN = 64
+_CHUNK_ROWS = 65536  # 分块打分的行数，控制临时 float32 内存
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    量化归一化向量
+
+    Returns:
+        (codes, scale)，float16 时 scale 为 None
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype != "int8":
+        raise ValueError(f"Unsupported quantization: {dtype}")
+    scale = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0, np.float32)
+    scale = np.where(scale > 0, scale, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scale[:, None]), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+class QuantizedVectors:
+    """
+    只读向量文件 (内存映射)
+
+    Attributes:
+        keys: 行号 → 型号
+        row_of: 型号 → 行号
+        codes: 量化向量 (memmap)
+        scale: int8 缩放因子，float16 时为 None
+        exact: float16 重排向量 (memmap)，未保存时为 None
+        model: 全部向量所用的嵌入模型 (混合或未知时为 None)
+    """
+
+    FILE = "embeddings.bin"
+    MAGIC = b"OPSVEC01"
+
+    def __init__(
+        self,
+        keys: List[str],
+        codes: np.ndarray,
+        scale: Optional[np.ndarray] = None,
+        exact: Optional[np.ndarray] = None,
+        path: Optional[Path] = None,
+        model: Optional[str] = None,
+    ):
+        self.keys = keys
+        self.row_of = {key: row for row, key in enumerate(keys)}
+        self.codes = codes
+        self.scale = scale
+        self.exact = exact
+        self.path = path
+        self.model = model
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def dim(self) -> int:
+        return self.codes.shape[1]
+
+    @property
+    def dtype(self) -> str:
+        return "int8" if self.scale is not None else "float16"
+
+    # ---------- 读写 ----------
+
+    @classmethod
+    def open(cls, path: Path) -> Optional["QuantizedVectors"]:
+        """内存映射打开向量文件，不存在或损坏时返回 None"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                    raise ValueError("bad magic")
+                (length,) = struct.unpack("<I", f.read(4))
+                header = json.loads(f.read(length))
+                sections = header["sections"]
+                f.seek(sections["keys"][0])
+                keys = json.loads(f.read(sections["keys"][1]))
+            count, dim = header["count"], header["dim"]
+
+            def section(name, dtype, shape):
+                if name not in sections:
+                    return None
+                if count == 0:
+                    return np.zeros(shape, dtype=dtype)
+                offset = sections[name][0]
+                if os.name == "nt":
+                    # 与 LazyIndex 相同: 映射中的文件无法被合并时替换，读入内存
+                    return np.fromfile(
+                        path, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+                return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+            codes = section("codes", np.dtype(header["dtype"]), (count, dim))
+            scale = section("scale", np.float32, (count,))
+            # 旧版本文件中的重排向量为 float32
+            exact = section("exact", np.dtype(header.get("exact_dtype", "float32")), (count, dim))
+            if len(keys) != count:
+                raise ValueError("key count mismatch")
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable vector file {path}: {e}")
+            return None
+        return cls(keys, codes, scale, exact, path=path, model=header.get("model"))
+
+    @classmethod
+    def write(
+        cls,
+        path: Path,
+        keys: List[str],
+        codes: np.ndarray,
+        scale: Optional[np.ndarray],
+        exact: Optional[np.ndarray],
+        fsync: bool = True,
+        model: Optional[str] = None,
+    ) -> None:
+        """原子写入向量文件"""
+        parts: List[Tuple[str, bytes]] = [("codes", np.ascontiguousarray(codes).tobytes())]
+        if scale is not None:
+            parts.append(("scale", np.ascontiguousarray(scale, dtype=np.float32).tobytes()))
+        if exact is not None:
+            parts.append(("exact", np.ascontiguousarray(exact, dtype=np.float16).tobytes()))
+        parts.append(("keys", json.dumps(keys, ensure_ascii=False).encode("utf-8")))
+
+        def pad(offset: int) -> int:
+            return -offset % _ALIGN
+
+        # 头部长度影响各段偏移，预留足够空间后再填入
+        header_size = 4096 + 32 * len(parts)
+        offset = header_size
+        sections: Dict[str, List[int]] = {}
+        for name, data in parts:
+            offset += pad(offset)
+            sections[name] = [offset, len(data)]
+            offset += len(data)
+        header = json.dumps({
+            "version": 1,
+            "count": len(keys),
+            "dim": int(codes.shape[1]) if codes.ndim == 2 else 0,
+            "dtype": str(codes.dtype),
+            "sections": sections,
+            "exact_dtype": "float16",
+            "model": model,
+        }).encode("utf-8")
+        prefix = cls.MAGIC + struct.pack("<I", len(header)) + header
+        if len(prefix) > header_size:
+            raise ValueError("vector file header too large")
+
+        chunks = [prefix, b"\0" * (header_size - len(prefix))]
+        position = header_size
+        for name, data in parts:
+            chunks.append(b"\0" * (sections[name][0] - position))
+            chunks.append(data)
+            position = sections[name][0] + len(data)
+        atomic_write(Path(path), chunks, fsync=fsync)
+
+    # ---------- 打分 ----------
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """归一化查询与全部向量的 (近似) 余弦相似度 (q x n)，按块反量化"""
+        out = np.empty((queries.shape[0], len(self)), dtype=np.float32)
+        for start in range(0, len(self), _CHUNK_ROWS):
+            block = np.asarray(self.codes[start:start + _CHUNK_ROWS], dtype=np.float32)
+            out[:, start:start + len(block)] = queries @ block.T
+        if self.scale is not None:
+            out *= np.asarray(self.scale)
+        return out
+
+    def vectors(self, rows: Sequence[int]) -> np.ndarray:
+        """指定行的 float32 向量 (有重排向量时取重排向量，否则反量化)"""
+        rows = np.asarray(rows, dtype=np.intp)
+        if self.exact is not None:
+            return np.asarray(self.exact[rows], dtype=np.float32)
+        vectors = np.asarray(self.codes[rows], dtype=np.float32)
+        if self.scale is not None:
+            vectors *= np.asarray(self.scale[rows])[:, None]
+        return vectors
+
+
+@dataclass
+class TableState:
+    """合并快照时 VectorTable 的一致性副本 (可在线程中写盘)"""
+    base: Optional[QuantizedVectors]
+    base_rows: np.ndarray  # 仍有效的向量文件行
+    delta_keys: List[str]
+    delta: np.ndarray  # 增量向量 (已归一化)
+    model: Optional[str] = None  # 写入文件头的嵌入模型 (全部向量一致时)
+
+    def materialize(self) -> Tuple[List[str], np.ndarray]:
+        """全部 (型号, float32 向量)"""
+        dim = self.delta.shape[1]
+        keys = [self.base.keys[row] for row in self.base_rows] if self.base is not None else []
+        base_vectors = self.base.vectors(self.base_rows) if self.base is not None else np.zeros((0, dim))
+        return keys + self.delta_keys, np.concatenate([base_vectors, self.delta]).astype(np.float32)
+
+    def write(self, path: Path, dtype: str, keep_exact: bool, fsync: bool = True) -> None:
+        """
+        写出合并后的向量文件 (未修改的行直接复制量化数据，不重新量化)
+
+        keep_exact 只对 int8 生效: float16 量化数据本身即可用于重排
+        """
+        base = self.base
+        dim = base.dim if base is not None else self.delta.shape[1]
+        keys = [base.keys[row] for row in self.base_rows] if base is not None else []
+        keys += self.delta_keys
+
+        delta_codes, delta_scale = quantize(self.delta.reshape(-1, dim), dtype)
+        if base is not None and base.dtype == dtype:
+            codes = np.concatenate([np.asarray(base.codes[self.base_rows]), delta_codes])
+            scale = None if delta_scale is None else np.concatenate(
+                [np.asarray(base.scale[self.base_rows]), delta_scale])
+        else:
+            # 量化格式改变: 由 float32 重新量化全部向量
+            base_vectors = base.vectors(self.base_rows) if base is not None else np.zeros((0, dim))
+            codes, scale = quantize(np.concatenate([base_vectors, self.delta.reshape(-1, dim)]), dtype)
+
+        exact = None
+        if keep_exact and dtype == "int8":
+            base_exact = base.vectors(self.base_rows) if base is not None else np.zeros((0, dim))
+            exact = np.concatenate([base_exact, self.delta.reshape(-1, dim)]).astype(np.float32)
+        QuantizedVectors.write(path, keys, codes, scale, exact, fsync=fsync, model=self.model)
+
+
+class VectorTable:
+    """
+    向量表 = 只读向量文件 + 内存增量
+
+    Args:
+        base: 内存映射的向量文件，None 表示尚未合并过
+        rerank: 量化打分后取 top_k x rerank 个候选用原始向量重排，0 表示不重排
+    """
+
+    def __init__(self, base: Optional[QuantizedVectors] = None, rerank: int = 0):
+        self.base = base
+        self.rerank = rerank
+        self.alive = np.ones(len(base) if base is not None else 0, dtype=bool)
+        self.delta = EmbeddingMatrix(dim=base.dim if base is not None else None)
+        self._base_alive = len(self.alive)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self.delta.dim
+
+    def __len__(self) -> int:
+        return self._base_alive + len(self.delta)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.delta or self._base_row(key) is not None
+
+    def _base_row(self, key: str) -> Optional[int]:
+        if self.base is None:
+            return None
+        row = self.base.row_of.get(key)
+        return row if row is not None and self.alive[row] else None
+
+    def _kill(self, key: str) -> None:
+        row = self._base_row(key)
+        if row is not None:
+            self.alive[row] = False
+            self._base_alive -= 1
+
+    @property
+    def keys(self) -> List[str]:
+        base_keys = [self.base.keys[row] for row in np.flatnonzero(self.alive)] if self.base else []
+        return base_keys + list(self.delta.keys)
+
+    # ---------- 写入 ----------
+
+    def set_many(self, items: Sequence[Tuple[str, Sequence[float]]]) -> None:
+        items = list(items)
+        if not items:
+            return
+        self.delta.set_many(items)
+        for key, _ in items:
+            self._kill(key)
+
+    def remove(self, key: str) -> None:
+        self.delta.remove(key)
+        self._kill(key)
+
+    def retain(self, keys) -> None:
+        """只保留 keys 中的向量 (加载时丢弃已删除条目在向量文件中的行)"""
+        if self.base is None:
+            return
+        for row, key in enumerate(self.base.keys):
+            if self.alive[row] and key not in keys:
+                self.alive[row] = False
+                self._base_alive -= 1
+
+    # ---------- 读取 ----------
+
+    def vectors(self, keys: Sequence[str]) -> np.ndarray:
+        """指定条目的 float32 归一化向量"""
+        result = np.zeros((len(keys), self.dim or 0), dtype=np.float32)
+        base_rows, base_at = [], []
+        for i, key in enumerate(keys):
+            row = self.delta.row_of.get(key)
+            if row is not None:
+                result[i] = self.delta.matrix[row]
+                continue
+            row = self._base_row(key)
+            if row is None:
+                raise KeyError(key)
+            base_rows.append(row)
+            base_at.append(i)
+        if base_rows:
+            result[base_at] = self.base.vectors(base_rows)
+        return result
+
+    def vector(self, key: str) -> Optional[np.ndarray]:
+        return self.vectors([key])[0] if key in self else None
+
+    def search(self, query: Sequence[float], top_k: int = 5) -> List[Tuple[str, float]]:
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(
+        self,
+        queries: Sequence[Sequence[float]],
+        top_k: int = 5,
+    ) -> List[List[Tuple[str, float]]]:
+        """批量查询: 向量文件部分在量化数据上打分 (可选重排)，增量部分精确计算"""
+        if not len(queries):
+            return []
+        results = self.delta.search_batch(queries, top_k)
+        if not self._base_alive:
+            return results
+        normalized = normalize_rows(queries)
+        if normalized.ndim != 2 or normalized.shape[1] != self.dim:
+            raise ValueError(f"Query shape {normalized.shape} does not match dimension {self.dim}")
+        scores = self.base.scores(normalized)
+        scores[:, ~self.alive] = -np.inf
+        # 没有重排向量 (float16 或未保存) 时重排不会更准确
+        rerank = self.rerank if self.base.exact is not None else 0
+        candidates = top_k * rerank if rerank else top_k
+        merged = []
+        for query, row_scores, delta_hits in zip(normalized, scores, results):
+            top = [row for row in top_k_indices(row_scores, candidates) if np.isfinite(row_scores[row])]
+            if rerank and top:
+                exact = self.base.vectors(top) @ query
+                hits = [(self.base.keys[row], float(score)) for row, score in zip(top, exact)]
+            else:
+                hits = [(self.base.keys[row], float(row_scores[row])) for row in top]
+            hits.extend(delta_hits)
+            hits.sort(key=lambda hit: -hit[1])
+            merged.append(hits[:top_k])
+        return merged
+
+    def state(self) -> TableState:
+        """当前内容的一致性副本 (向量文件只读，只需复制有效行号与增量)"""
+        return TableState(
+            base=self.base,
+            base_rows=np.flatnonzero(self.alive),
+            delta_keys=list(self.delta.keys),
+            delta=self.delta.matrix.copy(),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": len(self),
+            "file_vectors": self._base_alive,
+            "memory_vectors": len(self.delta),
+            "dtype": self.base.dtype if self.base is not None else None,
+            "rerank": self.rerank,
+        }
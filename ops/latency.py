@@ -0,0 +1,202 @@
+"""
+延迟统计与自适应超时模块
+Rolling HDR-style latency histograms & adaptive timeouts
+
+- LatencyHistogram: 对数-线性分桶 (HDR Histogram 的分桶方式)，
+  记录 O(1)、内存固定，分位误差约 1%；按时间窗口轮换，只反映近期延迟
+- TimeoutPolicy: 超时 = 近期 p99 x (1 + margin)，并限制在 [floor, ceiling] 内；
+  样本不足时使用静态默认值
+
+快的数据源因此得到更紧的超时 (尾延迟更低)，慢的数据源不会被误判超时。
+
+示例:
+    >>> tracker = get_tracker("mouser")
+    >>> tracker.record(0.42)
+    >>> timeout = TimeoutPolicy.from_config(config).timeout(tracker, default=2.0)
+"""
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+import threading
+import time
+
+from .config import Config
+
+
+class LatencyHistogram:
+    """
+    滚动延迟直方图 (HDR 风格)
+
+    数值以微秒为单位按 2 的幂分段，每段再线性划分为 2^(sub_bucket_bits-1) 个子桶，
+    相对误差不超过 1 / 2^(sub_bucket_bits-1)。
+
+    Args:
+        max_seconds: 可记录的最大延迟，超出按最大值记录
+        sub_bucket_bits: 子桶位数 (7 → 约 1.6% 最大相对误差)
+        window_seconds: 窗口时长；保留当前与上一个窗口，统计约覆盖 1-2 个窗口
+    """
+
+    def __init__(
+        self,
+        max_seconds: float = 300.0,
+        sub_bucket_bits: int = 7,
+        window_seconds: float = 60.0,
+    ):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count >> 1
+        self.max_value = int(max_seconds * 1_000_000)
+        self.window_seconds = window_seconds
+        size = self._index(self.max_value) + 1
+        self._current: List[int] = [0] * size
+        self._previous: List[int] = [0] * size
+        self._current_count = 0
+        self._previous_count = 0
+        self._window_started = time.monotonic()
+        self._lock = threading.Lock()
+
+    # ---------- 分桶 ----------
+
+    def _index(self, value: int) -> int:
+        """微秒值 → 桶下标"""
+        bucket = max(0, value.bit_length() - self.sub_bucket_bits)
+        return bucket * self.sub_bucket_half + (value >> bucket)
+
+    def _value(self, index: int) -> int:
+        """桶下标 → 该桶可表示的最大微秒值 (保守取上界)"""
+        if index < self.sub_bucket_count:
+            return index
+        bucket = (index - self.sub_bucket_count) // self.sub_bucket_half + 1
+        sub = index - bucket * self.sub_bucket_half
+        return ((sub + 1) << bucket) - 1
+
+    def _rotate_locked(self, now: float) -> None:
+        elapsed = now - self._window_started
+        if elapsed < self.window_seconds:
+            return
+        if elapsed < 2 * self.window_seconds:
+            self._previous, self._current = self._current, self._previous
+            self._previous_count = self._current_count
+        else:
+            # 超过两个窗口没有数据，旧数据全部过期
+            self._previous = [0] * len(self._current)
+            self._previous_count = 0
+        self._current = [0] * len(self._previous)
+        self._current_count = 0
+        self._window_started = now
+
+    # ---------- 记录与查询 ----------
+
+    def record(self, seconds: float) -> None:
+        """记录一次延迟 (秒)"""
+        value = min(self.max_value, max(0, int(seconds * 1_000_000)))
+        with self._lock:
+            self._rotate_locked(time.monotonic())
+            self._current[self._index(value)] += 1
+            self._current_count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q 分位延迟 (秒，0 < q <= 1)，窗口内无样本时返回 None"""
+        with self._lock:
+            self._rotate_locked(time.monotonic())
+            total = self._current_count + self._previous_count
+            if total == 0:
+                return None
+            target = max(1, int(q * total + 0.999999))
+            seen = 0
+            for index, (a, b) in enumerate(zip(self._current, self._previous)):
+                seen += a + b
+                if seen >= target:
+                    return self._value(index) / 1_000_000
+        return self.max_value / 1_000_000
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._rotate_locked(time.monotonic())
+            return self._current_count + self._previous_count
+
+    def reset(self) -> None:
+        with self._lock:
+            self._current = [0] * len(self._current)
+            self._previous = [0] * len(self._previous)
+            self._current_count = self._previous_count = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "count": len(self),
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": self.percentile(1.0),
+        }
+
+
+@dataclass
+class TimeoutPolicy:
+    """
+    自适应超时策略
+
+    Attributes:
+        enabled: 关闭时始终返回静态默认值
+        floor: 超时下限 (秒)
+        ceiling: 超时上限 (秒)
+        margin: 在分位延迟上增加的比例 (0.5 → p99 x 1.5)
+        percentile: 依据的延迟分位
+        min_samples: 样本少于该值时使用默认值
+    """
+    enabled: bool = True
+    floor: float = 0.25
+    ceiling: float = 10.0
+    margin: float = 0.5
+    percentile: float = 0.99
+    min_samples: int = 20
+
+    @classmethod
+    def from_config(cls, config: Config) -> "TimeoutPolicy":
+        return cls(
+            enabled=config.adaptive_timeouts,
+            floor=config.adaptive_timeout_floor,
+            ceiling=config.adaptive_timeout_ceiling,
+            margin=config.adaptive_timeout_margin,
+            min_samples=config.adaptive_timeout_min_samples,
+        )
+
+    def timeout(
+        self,
+        histogram: LatencyHistogram,
+        default: float,
+        ceiling: Optional[float] = None,
+    ) -> float:
+        """
+        根据观测延迟计算本次调用的超时 (秒)
+
+        Args:
+            histogram: 该数据源/主机的延迟直方图
+            default: 样本不足 (或关闭自适应) 时的静态超时
+            ceiling: 覆盖策略自身的上限，如 HTTP 请求使用 Config.timeout_seconds
+        """
+        if not self.enabled or len(histogram) < self.min_samples:
+            return default
+        observed = histogram.percentile(self.percentile)
+        if observed is None:
+            return default
+        upper = self.ceiling if ceiling is None else ceiling
+        return min(upper, max(self.floor, observed * (1 + self.margin)))
+
+
+# 进程级延迟统计 (按数据源 / 主机)
+_TRACKERS: Dict[str, LatencyHistogram] = {}
+_TRACKERS_LOCK = threading.Lock()
+
+
+def get_tracker(name: str) -> LatencyHistogram:
+    """获取 (或创建) 指定名称的延迟直方图"""
+    with _TRACKERS_LOCK:
+        tracker = _TRACKERS.get(name)
+        if tracker is None:
+            tracker = _TRACKERS[name] = LatencyHistogram()
+    return tracker
+
+
+def latency_stats() -> Dict[str, Dict[str, Any]]:
+    """全部延迟直方图的分位统计"""
+    return {name: tracker.stats() for name, tracker in list(_TRACKERS.items())}
@@ -6,7 +6,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 import logging
 
-from .config import Config
+from ..config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -218,9 +218,10 @@ class DeepSeekProvider(BaseLLMProvider):
     
     async def generate(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 2000, temperature: float = 0.1) -> LLMResponse:
         """调用 DeepSeek 生成"""
-        import time, httpx
+        import time
+        from ..http_pool import get_http_pool
         
-        client = httpx.AsyncClient(timeout=120.0)
+        pool = get_http_pool(self.config)
         start_time = time.time()
         
         messages = []
@@ -229,8 +230,9 @@ class DeepSeekProvider(BaseLLMProvider):
         messages.append({"role": "user", "content": prompt})
         
         try:
-            response = await client.post(
+            response = await pool.post(
                 "https://api.deepseek.com/chat/completions",
+                timeout=120.0,
                 headers={"Authorization": f"Bearer {self.api_key}"},
                 json={
                     "model": "deepseek-chat",
@@ -254,8 +256,6 @@ class DeepSeekProvider(BaseLLMProvider):
         except Exception as e:
             logger.error(f"DeepSeek API error: {e}")
             raise
-        finally:
-            await client.aclose()
     
     async def generate_json(self, prompt: str, system_prompt: Optional[str] = None, temperature: float = 0.1) -> Dict:
         """DeepSeek JSON 生成"""
@@ -3,13 +3,26 @@
 Datasheet Parser
 
 功能:
-- PDF 解析
+- PDF 解析 (在进程池中执行，不阻塞事件循环，见 pool.py)
+- 逐页提取参数，字段找齐后不再读取后续页面 (见 extract.py)
+- 解析结果按 (文件内容哈希, 解析器版本) 缓存，重复上传的文件不再重新解析 (见 cache.py)
 - 参数提取
 - 中文解读生成
 """
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
-import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+import asyncio
+
+from ..config import Config
+from .cache import file_hash, get_datasheet_cache
+from .extract import extract_pages
+
+# 解析器版本: 提取规则变化时递增，旧版本的缓存结果随之失效
+PARSER_VERSION = "3"
+
+# 按文本解析的文件扩展名
+TEXT_EXTENSIONS = ('.txt', '.md', '.csv')
 
 
 @dataclass
@@ -27,7 +40,8 @@ class ParsedDatasheet:
 class DatasheetParser:
     """Datasheet 解析器"""
     
-    def __init__(self):
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config
         self.pdf_available = False
         self._check_pdf_libs()
     
@@ -50,205 +64,74 @@ class DatasheetParser:
             解析结果
         """
         if file_path.endswith('.pdf') and self.pdf_available:
-            return await self._parse_pdf(file_path)
-        elif file_path.endswith(('.txt', '.md', '.csv')):
-            return self._parse_text(file_path)
+            is_pdf = True
+        elif file_path.endswith(TEXT_EXTENSIONS):
+            is_pdf = False
         else:
             raise ValueError(f"不支持的文件格式: {file_path}")
-    
-    async def _parse_pdf(self, file_path: str) -> Optional[ParsedDatasheet]:
-        """解析 PDF 文件"""
-        import pdfplumber
         
         try:
-            with pdfplumber.open(file_path) as pdf:
-                text = ""
-                for page in pdf.pages[:5]:  # 只读前5页
-                    text += page.extract_text() or ""
-                
-                return self._extract_info(text)
+            data = await asyncio.to_thread(Path(file_path).read_bytes)
+            return await self.parse_content(data, is_pdf)
         except Exception as e:
-            print(f"PDF 解析失败: {e}")
+            print(f"文件解析失败: {e}")
             return None
     
-    def _parse_text(self, file_path: str) -> Optional[ParsedDatasheet]:
-        """解析文本文件"""
+    async def parse_text(self, content: str) -> Optional[ParsedDatasheet]:
+        """解析 Datasheet 文本内容"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-            return self._extract_info(text)
+            return await self.parse_content(content.encode("utf-8"), is_pdf=False)
         except Exception as e:
             print(f"文本解析失败: {e}")
             return None
     
-    def _extract_info(self, text: str) -> ParsedDatasheet:
-        """从文本中提取信息"""
-        text = text.lower()
-        
-        # 提取型号
-        part_number = self._extract_part_number(text)
-        
-        # 提取厂商
-        manufacturer = self._extract_manufacturer(text)
-        
-        # 提取描述
-        description = self._extract_description(text)
-        
-        # 提取规格
-        specifications = self._extract_specifications(text)
-        
-        # 提取封装
-        package = self._extract_package(text)
-        
-        # 生成摘要
-        summary = self._generate_summary(part_number, manufacturer, specifications)
-        
-        return ParsedDatasheet(
-            part_number=part_number or "未知",
-            manufacturer=manufacturer or "未知",
-            description=description or "无描述",
-            specifications=specifications,
-            package=package or "未知",
-            datasheet_url="",
-            summary=summary
-        )
-    
-    def _extract_part_number(self, text: str) -> Optional[str]:
-        """提取型号"""
-        # 常见型号模式
-        patterns = [
-            r'(stm32[f\d]+[a-z]*)',
-            r'(esp32[-\w]*)',
-            r'(ch340[ng]?)',
-            r'(lm358[a-z]*)',
-            r'(ams1117[-\w]*)',
-            r'(ld1117[-\w]*)',
-            r'(rp2040)',
-            r'(atmega328[p]?)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1).upper()
-        
-        # 通用模式
-        match = re.search(r'(?:part\s*(?:no|number)|型号)[:\s]*([a-z0-9\-]+)', text)
-        if match:
-            return match.group(1).upper()
-        
-        return None
-    
-    def _extract_manufacturer(self, text: str) -> Optional[str]:
-        """提取厂商"""
-        manufacturers = {
-            "stmicroelectronics": "STMicroelectronics",
-            "st.com": "STMicroelectronics",
-            "espressif": "乐鑫科技",
-            "wch.cn": "沁恒微电子",
-            "ti.com": "Texas Instruments",
-            "texas instruments": "Texas Instruments",
-            "analog devices": "ADI",
-            "onn": "安森美",
-            "onsemi": "安森美",
-            "nxp": "NXP",
-            "microchip": "Microchip",
-        }
-        
-        for pattern, name in manufacturers.items():
-            if pattern in text:
-                return name
-        
-        return None
-    
-    def _extract_description(self, text: str) -> str:
-        """提取描述"""
-        # 尝试提取第一段作为描述
-        lines = text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if 20 < len(line) < 200:
-                return line
-        
-        return "无描述"
-    
-    def _extract_specifications(self, text: str) -> Dict[str, str]:
-        """提取规格参数"""
-        specs = {}
-        
-        # 电压范围
-        voltage_match = re.search(r'(\d+\.?\d*)\s*[-~至]\s*(\d+\.?\d*)\s*v(?:dc)?', text)
-        if voltage_match:
-            specs["voltage"] = f"{voltage_match.group(1)}-{voltage_match.group(2)}V"
-        
-        # 电流
-        current_match = re.search(r'(\d+\.?\d*)\s*(?:a|ma)', text)
-        if current_match:
-            specs["current"] = f"{current_match.group(1)}{'A' if 'a' in current_match.group(0) else 'mA'}"
-        
-        # 封装
-        package_match = re.search(r'(?:package|封装)[:\s]*([a-z0-9\-]+)', text)
-        if package_match:
-            specs["package"] = package_match.group(1).upper()
-        
-        # 温度范围
-        temp_match = re.search(r'(\-?\d+)\s*[:°]?\s*c.*?(\-?\d+)\s*[:°]?\s*c', text)
-        if temp_match:
-            specs["temperature"] = f"{temp_match.group(1)}°C ~ {temp_match.group(2)}°C"
-        
-        return specs
-    
-    def _extract_package(self, text: str) -> Optional[str]:
-        """提取封装"""
-        packages = [
-            "LQFP-48", "LQFP-44", "LQFP-32",
-            "SOP-8", "SOP-16", "SOIC-8",
-            "QFN-20", "QFN-24", "QFN-32",
-            "SOT-23", "SOT-223",
-            "DIP-8", "DIP-16",
-            "VSON-14", "VFQFPN-32",
-        ]
-        
-        for pkg in packages:
-            if pkg.lower() in text.lower():
-                return pkg
-        
-        return None
-    
-    def _generate_summary(
+    async def parse_content(
         self,
-        part_number: str,
-        manufacturer: str,
-        specifications: Dict[str, str]
-    ) -> str:
-        """生成中文摘要"""
-        parts = []
-        
-        if manufacturer:
-            parts.append(f"{manufacturer}")
-        
-        if part_number:
-            parts.append(f"{part_number}")
-        
-        if specifications.get("voltage"):
-            parts.append(f"{specifications['voltage']}电压")
-        
-        if specifications.get("current"):
-            parts.append(f"{specifications['current']}电流")
+        data: bytes,
+        is_pdf: bool,
+        encoding: str = "utf-8",
+    ) -> ParsedDatasheet:
+        """
+        解析文件内容，先按内容哈希查缓存 (失败时抛出异常)
         
-        if specifications.get("package"):
-            parts.append(f"{specifications['package']}封装")
+        PDF 在进程池中逐页提取文本和参数；文本按换页符 (\\f) 分页，在线程中提取。
+        结果和已读取的各页文本一起写入缓存。
+        """
+        digest = file_hash(data)
+        cache = get_datasheet_cache(self.config)
+        if cache is not None:
+            cached = await asyncio.to_thread(cache.get, digest, PARSER_VERSION)
+            if cached is not None:
+                return ParsedDatasheet(**cached[0])
+        
+        if is_pdf:
+            from .pool import get_pdf_pool
+            pages, fields = await get_pdf_pool(self.config).extract(data)
+        else:
+            text = data.decode(encoding, errors="replace")
+            pages, fields = await asyncio.to_thread(extract_pages, text.split("\f"))
         
-        return " ".join(parts) if parts else "未知器件"
+        result = ParsedDatasheet(**fields)
+        if cache is not None:
+            await asyncio.to_thread(cache.put, digest, PARSER_VERSION, asdict(result), pages)
+        return result
     
     async def parse_url(self, url: str) -> Optional[ParsedDatasheet]:
-        """从 URL 解析 Datasheet"""
-        # 使用 web_fetch 获取内容
-        from . import web_fetch
+        """从 URL 解析 Datasheet (经共享连接池获取，命中磁盘响应缓存时不重复下载)"""
+        from ..http_pool import get_http_pool
         
         try:
-            content = await web_fetch.fetch(url)
-            return self._extract_info(content)
+            response = await get_http_pool(self.config).cached_request("GET", url)
+            response.raise_for_status()
+            
+            content_type = response.headers.get("content-type", "").lower()
+            is_pdf = "pdf" in content_type or url.lower().split("?")[0].endswith(".pdf")
+            if is_pdf and not self.pdf_available:
+                raise ValueError("pdfplumber 未安装，无法解析 PDF")
+            
+            result = await self.parse_content(response.content, is_pdf, response.encoding or "utf-8")
+            result.datasheet_url = url
+            return result
         except Exception as e:
             print(f"URL 解析失败: {e}")
             return None
@@ -0,0 +1,126 @@
+"""
+Datasheet 解析结果缓存 - 按 (文件内容哈希, 解析器版本) 持久化
+Content-hash keyed cache of parsed datasheets (SQLite)
+
+用户经常重复上传同一份厂商 PDF；命中缓存时不再启动 pdfplumber 和参数提取。
+同时保存各页原始文本，解析规则升级 (PARSER_VERSION 变化) 后旧条目自然失效，
+可用 prune() 清理。容量上限由 SQLiteLRUCache 维护。
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import hashlib
+import json
+import logging
+import time
+
+from ..cache import CacheRegistry, SQLiteLRUCache
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(data: bytes) -> str:
+    """文件内容的 SHA-256"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class DatasheetCache(SQLiteLRUCache):
+    """
+    解析结果缓存
+
+    Args:
+        path: SQLite 文件路径
+        max_bytes: 缓存总大小上限 (字节)
+    """
+
+    FILE = "datasheets.sqlite"
+
+    TABLE = "datasheets"
+    KEY_COLUMNS = ("hash", "version")
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS datasheets (
+        hash TEXT NOT NULL,
+        version TEXT NOT NULL,
+        result TEXT NOT NULL,
+        pages TEXT NOT NULL,
+        stored_at REAL NOT NULL,
+        accessed_at REAL NOT NULL,
+        size INTEGER NOT NULL,
+        PRIMARY KEY (hash, version)
+    );
+    CREATE INDEX IF NOT EXISTS idx_datasheets_accessed ON datasheets(accessed_at);
+    """
+
+    def __init__(self, path: str, max_bytes: int = 128 * 1024 * 1024):
+        super().__init__(path, max_bytes)
+
+    @classmethod
+    def from_config(cls, config: Config) -> "DatasheetCache":
+        """根据 Config 创建缓存"""
+        return cls(
+            path=str(Path(config.cache_dir) / cls.FILE),
+            max_bytes=config.datasheet_cache_mb * 1024 * 1024,
+        )
+
+    def get(self, digest: str, version: str) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        """读取 (解析结果字段, 各页文本)，未命中返回 None"""
+        with self._lock:
+            conn = self._connection(create=True)
+            row = conn.execute(
+                "SELECT result, pages FROM datasheets WHERE hash = ? AND version = ?",
+                (digest, version),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            conn.execute(
+                "UPDATE datasheets SET accessed_at = ? WHERE hash = ? AND version = ?",
+                (time.time(), digest, version),
+            )
+        return json.loads(row[0]), json.loads(row[1])
+
+    def put(self, digest: str, version: str, result: Dict[str, Any], pages: List[str]) -> None:
+        """写入缓存，必要时淘汰旧条目"""
+        result_json = json.dumps(result, ensure_ascii=False)
+        pages_json = json.dumps(pages, ensure_ascii=False)
+        size = len(result_json.encode("utf-8")) + len(pages_json.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection(create=True)
+            conn.execute(
+                "INSERT OR REPLACE INTO datasheets "
+                "(hash, version, result, pages, stored_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (digest, version, result_json, pages_json, now, now, size),
+            )
+            self._evict_locked(conn)
+
+    def prune(self, keep_version: str) -> int:
+        """删除其他解析器版本的条目，返回删除条数"""
+        with self._lock:
+            conn = self._connection(create=True)
+            cursor = conn.execute("DELETE FROM datasheets WHERE version != ?", (keep_version,))
+        if cursor.rowcount:
+            logger.info(f"Pruned {cursor.rowcount} cached datasheets of old parser versions")
+        return cursor.rowcount
+
+
+_CACHES: CacheRegistry[DatasheetCache] = CacheRegistry()
+
+
+def get_datasheet_cache(config: Optional[Config] = None) -> Optional[DatasheetCache]:
+    """获取共享的解析结果缓存；cache_enabled 为 False 或 datasheet_cache_mb 为 0 时返回 None"""
+    config = config or Config.load()
+    if not config.cache_enabled or config.datasheet_cache_mb <= 0:
+        return None
+
+    path = str(Path(config.cache_dir) / DatasheetCache.FILE)
+    return _CACHES.get(path, lambda: DatasheetCache.from_config(config))
+
+
+def datasheet_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return _CACHES.stats()
@@ -0,0 +1,312 @@
+"""
+Datasheet 逐页参数提取
+Page-streaming field extraction
+
+- 逐页消费文本，每页只转一次小写
+- 所有规则在 ExtractionEngine 中预编译一次，每页扫描一遍，收集各字段候选及其位置
+- 全部目标字段找齐后停止读取后续页面
+- 字段未找齐时继续读取 (直到 pdf_max_pages)，长 datasheet 的覆盖更好，成本有上限
+
+PDF 在工作进程中边提取文本边调用本模块，提前停止时剩余页面不再提取文本 (见 pool.py)。
+"""
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import re
+
+# 常见型号: (关键字前缀, 模式)，按顺序优先
+PART_NUMBER_PATTERNS = [
+    ("stm32", r'stm32[f\d]+[a-z]*'),
+    ("esp32", r'esp32[-\w]*'),
+    ("ch340", r'ch340[ng]?'),
+    ("lm358", r'lm358[a-z]*'),
+    ("ams1117", r'ams1117[-\w]*'),
+    ("ld1117", r'ld1117[-\w]*'),
+    ("rp2040", r'rp2040'),
+    ("atmega328", r'atmega328[p]?'),
+]
+
+GENERIC_PART_NUMBER = (("part", "型号"), r'(?:part\s*(?:no|number)|型号)[:\s]*([a-z0-9\-]+)')
+
+MANUFACTURERS = {
+    "stmicroelectronics": "STMicroelectronics",
+    "st.com": "STMicroelectronics",
+    "espressif": "乐鑫科技",
+    "wch.cn": "沁恒微电子",
+    "ti.com": "Texas Instruments",
+    "texas instruments": "Texas Instruments",
+    "analog devices": "ADI",
+    "onn": "安森美",
+    "onsemi": "安森美",
+    "nxp": "NXP",
+    "microchip": "Microchip",
+}
+
+PACKAGES = [
+    "LQFP-48", "LQFP-44", "LQFP-32",
+    "SOP-8", "SOP-16", "SOIC-8",
+    "QFN-20", "QFN-24", "QFN-32",
+    "SOT-23", "SOT-223",
+    "DIP-8", "DIP-16",
+    "VSON-14", "VFQFPN-32",
+]
+
+# 规格参数
+SPEC_NAMES = ("voltage", "current", "package", "temperature")
+
+PACKAGE_SPEC = (("package", "封装"), r'(?:package|封装)[:\s]*([a-z0-9\-]+)')
+
+# 以数字开头的规格 (电压、电流、温度) 共用数字前缀合并为一个模式，每页扫描一遍；
+# 模式以 \d 开头，正则引擎可快速跳过非数字位置。温度的第二个端点放在前瞻中，
+# 不消耗同一行后面的文本
+NUMERIC_SPECS = re.compile(
+    r'(\d+\.?\d*)(?:'
+    r'\s*[-~至]\s*(\d+\.?\d*)\s*v(?:dc)?'
+    r'|\s*(a|ma)'
+    r'|\s*[:°]?\s*c(?=.*?(\-?\d+)\s*[:°]?\s*c))'
+)
+
+# 候选字段名: 规格参数以 "spec." 为前缀
+PART_NUMBER = "part_number"
+MANUFACTURER = "manufacturer"
+PACKAGE = "package"
+SPEC_FIELDS = tuple(f"spec.{name}" for name in SPEC_NAMES)
+NUMERIC_FIELDS = ("spec.voltage", "spec.current", "spec.temperature")
+TARGET_FIELDS = (PART_NUMBER, MANUFACTURER, PACKAGE) + SPEC_FIELDS
+
+
+class Candidate(NamedTuple):
+    """字段候选值; rank 越小优先级越高 (规则顺序)，同 rank 时取靠前的页面和位置"""
+    field: str
+    rank: int
+    page: int
+    position: int
+    value: str
+
+
+class _KeywordRule(NamedTuple):
+    """以关键字开头的规则; pattern 为空时关键字本身即匹配，值为 value"""
+    field: str
+    rank: int
+    keywords: Tuple[str, ...]
+    pattern: Optional["re.Pattern"]
+    value: Optional[str]
+
+
+class ExtractionEngine:
+    """
+    预编译的提取引擎
+
+    - 关键字规则 (型号、厂商、封装、"package:"): 先用 str.find 在 C 层定位关键字，
+      未出现的规则不再运行正则；出现时从关键字位置起做一次正则匹配
+    - 数字规格 (电压、电流、温度): 合并为一个模式 NUMERIC_SPECS，一次 finditer 扫描
+    - 已找到且优先级更高的字段，其低优先级规则直接跳过
+
+    CPython 的 re 对多分支交替式没有多模式加速，把所有规则合并成一个交替式反而比
+    逐个查找字面量慢，因此关键字规则使用 C 层子串查找。
+    """
+
+    def __init__(self):
+        rules: List[_KeywordRule] = []
+        for rank, (prefix, pattern) in enumerate(PART_NUMBER_PATTERNS):
+            rules.append(_KeywordRule(PART_NUMBER, rank, (prefix,), re.compile(pattern), None))
+        prefixes, pattern = GENERIC_PART_NUMBER
+        rules.append(_KeywordRule(
+            PART_NUMBER, len(PART_NUMBER_PATTERNS), prefixes, re.compile(pattern), None))
+        for rank, (keyword, name) in enumerate(MANUFACTURERS.items()):
+            rules.append(_KeywordRule(MANUFACTURER, rank, (keyword,), None, name))
+        for rank, pkg in enumerate(PACKAGES):
+            rules.append(_KeywordRule(PACKAGE, rank, (pkg.lower(),), None, pkg))
+        prefixes, pattern = PACKAGE_SPEC
+        rules.append(_KeywordRule("spec.package", 0, prefixes, re.compile(pattern), None))
+        self.rules = rules
+
+    def scan(
+        self,
+        text: str,
+        page: int = 0,
+        best: Optional[Dict[str, int]] = None,
+    ) -> List[Candidate]:
+        """
+        扫描一页 (小写) 文本
+
+        Args:
+            text: 小写页面文本
+            page: 页码 (记录在候选中)
+            best: 已找到字段的最高优先级 {字段: rank}，不可能更优的规则会被跳过
+
+        Returns:
+            每条规则在本页的第一个匹配
+        """
+        best = best or {}
+        candidates = []
+        for rule in self.rules:
+            if rule.rank >= best.get(rule.field, len(self.rules)):
+                continue
+            position = -1
+            for keyword in rule.keywords:
+                found = text.find(keyword)
+                if found >= 0 and (position < 0 or found < position):
+                    position = found
+            if position < 0:
+                continue
+            if rule.pattern is None:
+                candidates.append(Candidate(rule.field, rule.rank, page, position, rule.value))
+                continue
+            match = rule.pattern.search(text, position)
+            if match is not None:
+                value = (match.group(1) if match.re.groups else match.group(0)).upper()
+                candidates.append(Candidate(rule.field, rule.rank, page, match.start(), value))
+
+        wanted = {field for field in NUMERIC_FIELDS if field not in best}
+        if wanted:
+            candidates.extend(self._scan_numeric(text, page, wanted))
+        return candidates
+
+    @staticmethod
+    def _scan_numeric(text: str, page: int, wanted: set) -> List[Candidate]:
+        """一次扫描提取电压/电流/温度，每项取第一个匹配"""
+        candidates = []
+        for match in NUMERIC_SPECS.finditer(text):
+            number, upper, unit, end = match.groups()
+            start = match.start()
+            if upper is not None:
+                field, value = "spec.voltage", f"{number}-{upper}V"
+            elif unit is not None:
+                field, value = "spec.current", f"{number}{'mA' if unit == 'ma' else 'A'}"
+            else:
+                if start > 0 and text[start - 1] == "-":
+                    number, start = f"-{number}", start - 1
+                field, value = "spec.temperature", f"{number}°C ~ {end}°C"
+            if field in wanted:
+                wanted.discard(field)
+                candidates.append(Candidate(field, 0, page, start, value))
+                if not wanted:
+                    break
+        return candidates
+
+
+_ENGINE: Optional[ExtractionEngine] = None
+
+
+def get_engine() -> ExtractionEngine:
+    """进程内共享的提取引擎 (首次使用时编译)"""
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = ExtractionEngine()
+    return _ENGINE
+
+
+def extract_description(text: str) -> Optional[str]:
+    """取第一段长度合适的文字作为描述"""
+    for line in text.split('\n'):
+        line = line.strip()
+        if 20 < len(line) < 200:
+            return line
+    return None
+
+
+def generate_summary(
+    part_number: Optional[str],
+    manufacturer: Optional[str],
+    specifications: Dict[str, str],
+) -> str:
+    """生成中文摘要"""
+    parts = []
+
+    if manufacturer:
+        parts.append(f"{manufacturer}")
+
+    if part_number:
+        parts.append(f"{part_number}")
+
+    if specifications.get("voltage"):
+        parts.append(f"{specifications['voltage']}电压")
+
+    if specifications.get("current"):
+        parts.append(f"{specifications['current']}电流")
+
+    if specifications.get("package"):
+        parts.append(f"{specifications['package']}封装")
+
+    return " ".join(parts) if parts else "未知器件"
+
+
+class DatasheetExtractor:
+    """
+    逐页提取器
+
+    每页转一次小写、用 ExtractionEngine 扫描一次；每个字段保留优先级最高的候选
+    (规则顺序优先，其次是页面和位置靠前)。
+
+    示例:
+        >>> extractor = DatasheetExtractor()
+        >>> for page in pages:
+        ...     if extractor.feed(page):
+        ...         break
+        >>> fields = extractor.fields()
+    """
+
+    def __init__(self):
+        self.engine = get_engine()
+        self.best: Dict[str, Candidate] = {}
+        self.description: Optional[str] = None
+        self.pages = 0
+
+    @property
+    def complete(self) -> bool:
+        """全部目标字段均已找到"""
+        return self.description is not None and len(self.best) == len(TARGET_FIELDS)
+
+    def feed(self, page: str) -> bool:
+        """消费一页文本，返回是否已找齐全部字段"""
+        text = page.lower()
+        ranks = {field: candidate.rank for field, candidate in self.best.items()}
+        for candidate in self.engine.scan(text, self.pages, ranks):
+            current = self.best.get(candidate.field)
+            if current is None or candidate.rank < current.rank:
+                self.best[candidate.field] = candidate
+        if self.description is None:
+            self.description = extract_description(text)
+        self.pages += 1
+        return self.complete
+
+    def value(self, field: str) -> Optional[str]:
+        candidate = self.best.get(field)
+        return candidate.value if candidate is not None else None
+
+    def fields(self) -> Dict[str, Any]:
+        """ParsedDatasheet 的字段 (datasheet_url 为空)"""
+        part_number = self.value(PART_NUMBER)
+        manufacturer = self.value(MANUFACTURER)
+        specifications = {
+            name: self.best[field].value
+            for name, field in zip(SPEC_NAMES, SPEC_FIELDS)
+            if field in self.best
+        }
+        return {
+            "part_number": part_number or "未知",
+            "manufacturer": manufacturer or "未知",
+            "description": self.description or "无描述",
+            "specifications": specifications,
+            "package": self.value(PACKAGE) or "未知",
+            "datasheet_url": "",
+            "summary": generate_summary(part_number, manufacturer, specifications),
+        }
+
+
+def extract_pages(pages: Iterable[str]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    逐页提取，找齐全部字段后不再读取后续页面
+
+    Args:
+        pages: 页面文本 (可以是惰性生成器，提前停止时剩余页面不会被生成)
+
+    Returns:
+        (已读取的页面文本, ParsedDatasheet 字段)
+    """
+    extractor = DatasheetExtractor()
+    read = []
+    for page in pages:
+        read.append(page)
+        if extractor.feed(page):
+            break
+    return read, extractor.fields()
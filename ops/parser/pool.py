@@ -0,0 +1,207 @@
+"""
+PDF 解析进程池
+Process pool for CPU-heavy PDF text extraction
+
+- pdfplumber 提取文本是纯 CPU 计算，放在独立进程中执行，不阻塞 API 的事件循环
+- 工作进程数可配置；进程以 spawn 方式启动，不继承事件循环与线程状态
+- 单个文件超时: 超时后终止整个进程池并重建 (运行中的任务无法单独取消)，
+  同时在池中的其他任务会在新进程池中重试一次
+- 内存上限: 工作进程启动时设置 RLIMIT_AS (POSIX)，超出时该任务以 MemoryError 失败
+- 逐页提取文本并提取参数，字段找齐后不再提取后续页面 (见 extract.py)
+
+示例:
+    >>> pool = get_pdf_pool()
+    >>> pages, fields = await pool.extract("datasheet.pdf")
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
+import io
+import logging
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from ..config import Config
+from .extract import extract_pages
+
+logger = logging.getLogger(__name__)
+
+PDFSource = Union[str, bytes]
+
+
+def _limit_memory(memory_mb: int) -> None:
+    """工作进程初始化: 限制地址空间大小"""
+    if resource is None or memory_mb <= 0:
+        return
+    limit = memory_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Cannot limit PDF worker memory: {e}")
+
+
+def extract_pdf(source: PDFSource, max_pages: int = 30) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    逐页提取 PDF 文本和参数 (在工作进程中执行)
+
+    Args:
+        source: 文件路径或 PDF 内容
+        max_pages: 字段未找齐时最多读取的页数
+
+    Returns:
+        (已读取的各页文本, ParsedDatasheet 字段)
+    """
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source) as pdf:
+        return extract_pages(page.extract_text() or "" for page in pdf.pages[:max_pages])
+
+
+class PDFTimeoutError(TimeoutError):
+    """单个文件解析超时"""
+
+
+class PDFWorkerPool:
+    """
+    PDF 解析进程池
+
+    Args:
+        workers: 工作进程数
+        timeout: 单个文件的解析超时 (秒)
+        memory_mb: 每个工作进程的内存上限 (MB)，0 表示不限制
+        max_pages: 字段未找齐时每个文件最多读取的页数
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout: float = 60.0,
+        memory_mb: int = 1024,
+        max_pages: int = 30,
+    ):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.max_pages = max_pages
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    @classmethod
+    def from_config(cls, config: Config) -> "PDFWorkerPool":
+        return cls(
+            workers=config.pdf_workers,
+            timeout=config.pdf_timeout_seconds,
+            memory_mb=config.pdf_memory_limit_mb,
+            max_pages=config.pdf_max_pages,
+        )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_memory,
+                initargs=(self.memory_mb,),
+            )
+        return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """终止进程池 (超时或工作进程崩溃后)，下次提交时重建"""
+        if self._executor is executor:
+            self._executor = None
+            self.restarts += 1
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            if process.is_alive():
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """
+        在工作进程中执行 func(*args)
+
+        Raises:
+            PDFTimeoutError: 超过 timeout
+            MemoryError: 超过内存上限
+        """
+        self.submitted += 1
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(executor, func, *args), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self.failed += 1
+                self._recycle(executor)
+                raise PDFTimeoutError(f"PDF extraction exceeded {self.timeout}s")
+            except BrokenProcessPool:
+                # 其他任务超时导致进程池被终止时，在新进程池中重试一次
+                recycled_by_other = self._executor is not executor
+                self._recycle(executor)
+                if attempt == 0 and recycled_by_other:
+                    continue
+                self.failed += 1
+                raise
+            except BaseException:
+                self.failed += 1
+                raise
+            self.completed += 1
+            return result
+
+    async def extract(
+        self, source: Union[PDFSource, io.IOBase]
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """逐页提取 PDF 文本和参数 (路径、bytes 或二进制文件对象)，返回 (各页文本, 字段)"""
+        if hasattr(source, "read"):
+            source = source.read()
+        return await self.run(extract_pdf, source, self.max_pages)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+        }
+
+
+# 进程级共享进程池 (与事件循环无关)
+_POOL: Optional[PDFWorkerPool] = None
+
+
+def get_pdf_pool(config: Optional[Config] = None) -> PDFWorkerPool:
+    """获取共享 PDF 解析进程池 (首次调用时按 config 创建，工作进程在首次提交时启动)"""
+    global _POOL
+    if _POOL is None:
+        _POOL = PDFWorkerPool.from_config(config or Config.load())
+    return _POOL
+
+
+def pdf_pool_stats() -> Dict[str, Any]:
+    return _POOL.stats() if _POOL is not None else {}
+
+
+def close_pdf_pool() -> None:
+    """关闭共享进程池 (应用退出时调用)"""
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown()
+        _POOL = None
@@ -0,0 +1,195 @@
+"""
+投机预取模块 - 在排序完成前提前拉取候选器件的价格与替代料
+
+搜索返回后，按搜索分数挑出"可能进入 top-k"的候选，立即在有界后台任务组中
+并发启动价格/替代料查询；排序阶段直接复用这些结果。排序结束后，跌出 top-k
+的候选对应的投机任务会被取消，避免浪费远程配额。
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedTaskGroup:
+    """
+    有界后台任务组
+
+    - 同时运行的任务数受 ``max_concurrency`` 限制
+    - 任务按 key 去重，重复 spawn 返回同一个任务
+    - ``result()`` 带超时等待共享任务: 超时包含排队等待并发槽位的时间，默认不取消任务
+    - 支持按 key 取消，``aclose()`` 取消并回收全部未完成任务
+    """
+
+    def __init__(self, max_concurrency: int = 8):
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}  # 正在 result() 中等待的调用方数量
+        self._cancelled: List[asyncio.Task] = []  # 已取消但尚未回收的任务
+        self._closed = False
+
+    def spawn(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """启动 (或复用) 一个后台任务"""
+        if self._closed:
+            raise RuntimeError("BoundedTaskGroup 已关闭")
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(factory))
+            self._tasks[key] = task
+        return task
+
+    async def _run(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        async with self._semaphore:
+            return await factory()
+
+    async def result(
+        self,
+        key: Hashable,
+        timeout: Optional[float] = None,
+        cancel_on_timeout: bool = False,
+    ) -> Any:
+        """
+        等待已启动任务的结果
+
+        超时从调用时开始计算，包含排队等待并发槽位的时间。超时默认只放弃本次等待，
+        任务继续运行，其他等待者仍可复用其结果；``cancel_on_timeout`` 为真时，
+        若已没有其他等待者则取消任务，让出并发槽位。
+
+        Raises:
+            KeyError: 任务不存在
+            asyncio.TimeoutError: timeout 秒内未完成
+            RuntimeError: 任务已被取消
+        """
+        task = self._tasks[key]
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+        finally:
+            remaining = self._waiters.pop(key) - 1
+            if remaining:
+                self._waiters[key] = remaining
+        if not done:
+            if cancel_on_timeout and not remaining and self._tasks.get(key) is task:
+                self.cancel([key])
+            raise asyncio.TimeoutError()
+        if task.cancelled():
+            raise RuntimeError(f"Task {key!r} was cancelled")
+        return task.result()
+
+    def get(self, key: Hashable) -> Optional[asyncio.Task]:
+        """获取已启动的任务"""
+        return self._tasks.get(key)
+
+    def keys(self) -> List[Hashable]:
+        """已启动任务的 key 列表"""
+        return list(self._tasks.keys())
+
+    def cancel(self, keys: Iterable[Hashable]) -> int:
+        """取消指定 key 的任务，返回实际取消的数量"""
+        cancelled = 0
+        for key in list(keys):
+            task = self._tasks.pop(key, None)
+            if task is not None and not task.done():
+                task.cancel()
+                self._cancelled.append(task)
+                cancelled += 1
+        return cancelled
+
+    async def aclose(self) -> None:
+        """取消全部未完成任务并等待其退出"""
+        self._closed = True
+        pending = [t for t in self._tasks.values() if not t.done()]
+        for task in pending:
+            task.cancel()
+        pending.extend(self._cancelled)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks.clear()
+        self._cancelled.clear()
+
+
+class EnrichmentPrefetcher:
+    """
+    候选器件富化预取器
+
+    为候选器件投机地并发查询价格与替代料，查询函数来自 SearchEngine:
+    ``compare_prices(part_number)`` 与 ``get_alternatives(part_number)``。
+    """
+
+    PRICE = "price"
+    ALTERNATIVES = "alternatives"
+
+    def __init__(self, search_engine, max_concurrency: int = 8):
+        self.search_engine = search_engine
+        self.group = BoundedTaskGroup(max_concurrency)
+        self.speculated: List[str] = []
+        self.cancelled = 0
+
+    @staticmethod
+    def likely_top_k(candidates: List[Dict], k: int) -> List[str]:
+        """按搜索阶段的分数预测可能进入 top-k 的候选型号"""
+        ranked = sorted(
+            candidates,
+            key=lambda c: c.get("score", c.get("match_score", 0.0)) or 0.0,
+            reverse=True,
+        )
+        part_numbers = []
+        for candidate in ranked:
+            pn = candidate.get("part_number")
+            if pn and pn not in part_numbers:
+                part_numbers.append(pn)
+            if len(part_numbers) >= k:
+                break
+        return part_numbers
+
+    def start(self, part_numbers: Iterable[str]) -> None:
+        """为给定型号启动价格与替代料的投机查询"""
+        for pn in part_numbers:
+            self.price(pn)
+            self.alternatives(pn)
+            self.speculated.append(pn)
+        logger.debug(f"Prefetch started for {len(self.speculated)} candidates")
+
+    def price(self, part_number: str) -> asyncio.Task:
+        """价格查询任务 (已预取则复用)"""
+        return self.group.spawn(
+            (self.PRICE, part_number),
+            lambda: self.search_engine.compare_prices(part_number),
+        )
+
+    async def price_result(
+        self,
+        part_number: str,
+        timeout: Optional[float] = None,
+        cancel_on_timeout: bool = False,
+    ) -> Dict:
+        """
+        等待价格查询结果 (已预取则复用)
+
+        超时包含排队时间；仍有其他等待者时超时不会取消共享的查询任务。
+        """
+        self.price(part_number)
+        return await self.group.result((self.PRICE, part_number), timeout, cancel_on_timeout)
+
+    def alternatives(self, part_number: str) -> asyncio.Task:
+        """替代料查询任务 (已预取则复用)"""
+        return self.group.spawn(
+            (self.ALTERNATIVES, part_number),
+            lambda: self.search_engine.get_alternatives(part_number),
+        )
+
+    def retain(self, part_numbers: Iterable[str]) -> int:
+        """只保留给定型号的投机任务，取消跌出 top-k 的候选"""
+        keep = set(part_numbers)
+        dropped = [key for key in self.group.keys() if key[1] not in keep]
+        cancelled = self.group.cancel(dropped)
+        self.cancelled += cancelled
+        if cancelled:
+            logger.debug(f"Prefetch cancelled {cancelled} speculative lookups")
+        return cancelled
+
+    async def aclose(self) -> None:
+        """关闭预取器，回收全部后台任务"""
+        await self.group.aclose()
@@ -0,0 +1,385 @@
+"""
+按数据源自适应限流模块
+Per-source token bucket + AIMD adaptive concurrency
+
+- 令牌桶: 按电商平台公布的每分钟配额限速，允许短时突发
+- AIMD 并发控制: 请求成功且延迟正常时并发上限加性增长 (每轮约 +1)，
+  遇到 429/5xx、超时或延迟明显高于基线时乘性减半；429 同时降低令牌速率，
+  并遵守 Retry-After
+- 同时提供异步 (搜索引擎) 与同步 (backend/scraper.py) 接口
+
+示例:
+    >>> limiter = get_limiter("mouser")
+    >>> async with limiter.slot() as outcome:
+    ...     response = await client.get(url)
+    ...     outcome.record(response)
+"""
+from typing import Any, Deque, Dict, Optional
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+import asyncio
+import logging
+import threading
+import time
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    令牌桶 (线程安全)
+
+    令牌不足时预留未来的令牌 (余额可为负)，调用方按返回的时长等待，
+    保证先到先得。
+
+    Args:
+        rate: 每秒补充的令牌数
+        capacity: 桶容量 (最大突发请求数)
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill_locked(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """预留一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill_locked(now)
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def cancel(self) -> None:
+        """归还一个已预留但未使用的令牌 (等待期间被取消或出错)"""
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def set_rate(self, rate: float) -> None:
+        """调整令牌速率"""
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            self.rate = rate
+
+    def pause(self, seconds: float) -> None:
+        """暂停发放令牌 (如服务端返回 Retry-After)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                # 未用到的预留令牌必须归还，否则超时取消会让欠账越积越多
+                self.cancel()
+                raise
+
+    def acquire_sync(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            except BaseException:
+                self.cancel()
+                raise
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    """asyncio/httpx/requests 的各类超时异常"""
+    return isinstance(exc, (asyncio.TimeoutError, TimeoutError)) or "timeout" in type(exc).__name__.lower()
+
+
+@dataclass
+class Outcome:
+    """一次请求的结果 (由调用方记录，供限流器调整)"""
+    status: Optional[int] = None
+    retry_after: Optional[float] = None
+    timed_out: bool = False
+    error: bool = False
+
+    def record(self, response: Any) -> None:
+        """记录 HTTP 响应 (httpx/requests/CachedResponse)"""
+        self.status = response.status_code
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                self.retry_after = float(retry_after)
+            except ValueError:
+                pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.error = True
+        self.timed_out = _is_timeout(exc)
+        response = getattr(exc, "response", None)
+        if response is not None and self.status is None:
+            self.record(response)
+
+    @property
+    def throttled(self) -> bool:
+        return self.status == 429
+
+    @property
+    def failed(self) -> bool:
+        """服务端过载信号: 429、5xx 或超时"""
+        return self.timed_out or self.throttled or (self.status is not None and self.status >= 500)
+
+
+class AdaptiveLimiter:
+    """
+    单个数据源的限流器 (令牌桶 + AIMD 并发上限)
+
+    Args:
+        name: 数据源名称
+        rate: 每秒请求数上限 (平台配额)
+        burst: 最大突发请求数
+        max_concurrency: 并发上限的上界
+        min_concurrency: 并发上限的下界
+        latency_target: 延迟阈值 (秒)，None 表示按观测基线的 latency_tolerance 倍自动判断
+        latency_tolerance: 延迟超过基线的倍数视为拥塞
+        backoff: 拥塞时的乘性减小系数
+        cooldown: 两次减小之间的最短间隔 (秒)，避免同一批失败重复减半
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 2.0,
+        burst: Optional[float] = None,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        latency_target: Optional[float] = None,
+        latency_tolerance: float = 3.0,
+        backoff: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.max_rate = rate
+        self.min_rate = rate / 16
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max(min_concurrency, max_concurrency // 2))
+        self.latency_target = latency_target
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.baseline: Optional[float] = None
+        self.inflight = 0
+        self.successes = 0
+        self.congestions = 0
+        self.throttled = 0
+        self._last_decrease = 0.0
+        self._waiters: Deque[Any] = deque()
+        self._lock = threading.Lock()
+
+    # ---------- 并发槽位 ----------
+
+    def _admit_locked(self) -> None:
+        """在并发上限内唤醒等待者 (槽位直接转交)"""
+        while self._waiters and self.inflight < int(self.limit):
+            self.inflight += 1
+            waiter = self._waiters.popleft()
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+            else:
+                future, loop = waiter
+                loop.call_soon_threadsafe(self._resolve, future)
+
+    def _resolve(self, future: asyncio.Future) -> None:
+        if future.done():
+            # 等待者已取消，归还转交来的槽位
+            self._release_slot()
+        else:
+            future.set_result(None)
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self.inflight -= 1
+            self._admit_locked()
+
+    async def _acquire_slot(self) -> None:
+        with self._lock:
+            if self.inflight < int(self.limit) and not self._waiters:
+                self.inflight += 1
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._waiters.append((future, loop))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((future, loop))
+                    owned = False
+                except ValueError:
+                    owned = future.done() and not future.cancelled()
+            if owned:
+                self._release_slot()
+            raise
+
+    def _acquire_slot_sync(self) -> None:
+        with self._lock:
+            if self.inflight < int(self.limit) and not self._waiters:
+                self.inflight += 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def acquire(self) -> None:
+        """获取并发槽位和令牌"""
+        await self._acquire_slot()
+        try:
+            await self.bucket.acquire()
+        except BaseException:
+            self._release_slot()
+            raise
+
+    def acquire_sync(self) -> None:
+        self._acquire_slot_sync()
+        try:
+            self.bucket.acquire_sync()
+        except BaseException:
+            self._release_slot()
+            raise
+
+    # ---------- AIMD 调整 ----------
+
+    def release(self, latency: float, outcome: Optional[Outcome] = None) -> None:
+        """释放槽位，并按请求结果调整并发上限与速率"""
+        outcome = outcome or Outcome()
+        with self._lock:
+            slow = self._observe_latency_locked(latency)
+            if outcome.failed or (slow and not outcome.error):
+                self._decrease_locked(outcome)
+            elif not outcome.error and (outcome.status is None or outcome.status < 400):
+                self._increase_locked()
+            self.inflight -= 1
+            self._admit_locked()
+
+    def _observe_latency_locked(self, latency: float) -> bool:
+        """更新延迟基线 (缓慢上浮的最小值)，返回本次是否明显偏慢"""
+        if self.latency_target is not None:
+            return latency > self.latency_target
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+            return False
+        slow = latency > self.baseline * self.latency_tolerance
+        self.baseline += (latency - self.baseline) * 0.01
+        return slow
+
+    def _increase_locked(self) -> None:
+        self.successes += 1
+        # 每轮 (约 limit 个请求) 并发上限 +1
+        self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.max_rate / 20))
+
+    def _decrease_locked(self, outcome: Outcome) -> None:
+        if outcome.throttled:
+            self.throttled += 1
+            if outcome.retry_after:
+                self.bucket.pause(outcome.retry_after)
+
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.congestions += 1
+        self.limit = max(float(self.min_concurrency), self.limit * self.backoff)
+        if outcome.throttled:
+            self.bucket.set_rate(max(self.min_rate, self.bucket.rate * self.backoff))
+        logger.info(
+            f"Rate limiter {self.name}: backing off to concurrency={self.limit:.1f}, "
+            f"rate={self.bucket.rate:.2f}/s"
+        )
+
+    # ---------- 上下文管理器 ----------
+
+    @asynccontextmanager
+    async def slot(self):
+        """异步限流区间，调用方通过 outcome.record(response) 记录结果"""
+        await self.acquire()
+        outcome = Outcome()
+        started = time.monotonic()
+        try:
+            yield outcome
+        except BaseException as e:
+            outcome.record_exception(e)
+            raise
+        finally:
+            self.release(time.monotonic() - started, outcome)
+
+    @contextmanager
+    def slot_sync(self):
+        """同步限流区间 (供爬虫使用)"""
+        self.acquire_sync()
+        outcome = Outcome()
+        started = time.monotonic()
+        try:
+            yield outcome
+        except BaseException as e:
+            outcome.record_exception(e)
+            raise
+        finally:
+            self.release(time.monotonic() - started, outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "concurrency_limit": round(self.limit, 2),
+                "inflight": self.inflight,
+                "waiting": len(self._waiters),
+                "rate_per_second": round(self.bucket.rate, 3),
+                "max_rate_per_second": self.max_rate,
+                "latency_baseline": self.baseline,
+                "successes": self.successes,
+                "congestions": self.congestions,
+                "throttled": self.throttled,
+            }
+
+
+# 进程级限流器 (搜索引擎与爬虫共享)
+_LIMITERS: Dict[str, AdaptiveLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(name: str, config: Optional[Config] = None) -> AdaptiveLimiter:
+    """
+    获取 (或创建) 指定数据源的限流器
+
+    速率取 Config.rate_limits[name] (每分钟请求数)，未配置时使用 rate_limit_default。
+    """
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(name)
+        if limiter is None:
+            config = config or Config.load()
+            rate = config.rate_limits.get(name, config.rate_limit_default) / 60.0
+            limiter = _LIMITERS[name] = AdaptiveLimiter(
+                name,
+                rate=rate,
+                burst=max(1.0, rate * config.rate_limit_burst_seconds),
+                max_concurrency=config.max_concurrency_per_source,
+            )
+    return limiter
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """全部限流器的状态"""
+    return {name: limiter.stats() for name, limiter in _LIMITERS.items()}
@@ -0,0 +1,279 @@
+"""
+数据源熔断与对冲请求模块
+Per-source circuit breakers & hedged requests
+
+- 熔断器: 连续失败 (异常/超时/慢调用) 达到阈值后打开，直接跳过该数据源；
+  冷却期后进入半开状态，放行一个探测请求，成功则恢复
+- 对冲请求: 调用超过该数据源近期的 p95 延迟仍未返回时，再发一个相同请求，
+  取先返回的结果 (只用于搜索/比价这类幂等读请求)
+
+某个电商平台变慢时，熔断器让它不再拖慢每次选型，对冲请求削掉偶发的长尾，
+/api/v1/select 的 p99 因此保持稳定。
+
+示例:
+    >>> guard = get_guard("mouser")
+    >>> result = await guard.call(lambda: connector.get_price(pn), timeout=2.0)
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import logging
+import time
+
+from .config import Config
+from .latency import LatencyHistogram, get_tracker
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开，调用被拒绝"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    Args:
+        name: 数据源名称
+        failure_threshold: 连续失败多少次后打开
+        reset_timeout: 打开后多久进入半开状态 (秒)
+        slow_call_seconds: 超过该时长的调用记为失败，None 表示不判断慢调用
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        slow_call_seconds: Optional[float] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.failures = 0
+        self.opened_count = 0
+        self.rejected = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """是否放行本次调用 (半开状态只放行一个探测请求)"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self, latency: float) -> None:
+        if self.slow_call_seconds is not None and latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        if self._state != self.CLOSED:
+            logger.info(f"Circuit breaker '{self.name}' closed")
+        self._state = self.CLOSED
+        self._probing = False
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+
+    def release_probe(self) -> None:
+        """探测请求被取消 (未得出结论)，允许下一次探测"""
+        self._probing = False
+
+    def _open(self) -> None:
+        if self._state != self.OPEN:
+            self.opened_count += 1
+            logger.warning(f"Circuit breaker '{self.name}' opened after {self.failures} failures")
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened_count": self.opened_count,
+            "rejected": self.rejected,
+        }
+
+
+def _consume(task: asyncio.Future) -> None:
+    """取出被放弃任务的异常，避免 "never retrieved" 警告"""
+    if not task.cancelled():
+        task.exception()
+
+
+async def hedged(fn: Callable[[], Awaitable[T]], delay: Optional[float]) -> T:
+    """
+    对冲执行: fn 超过 delay 秒未返回时再发起一次，返回先成功的结果
+
+    两次都失败时抛出第一次调用的异常。delay 为 None 时不对冲。
+    """
+    first = asyncio.ensure_future(fn())
+    if delay is None:
+        return await first
+
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        tasks.append(asyncio.ensure_future(fn()))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        raise first.exception()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            task.add_done_callback(_consume)
+
+
+class SourceGuard:
+    """
+    单个数据源的保护层 (熔断 + 对冲 + 延迟统计)
+
+    Args:
+        name: 数据源名称
+        breaker: 熔断器
+        hedge: 是否启用对冲请求
+        hedge_percentile: 对冲触发的延迟分位
+        hedge_min_samples: 延迟样本数不足时不对冲
+        latency: 延迟直方图，None 表示新建
+    """
+
+    def __init__(
+        self,
+        name: str,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge: bool = True,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        latency: Optional[LatencyHistogram] = None,
+    ):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker(name)
+        self.latency = latency if latency is not None else LatencyHistogram()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedges = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """对冲延迟: 近期的 p95 延迟 (样本不足时为 None)"""
+        if not self.hedge or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    async def call(self, fn: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """
+        经熔断器调用 fn
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+            asyncio.TimeoutError: 超时 (记为失败)
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for source '{self.name}'")
+
+        delay = self.hedge_delay()
+        if delay is not None and timeout is not None and delay >= timeout:
+            delay = None
+
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(hedged(fn, delay), timeout=timeout)
+        except asyncio.CancelledError:
+            # 调用方放弃: 已经很慢则记为失败，否则不下结论
+            if self._is_slow(time.monotonic() - started):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release_probe()
+            raise
+        except asyncio.TimeoutError:
+            # 超时按已等待时长记入 (删失样本)，慢数据源的自适应超时随之放宽
+            self.latency.record(time.monotonic() - started)
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        finally:
+            if delay is not None and time.monotonic() - started >= delay:
+                self.hedges += 1
+
+        elapsed = time.monotonic() - started
+        self.latency.record(elapsed)
+        self.breaker.record_success(elapsed)
+        return result
+
+    def _is_slow(self, elapsed: float) -> bool:
+        threshold = self.breaker.slow_call_seconds
+        return threshold is not None and elapsed > threshold
+
+    def stats(self) -> Dict[str, Any]:
+        p50 = self.latency.percentile(0.5)
+        p95 = self.latency.percentile(0.95)
+        return {
+            **self.breaker.stats(),
+            "hedges": self.hedges,
+            "latency_p50": p50,
+            "latency_p95": p95,
+        }
+
+
+# 进程级数据源保护层 (跨 SearchEngine 实例共享熔断状态)
+_GUARDS: Dict[str, SourceGuard] = {}
+
+
+def get_guard(name: str, config: Optional[Config] = None) -> SourceGuard:
+    """获取 (或创建) 指定数据源的保护层"""
+    guard = _GUARDS.get(name)
+    if guard is None:
+        config = config or Config.load()
+        breaker = CircuitBreaker(
+            name,
+            failure_threshold=config.breaker_failure_threshold,
+            reset_timeout=config.breaker_reset_seconds,
+            slow_call_seconds=config.breaker_slow_call_seconds or None,
+        )
+        guard = _GUARDS[name] = SourceGuard(
+            name,
+            breaker,
+            hedge=config.hedge_requests,
+            hedge_percentile=config.hedge_percentile,
+            latency=get_tracker(name),
+        )
+    return guard
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """全部数据源的熔断器状态"""
+    return {name: guard.stats() for name, guard in _GUARDS.items()}
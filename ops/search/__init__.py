@@ -3,18 +3,32 @@
 Multi-Source Search Engine
 
 支持:
-- 内置数据库搜索
-- Web API 搜索 (Octopart, Digi-Key, Mouser)
-- 智能匹配与排序
+- 内置数据库 / 知识库 / 嘉立创目录搜索
+- Web API 搜索 (Octopart, Digi-Key, Mouser, LCSC)
+- 多数据源并发查询，单源超时 + 整体截止时间
+- 按数据源熔断，慢请求超过 p95 延迟时发出对冲请求
+- 按观测延迟 (p99) 自适应调整单源超时
+- 按规范化型号去重的智能合并与排序
 """
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
+import asyncio
+import logging
+import time
 from ..config import Config
 from ..database import search_components as db_search, get_price_comparison as db_get_price
+from .vendors import VendorConnector, build_connectors
+from .sources import SearchSource, SourceRegistry, ResultMerger
+from ..latency import TimeoutPolicy, get_tracker
+from ..resilience import CircuitOpenError, get_guard
+from ..singleflight import get_flight
+from ..utils import normalize_mpn
 
 # SearchResult 定义在 agent.py 中，通过 agent.py 统一导出
 # 这里不需要单独导入，避免循环导入问题
 
+logger = logging.getLogger(__name__)
+
 
 class SearchEngine:
     """多平台搜索引擎"""
@@ -26,8 +40,39 @@ class SearchEngine:
             "digikey": self.config.api_keys.digikey,
             "mouser": self.config.api_keys.mouser,
         }
+        # 已配置 API Key 的电商平台连接器 (共享 HTTP 连接池)
+        self.vendors: Dict[str, VendorConnector] = build_connectors(self.config)
+        # 数据源注册表: 数据库、知识库、嘉立创目录、各电商平台
+        self.sources = SourceRegistry()
+        self._register_default_sources()
+        self.last_search_report: Dict[str, str] = {}
+        self.timeout_policy = TimeoutPolicy.from_config(self.config)
         self._initialized = False
     
+    def _register_default_sources(self) -> None:
+        """注册内置数据源"""
+        self.sources.register(SearchSource("database", self._search_database))
+        self.sources.register(SearchSource("knowledge", self._search_knowledge))
+        self.sources.register(SearchSource("jlc", self._search_jlc))
+        for name in self.vendors:
+            self.sources.register(SearchSource(name, self._vendor_search_fn(name)))
+    
+    def register_source(
+        self,
+        name: str,
+        search_fn,
+        timeout: Optional[float] = None
+    ) -> None:
+        """
+        注册自定义数据源
+        
+        Args:
+            name: 数据源名称
+            search_fn: async (query, category, constraints, limit) -> List[Dict]
+            timeout: 单源超时 (秒)
+        """
+        self.sources.register(SearchSource(name, search_fn, timeout=timeout))
+    
     async def initialize(self) -> None:
         """初始化搜索引擎"""
         self._initialized = True
@@ -41,30 +86,152 @@ class SearchEngine:
         query: str,
         category: Optional[str] = None,
         constraints: Optional[Dict] = None,
-        limit: int = 10
+        limit: int = 10,
+        deadline: Optional[float] = None
     ) -> List[Dict]:
         """
-        综合搜索
+        综合搜索 - 并发查询所有数据源，按到达顺序增量合并
         
         Args:
             query: 搜索关键词
             category: 器件分类
             constraints: 约束条件
             limit: 结果数量
+            deadline: 整体截止时间 (秒)，到期返回已到达的结果；
+                      默认 Config.search_deadline_seconds
             
         Returns:
-            搜索结果列表
+            搜索结果列表 (按分数降序，按规范化型号去重)
         """
-        # 1. 首先搜索内置数据库
-        db_results = await self._search_database(query, category, constraints, limit)
+        if not self.config.coalesce_requests:
+            return await self._search_sources(query, category, constraints, limit, deadline)
+        
+        # 相同参数的并发搜索合并为一次执行
+        key = self._search_key(query, category, constraints, limit, deadline)
+        return await get_flight("search").do(
+            key,
+            lambda: self._search_sources(query, category, constraints, limit, deadline)
+        )
+    
+    def _flight_scope(self) -> tuple:
+        """合并范围: 参与查询的数据源集合 + 知识库路径"""
+        return (tuple(s.name for s in self.sources.active()), self.config.vector_store_path)
+    
+    def _search_key(
+        self,
+        query: str,
+        category: Optional[str],
+        constraints: Optional[Dict],
+        limit: int,
+        deadline: Optional[float]
+    ) -> tuple:
+        """规范化的搜索合并 key"""
+        normalized_constraints = tuple(sorted(
+            (str(k).lower(), str(v).strip().lower()) for k, v in (constraints or {}).items()
+        ))
+        return (
+            self._flight_scope(),
+            " ".join((query or "").lower().split()),
+            (category or "").lower(),
+            normalized_constraints,
+            limit,
+            deadline,
+        )
+    
+    async def _search_sources(
+        self,
+        query: str,
+        category: Optional[str],
+        constraints: Optional[Dict],
+        limit: int,
+        deadline: Optional[float]
+    ) -> List[Dict]:
+        """并发查询所有数据源 (search 的实际执行)"""
+        deadline = self.config.search_deadline_seconds if deadline is None else deadline
+        loop = asyncio.get_running_loop()
+        stop_at = loop.time() + deadline
+        
+        tasks = {
+            asyncio.ensure_future(
+                self._query_source(source, query, category, constraints, limit)
+            ): source.name
+            for source in self.sources.active()
+        }
+        report = {name: "pending" for name in tasks.values()}
+        merger = ResultMerger()
+        
+        pending = set(tasks)
+        while pending:
+            remaining = stop_at - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                status, results = task.result()
+                report[tasks[task]] = status
+                merger.add(tasks[task], results)
         
-        # 2. 如果有 API Key，尝试在线搜索
-        if self.api_keys["octopart"]:
-            api_results = await self._search_octopart(query, constraints, limit)
-            # 合并结果
-            return self._merge_results(db_results, api_results)
+        # 截止时间已到: 放弃仍未返回的数据源
+        for task in pending:
+            task.cancel()
+            report[tasks[task]] = "deadline"
+        if pending:
+            logger.info(f"Search deadline hit, skipped sources: "
+                        f"{[tasks[t] for t in pending]}")
         
-        return db_results
+        self.last_search_report = report
+        return merger.results(limit)
+    
+    async def _query_source(
+        self,
+        source: SearchSource,
+        query: str,
+        category: Optional[str],
+        constraints: Optional[Dict],
+        limit: int
+    ):
+        """查询单个数据源 (带单源超时与熔断)，返回 (状态, 结果)"""
+        timeout = source.timeout
+        if timeout is None:
+            timeout = self._source_timeout(source.name)
+        
+        try:
+            results = await get_guard(source.name, self.config).call(
+                lambda: source.search(query, category, constraints, limit),
+                timeout=timeout
+            )
+            return "ok", results or []
+        except CircuitOpenError:
+            return "open", []
+        except asyncio.TimeoutError:
+            logger.warning(f"Search source '{source.name}' timed out after {timeout}s")
+            return "timeout", []
+        except Exception as e:
+            logger.warning(f"Search source '{source.name}' failed: {e}")
+            return "error", []
+    
+    def _source_timeout(self, name: str) -> float:
+        """
+        单个数据源的超时 (秒)
+        
+        source_timeouts 中显式配置的优先；否则按该数据源近期 p99 延迟自适应，
+        样本不足时使用 source_timeout_seconds。
+        """
+        if name in self.config.source_timeouts:
+            return self.config.source_timeouts[name]
+        return self.timeout_policy.timeout(
+            get_guard(name, self.config).latency,
+            default=self.config.source_timeout_seconds
+        )
+    
+    def price_timeout(self) -> float:
+        """选型时单个器件比价的超时 (按近期比价延迟自适应)"""
+        return self.timeout_policy.timeout(
+            get_tracker("compare_prices"),
+            default=self.config.price_timeout_seconds
+        )
     
     async def _search_database(
         self,
@@ -84,16 +251,110 @@ class SearchEngine:
             print(f"数据库搜索失败: {e}")
             return []
     
-    async def _search_octopart(
+    async def _search_knowledge(
         self,
         query: str,
+        category: Optional[str],
+        constraints: Optional[Dict],
+        limit: int
+    ) -> List[Dict]:
+        """搜索本地知识库 (已导入的 datasheet)"""
+        from ..knowledge import get_vector_store
+        store = await get_vector_store(self.config)
+        
+        results = []
+        for entry in await store.search(query, limit=limit):
+            data = entry.get("data") or {}
+            r = {
+                "part_number": entry.get("part_number", ""),
+                "description": data.get("description", ""),
+                "manufacturer": data.get("manufacturer", ""),
+                "category": data.get("category", ""),
+                "specs": data.get("specs") or data.get("specifications") or {},
+                "prices": data.get("prices", []),
+                "source": "knowledge",
+            }
+            if not self._passes_filters(r, category, constraints):
+                continue
+            r["score"] = max(
+                self._calculate_score(r, query, constraints),
+                entry.get("relevance_score", 0.0)
+            )
+            results.append(r)
+        return results
+    
+    async def _search_jlc(
+        self,
+        query: str,
+        category: Optional[str],
         constraints: Optional[Dict],
         limit: int
     ) -> List[Dict]:
-        """Octopart API 搜索"""
-        # 模拟 Octopart API 响应
-        # 实际实现需要使用 httpx 调用真实 API
-        return []
+        """搜索嘉立创/立创商城热门目录"""
+        from ..jlc import search_jlc
+        
+        results = []
+        for part in search_jlc(query):
+            r = {
+                "part_number": part["type"],
+                "description": part.get("description", ""),
+                "manufacturer": part.get("manufacturer", ""),
+                "category": part.get("category", ""),
+                "specs": part.get("specs", {}),
+                "prices": [{
+                    "vendor": "LCSC",
+                    "price": part.get("price_10pcs"),
+                    "stock": part.get("stock", 0),
+                }],
+                "price": part.get("price_10pcs"),
+                "stock": part.get("stock", 0),
+                "jlc_part_number": part.get("jlc_part_number"),
+                "source": "jlc",
+            }
+            if not self._passes_filters(r, category, constraints):
+                continue
+            r["score"] = self._calculate_score(r, query, constraints)
+            results.append(r)
+        return results[:limit]
+    
+    def _vendor_search_fn(self, name: str):
+        """为电商平台连接器生成数据源搜索函数"""
+        async def search_vendor(
+            query: str,
+            category: Optional[str],
+            constraints: Optional[Dict],
+            limit: int
+        ) -> List[Dict]:
+            results = await self.vendors[name].search(query, limit=limit)
+            filtered = []
+            for r in results:
+                # 电商平台的分类体系与内置数据库不同，只按规格约束过滤
+                if not self._passes_filters(r, None, constraints):
+                    continue
+                r["score"] = self._calculate_score(r, query, constraints)
+                filtered.append(r)
+            return filtered
+        
+        return search_vendor
+    
+    @staticmethod
+    def _passes_filters(
+        result: Dict,
+        category: Optional[str],
+        constraints: Optional[Dict]
+    ) -> bool:
+        """分类/规格约束过滤 (缺失字段视为未知，不过滤)"""
+        if category and result.get("category"):
+            if result["category"].lower() != category.lower():
+                return False
+        
+        specs = result.get("specs") or {}
+        for key in ("voltage", "package"):
+            if constraints and constraints.get(key) and specs.get(key):
+                if constraints[key].upper() not in str(specs[key]).upper():
+                    return False
+        
+        return True
     
     def _calculate_score(
         self,
@@ -122,46 +383,83 @@ class SearchEngine:
         
         return min(score, 1.0)
     
-    def _merge_results(
-        self,
-        db_results: List[Dict],
-        api_results: List[Dict]
-    ) -> List[Dict]:
-        """合并搜索结果"""
-        combined = {r["part_number"]: r for r in db_results}
-        
-        for r in api_results:
-            pn = r["part_number"]
-            if pn in combined:
-                # 合并价格和库存信息
-                if r.get("price"):
-                    combined[pn]["price"] = r["price"]
-                if r.get("stock"):
-                    combined[pn]["stock"] = r["stock"]
-                combined[pn]["vendors"] = combined[pn].get("vendors", []) + r.get("vendors", [])
-            else:
-                r["source"] = "api"
-                combined[pn] = r
-        
-        return list(combined.values())[:20]
-    
     async def compare_prices(self, part_number: str) -> Dict:
-        """比价查询"""
+        """比价查询 (相同型号的并发查询合并为一次执行)"""
+        if not self.config.coalesce_requests:
+            return await self._timed_compare_prices(part_number)
+        
+        key = (self._flight_scope(), normalize_mpn(part_number))
+        result = await get_flight("compare_prices").do(
+            key, lambda: self._timed_compare_prices(part_number)
+        )
+        # 合并的调用方可能使用不同写法的型号，保留调用方自己的写法
+        result["part_number"] = part_number
+        return result
+    
+    async def _timed_compare_prices(self, part_number: str) -> Dict:
+        """比价并记录耗时 (被取消时按已等待时长记入，用于 price_timeout)"""
+        started = time.monotonic()
+        try:
+            return await self._compare_prices(part_number)
+        finally:
+            get_tracker("compare_prices").record(time.monotonic() - started)
+    
+    async def _compare_prices(self, part_number: str) -> Dict:
+        """比价查询 (实际执行): 内置数据库 + 各电商平台并发查询"""
+        prices: List[Dict] = []
+        
         # 从数据库获取价格
         try:
             price_data = db_get_price(part_number)
             if price_data and price_data.get("prices"):
-                return {
-                    "part_number": part_number,
-                    "prices": price_data["prices"],
-                    "best_price": price_data.get("best_price"),
-                    "best_vendor": price_data.get("best_vendor"),
-                    "total_stock": price_data.get("total_stock", 0)
-                }
+                prices.extend(price_data["prices"])
         except Exception as e:
             print(f"比价失败: {e}")
         
-        return {"part_number": part_number, "prices": [], "best_price": None, "total_stock": 0}
+        # 电商平台实时价格 (熔断中的平台直接跳过，不占用等待时间)
+        if self.vendors:
+            vendor_results = await asyncio.gather(*(
+                self._vendor_price(name, connector, part_number)
+                for name, connector in self.vendors.items()
+            ))
+            vendors = {p.get("vendor") for p in prices}
+            for result in vendor_results:
+                for p in result:
+                    if p.get("vendor") not in vendors:
+                        prices.append(p)
+                        vendors.add(p.get("vendor"))
+        
+        priced = [p for p in prices if p.get("price") is not None]
+        best = min(priced, key=lambda p: p["price"]) if priced else {}
+        return {
+            "part_number": part_number,
+            "prices": prices,
+            "best_price": best.get("price"),
+            "best_vendor": best.get("vendor"),
+            "total_stock": sum(p.get("stock", 0) or 0 for p in prices),
+        }
+    
+    async def _vendor_price(
+        self,
+        name: str,
+        connector: VendorConnector,
+        part_number: str
+    ) -> List[Dict]:
+        """查询单个电商平台的价格 (经熔断器)，失败时返回空列表"""
+        try:
+            result = await get_guard(name, self.config).call(
+                lambda: connector.get_price(part_number),
+                timeout=self._source_timeout(name)
+            )
+            return result.get("prices", [])
+        except CircuitOpenError:
+            return []
+        except asyncio.TimeoutError:
+            logger.warning(f"Price lookup on '{name}' timed out for {part_number}")
+            return []
+        except Exception as e:
+            logger.warning(f"Price lookup on '{name}' failed for {part_number}: {e}")
+            return []
     
     async def get_alternatives(self, part_number: str) -> List[Dict]:
         """获取替代料"""
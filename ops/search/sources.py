@@ -0,0 +1,139 @@
+"""
+🔌 搜索数据源注册表与结果合并
+Search Source Registry & Incremental Result Merging
+
+SearchEngine 把内置数据库、知识库、嘉立创目录以及各电商平台连接器都注册为
+数据源，并发查询、按到达顺序增量合并，截止时间一到即返回已到达的结果。
+"""
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+from dataclasses import dataclass
+import logging
+
+from ..utils import normalize_mpn
+
+logger = logging.getLogger(__name__)
+
+# (query, category, constraints, limit) -> 结果列表
+SourceSearchFn = Callable[[str, Optional[str], Optional[Dict], int], Awaitable[List[Dict]]]
+
+
+@dataclass
+class SearchSource:
+    """
+    搜索数据源
+
+    Attributes:
+        name: 数据源名称 (database/knowledge/jlc/octopart/...)
+        search: 异步搜索函数
+        timeout: 单源超时 (秒)，None 表示使用引擎默认值
+        enabled: 是否参与查询
+    """
+    name: str
+    search: SourceSearchFn
+    timeout: Optional[float] = None
+    enabled: bool = True
+
+
+class SourceRegistry:
+    """数据源注册表 (保持注册顺序)"""
+
+    def __init__(self):
+        self._sources: Dict[str, SearchSource] = {}
+
+    def register(self, source: SearchSource) -> None:
+        """注册 (或替换) 数据源"""
+        self._sources[source.name] = source
+
+    def unregister(self, name: str) -> Optional[SearchSource]:
+        """移除数据源"""
+        return self._sources.pop(name, None)
+
+    def get(self, name: str) -> Optional[SearchSource]:
+        return self._sources.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._sources)
+
+    def active(self) -> List[SearchSource]:
+        """已启用的数据源"""
+        return [s for s in self._sources.values() if s.enabled]
+
+    def __iter__(self) -> Iterator[SearchSource]:
+        return iter(self._sources.values())
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+
+class ResultMerger:
+    """
+    增量结果合并器
+
+    按规范化型号 (normalize_mpn) 去重；同一型号以分数更高的记录为主，
+    其余记录补充缺失字段，并合并各来源的价格/库存。
+    """
+
+    def __init__(self):
+        self._merged: Dict[str, Dict] = {}
+
+    def add(self, source: str, results: List[Dict]) -> int:
+        """合并一个数据源的结果，返回新增型号数"""
+        added = 0
+        for result in results:
+            key = normalize_mpn(result.get("part_number", ""))
+            if not key:
+                continue
+
+            incoming = dict(result)
+            incoming.setdefault("source", source)
+            incoming["sources"] = [incoming["source"]]
+
+            existing = self._merged.get(key)
+            if existing is None:
+                self._merged[key] = incoming
+                added += 1
+            else:
+                self._merged[key] = self._combine(existing, incoming)
+        return added
+
+    @staticmethod
+    def _combine(existing: Dict, incoming: Dict) -> Dict:
+        """合并同一型号的两条记录"""
+        if incoming.get("score", 0.0) > existing.get("score", 0.0):
+            primary, secondary = incoming, existing
+        else:
+            primary, secondary = existing, incoming
+
+        merged = dict(primary)
+        for key, value in secondary.items():
+            if merged.get(key) in (None, "", [], {}) and value not in (None, "", [], {}):
+                merged[key] = value
+
+        # 价格按供应商合并 (同一供应商保留主记录的报价)
+        prices = list(primary.get("prices") or [])
+        vendors = {p.get("vendor") for p in prices}
+        for p in secondary.get("prices") or []:
+            if p.get("vendor") not in vendors:
+                prices.append(p)
+                vendors.add(p.get("vendor"))
+        merged["prices"] = prices
+
+        priced = [p["price"] for p in prices if p.get("price") is not None]
+        if priced:
+            merged["price"] = min(priced)
+        if prices:
+            merged["stock"] = sum(p.get("stock", 0) or 0 for p in prices)
+
+        merged["sources"] = primary["sources"] + [
+            s for s in secondary["sources"] if s not in primary["sources"]
+        ]
+        merged["score"] = max(primary.get("score", 0.0), secondary.get("score", 0.0))
+        return merged
+
+    def results(self, limit: Optional[int] = None) -> List[Dict]:
+        """按分数降序返回合并结果"""
+        ordered = sorted(self._merged.values(), key=lambda r: r.get("score", 0.0), reverse=True)
+        return ordered[:limit] if limit is not None else ordered
+
+    def __len__(self) -> int:
+        return len(self._merged)
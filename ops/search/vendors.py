@@ -0,0 +1,368 @@
+"""
+🌐 电商平台连接器
+Vendor API Connectors (Octopart/Nexar, Digi-Key, Mouser, LCSC)
+
+所有连接器共享进程级 HTTP 连接池 (ops.http_pool) 和按平台的自适应
+限流器 (ops.ratelimit)，并把各平台的响应
+统一规范为与内置数据库一致的结构:
+
+    {
+        "part_number": "STM32F103C8T6",
+        "description": "...",
+        "manufacturer": "STMicroelectronics",
+        "category": "...",
+        "specs": {},
+        "prices": [{"vendor": "Mouser", "price": 1.23, "stock": 1000, "currency": "USD"}],
+        "price": 1.23,
+        "stock": 1000,
+        "datasheet_url": "...",
+        "source": "mouser",
+    }
+"""
+from typing import Any, Dict, List, Optional
+from abc import ABC, abstractmethod
+import logging
+import re
+
+from ..config import Config
+from ..http_pool import HTTPPool, get_http_pool
+from ..ratelimit import AdaptiveLimiter, get_limiter
+from ..utils import normalize_mpn
+
+logger = logging.getLogger(__name__)
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """解析价格字符串，如 "$1.23"、"¥0,85"、"1.234,50 €"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = re.sub(r"[^\d.,]", "", str(value))
+    if not text:
+        return None
+    if "," in text and "." in text:
+        # 最后出现的分隔符为小数点
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    elif "," in text:
+        text = text.replace(",", ".")
+
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_stock(value: Any) -> int:
+    """解析库存数量，如 "12,345 In Stock" """
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    digits = re.sub(r"[^\d]", "", str(value))
+    return int(digits) if digits else 0
+
+
+class VendorConnector(ABC):
+    """电商平台连接器基类"""
+
+    name: str = ""
+    vendor: str = ""
+    BASE_URL: str = ""
+
+    def __init__(
+        self,
+        api_key: str = "",
+        base_url: Optional[str] = None,
+        pool: Optional[HTTPPool] = None,
+        timeout: Optional[float] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.pool = pool
+        self.timeout = timeout
+        self.limiter = limiter
+
+    @property
+    def enabled(self) -> bool:
+        """配置了 API Key 才启用"""
+        return bool(self.api_key)
+
+    def _pool(self) -> HTTPPool:
+        return self.pool or get_http_pool()
+
+    def _limiter(self) -> AdaptiveLimiter:
+        return self.limiter or get_limiter(self.name)
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        """发送请求并返回 JSON (连接池启用缓存时走磁盘响应缓存)"""
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        response = await self._pool().cached_request(
+            method, f"{self.base_url}{path}", limiter=self._limiter(), **kwargs
+        )
+        response.raise_for_status()
+        return response.json()
+
+    @abstractmethod
+    async def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """关键词搜索"""
+        pass
+
+    async def get_price(self, part_number: str) -> Dict:
+        """
+        查询指定型号的价格与库存
+
+        Returns:
+            {"part_number", "prices", "best_price", "best_vendor", "total_stock"}
+        """
+        target = normalize_mpn(part_number)
+        results = await self.search(part_number, limit=5)
+        prices = []
+        for r in results:
+            if normalize_mpn(r.get("part_number", "")) == target:
+                prices.extend(r.get("prices", []))
+
+        priced = [p for p in prices if p.get("price") is not None]
+        best = min(priced, key=lambda p: p["price"]) if priced else {}
+        return {
+            "part_number": part_number,
+            "prices": prices,
+            "best_price": best.get("price"),
+            "best_vendor": best.get("vendor"),
+            "total_stock": sum(p.get("stock", 0) for p in prices),
+        }
+
+    def _part(
+        self,
+        part_number: str,
+        manufacturer: str = "",
+        description: str = "",
+        category: str = "",
+        prices: Optional[List[Dict]] = None,
+        datasheet_url: Optional[str] = None,
+        specs: Optional[Dict] = None,
+    ) -> Dict:
+        """构造统一格式的器件结果"""
+        prices = prices or []
+        priced = [p["price"] for p in prices if p.get("price") is not None]
+        return {
+            "part_number": part_number,
+            "description": description or "",
+            "manufacturer": manufacturer or "",
+            "category": category or "",
+            "specs": specs or {},
+            "prices": prices,
+            "price": min(priced) if priced else None,
+            "stock": sum(p.get("stock", 0) for p in prices),
+            "datasheet_url": datasheet_url,
+            "source": self.name,
+        }
+
+
+class OctopartConnector(VendorConnector):
+    """Octopart (Nexar GraphQL API) 连接器"""
+
+    name = "octopart"
+    vendor = "Octopart"
+    BASE_URL = "https://api.nexar.com"
+
+    SEARCH_QUERY = """
+    query Search($q: String!, $limit: Int!) {
+      supSearch(q: $q, limit: $limit) {
+        results {
+          part {
+            mpn
+            shortDescription
+            manufacturer { name }
+            category { name }
+            bestDatasheet { url }
+            sellers {
+              company { name }
+              offers {
+                inventoryLevel
+                prices { quantity price currency }
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+
+    async def search(self, query: str, limit: int = 10) -> List[Dict]:
+        data = await self._request(
+            "POST", "/graphql",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={"query": self.SEARCH_QUERY, "variables": {"q": query, "limit": limit}},
+        )
+        results = ((data.get("data") or {}).get("supSearch") or {}).get("results") or []
+
+        parts = []
+        for item in results[:limit]:
+            part = item.get("part") or {}
+            prices = []
+            for seller in part.get("sellers") or []:
+                company = (seller.get("company") or {}).get("name", "")
+                for offer in seller.get("offers") or []:
+                    breaks = sorted(offer.get("prices") or [], key=lambda p: p.get("quantity", 0))
+                    if not breaks:
+                        continue
+                    prices.append({
+                        "vendor": company,
+                        "price": parse_price(breaks[0].get("price")),
+                        "stock": parse_stock(offer.get("inventoryLevel")),
+                        "currency": breaks[0].get("currency", "USD"),
+                    })
+            parts.append(self._part(
+                part_number=part.get("mpn", ""),
+                manufacturer=(part.get("manufacturer") or {}).get("name", ""),
+                description=part.get("shortDescription", ""),
+                category=(part.get("category") or {}).get("name", ""),
+                prices=prices,
+                datasheet_url=(part.get("bestDatasheet") or {}).get("url"),
+            ))
+        return parts
+
+
+class DigiKeyConnector(VendorConnector):
+    """Digi-Key Product Information API v4 连接器"""
+
+    name = "digikey"
+    vendor = "Digi-Key"
+    BASE_URL = "https://api.digikey.com"
+
+    def __init__(self, api_key: str = "", client_id: str = "", **kwargs: Any):
+        super().__init__(api_key, **kwargs)
+        self.client_id = client_id
+
+    async def search(self, query: str, limit: int = 10) -> List[Dict]:
+        data = await self._request(
+            "POST", "/products/v4/search/keyword",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "X-DIGIKEY-Client-Id": self.client_id,
+            },
+            json={"Keywords": query, "Limit": limit},
+        )
+
+        parts = []
+        for product in (data.get("Products") or [])[:limit]:
+            description = product.get("Description") or {}
+            parts.append(self._part(
+                part_number=product.get("ManufacturerProductNumber", ""),
+                manufacturer=(product.get("Manufacturer") or {}).get("Name", ""),
+                description=description.get("ProductDescription", "")
+                if isinstance(description, dict) else str(description),
+                category=(product.get("Category") or {}).get("Name", ""),
+                prices=[{
+                    "vendor": self.vendor,
+                    "price": parse_price(product.get("UnitPrice")),
+                    "stock": parse_stock(product.get("QuantityAvailable")),
+                    "currency": "USD",
+                }],
+                datasheet_url=product.get("DatasheetUrl"),
+            ))
+        return parts
+
+
+class MouserConnector(VendorConnector):
+    """Mouser Search API v1 连接器"""
+
+    name = "mouser"
+    vendor = "Mouser"
+    BASE_URL = "https://api.mouser.com"
+
+    async def search(self, query: str, limit: int = 10) -> List[Dict]:
+        data = await self._request(
+            "POST", "/api/v1/search/keyword",
+            params={"apiKey": self.api_key},
+            json={"SearchByKeywordRequest": {
+                "keyword": query,
+                "records": limit,
+                "startingRecord": 0,
+            }},
+        )
+        if data.get("Errors"):
+            logger.warning(f"Mouser API errors: {data['Errors']}")
+
+        parts = []
+        for product in ((data.get("SearchResults") or {}).get("Parts") or [])[:limit]:
+            breaks = product.get("PriceBreaks") or []
+            first = breaks[0] if breaks else {}
+            stock = product.get("AvailabilityInStock") or product.get("Availability")
+            parts.append(self._part(
+                part_number=product.get("ManufacturerPartNumber", ""),
+                manufacturer=product.get("Manufacturer", ""),
+                description=product.get("Description", ""),
+                category=product.get("Category", ""),
+                prices=[{
+                    "vendor": self.vendor,
+                    "price": parse_price(first.get("Price")),
+                    "stock": parse_stock(stock),
+                    "currency": first.get("Currency", "USD"),
+                }],
+                datasheet_url=product.get("DataSheetUrl"),
+            ))
+        return parts
+
+
+class LCSCConnector(VendorConnector):
+    """立创商城 (LCSC) 开放接口连接器"""
+
+    name = "lcsc"
+    vendor = "LCSC"
+    BASE_URL = "https://api.lcsc.com"
+
+    async def search(self, query: str, limit: int = 10) -> List[Dict]:
+        data = await self._request(
+            "GET", "/v1/products/search",
+            params={"keyword": query, "limit": limit, "key": self.api_key},
+        )
+        result = data.get("result") or {}
+        products = result.get("productList") or result.get("products") or []
+
+        parts = []
+        for product in products[:limit]:
+            ladders = sorted(
+                product.get("productPriceList") or [],
+                key=lambda p: p.get("ladder", 0),
+            )
+            first = ladders[0] if ladders else {}
+            parts.append(self._part(
+                part_number=product.get("productModel", ""),
+                manufacturer=product.get("brandNameEn", ""),
+                description=product.get("productIntroEn", ""),
+                category=product.get("catalogName", ""),
+                prices=[{
+                    "vendor": self.vendor,
+                    "price": parse_price(first.get("productPrice")),
+                    "stock": parse_stock(product.get("stockNumber")),
+                    "currency": first.get("currencySymbol", "CNY"),
+                    "lcsc_code": product.get("productCode"),
+                }],
+                datasheet_url=product.get("pdfUrl"),
+            ))
+        return parts
+
+
+def build_connectors(
+    config: Config,
+    pool: Optional[HTTPPool] = None,
+) -> Dict[str, VendorConnector]:
+    """根据配置创建已启用 (有 API Key) 的连接器"""
+    keys = config.api_keys
+    # 启用自适应超时时交由连接池按主机延迟计算
+    timeout = None if config.adaptive_timeouts else float(config.timeout_seconds)
+    connectors = [
+        OctopartConnector(keys.octopart, pool=pool, timeout=timeout),
+        DigiKeyConnector(keys.digikey, client_id=keys.digikey_client_id, pool=pool, timeout=timeout),
+        MouserConnector(keys.mouser, pool=pool, timeout=timeout),
+        LCSCConnector(keys.lcsc, pool=pool, timeout=timeout),
+    ]
+    return {c.name: c for c in connectors if c.enabled}
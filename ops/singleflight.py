@@ -0,0 +1,113 @@
+"""
+请求合并模块 (single-flight)
+
+同一时刻对同一 key 的并发调用只执行一次，其余调用共享同一个进行中的 future。
+热门器件 (STM32F103C8T6、AMS1117、CH340...) 在流量高峰时会被大量请求同时
+搜索/比价，合并后可直接减少电商平台配额消耗和 CPU 开销。
+
+示例:
+    >>> flight = get_flight("compare_prices")
+    >>> await flight.do(("STM32F103C8T6",), lambda: engine._compare_prices(pn))
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+import asyncio
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    """一次进行中的共享执行"""
+
+    __slots__ = ("task", "followers", "snapshot")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.followers = 0
+        self.snapshot = None
+
+
+class SingleFlight:
+    """
+    single-flight 合并组
+
+    - 共享的执行在独立任务中运行，某个调用方被取消 (如超时) 不影响其他调用方
+    - 有调用被合并时，每个调用方拿到结果的独立深拷贝，避免互相修改
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._inflight: Dict[Tuple[int, Hashable], _Call] = {}
+        self.calls = 0        # 总调用数
+        self.executions = 0   # 实际执行次数
+        self.coalesced = 0    # 被合并的调用数
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """执行 fn，若同 key 已有进行中的调用则等待其结果"""
+        self.calls += 1
+        # future 绑定事件循环，key 中带上循环 id
+        flight_key = (id(asyncio.get_running_loop()), key)
+
+        call = self._inflight.get(flight_key)
+        if call is not None:
+            self.coalesced += 1
+            call.followers += 1
+            await asyncio.shield(call.task)
+            return copy.deepcopy(call.snapshot)
+
+        self.executions += 1
+        call = _Call(asyncio.ensure_future(fn()))
+        self._inflight[flight_key] = call
+        # 先于任何调用方恢复执行，冻结一份结果快照
+        call.task.add_done_callback(lambda task: self._finish(flight_key, call))
+
+        result = await asyncio.shield(call.task)
+        if call.followers:
+            return copy.deepcopy(call.snapshot)
+        return result
+
+    def _finish(self, flight_key: Tuple[int, Hashable], call: _Call) -> None:
+        self._inflight.pop(flight_key, None)
+        task = call.task
+        if task.cancelled():
+            return
+        # 取出异常，避免所有调用方都已取消时出现 "never retrieved" 警告
+        if task.exception() is None and call.followers:
+            call.snapshot = copy.deepcopy(task.result())
+
+    def inflight(self) -> int:
+        """进行中的调用数"""
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        """合并计数"""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "inflight": self.inflight(),
+        }
+
+    def reset_stats(self) -> None:
+        """清零计数"""
+        self.calls = self.executions = self.coalesced = 0
+
+
+# 进程级合并组 (跨 SearchEngine 实例共享)
+_FLIGHTS: Dict[str, SingleFlight] = {}
+
+
+def get_flight(name: str) -> SingleFlight:
+    """获取 (或创建) 指定名称的进程级合并组"""
+    flight = _FLIGHTS.get(name)
+    if flight is None:
+        flight = _FLIGHTS[name] = SingleFlight(name)
+    return flight
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    """全部合并组的计数"""
+    return {name: flight.stats() for name, flight in _FLIGHTS.items()}
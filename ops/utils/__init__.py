@@ -138,6 +138,17 @@ def parse_resistance(resistance_str: str) -> Dict[str, Any]:
     return {"value": 0.0, "unit": "Ω", "ohms": 0.0}
 
 
+def normalize_mpn(part_number: str) -> str:
+    """
+    规范化制造商型号 (MPN)，用于跨数据源去重
+    
+    忽略大小写、空白和常见分隔符，如 "ams1117-3.3" 与 "AMS1117 3.3" 视为同一型号
+    """
+    if not part_number:
+        return ""
+    return re.sub(r"[\s\-_/,]+", "", part_number).upper()
+
+
 def celsius_to_fahrenheit(celsius: float) -> float:
     """摄氏转华氏"""
     return celsius * 9/5 + 32
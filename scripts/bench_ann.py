@@ -0,0 +1,94 @@
+"""
+📊 ANN 召回率基准 - IVF 近似搜索 vs 精确搜索
+
+使用方法:
+  python scripts/bench_ann.py                       # 合成数据 (10 万条 128 维)
+  python scripts/bench_ann.py --size 1000000        # 更大规模
+  python scripts/bench_ann.py --store ./data/vector_store   # 使用已有知识库的向量
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ops.knowledge.ivf import IVFIndex, recall_at_k  # noqa: E402
+from ops.knowledge.matrix import EmbeddingMatrix, normalize_rows  # noqa: E402
+
+
+def synthetic(size, dim, clusters, seed=0):
+    """生成带簇结构的归一化向量 (接近真实 datasheet 向量的分布)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, size)] + 0.3 * rng.normal(size=(size, dim))
+    return normalize_rows(vectors)
+
+
+def load_store(path):
+    """读取知识库中的向量 (向量文件 + 日志中的增量)"""
+    import asyncio
+    from ops.config import Config
+    from ops.knowledge import VectorStore
+
+    async def read():
+        store = VectorStore(Config(vector_store_path=path, vector_index="flat"))
+        await store.initialize()
+        keys = store.embeddings.keys
+        return keys, store.embeddings.vectors(keys)
+
+    return asyncio.run(read())
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF recall/latency benchmark")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--store", help="使用已有知识库目录中的向量")
+    args = parser.parse_args()
+
+    if args.store:
+        keys, vectors = load_store(args.store)
+    else:
+        vectors = synthetic(args.size, args.dim, clusters=max(10, args.size // 500))
+        keys = [f"P{i}" for i in range(len(vectors))]
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)]
+    queries = normalize_rows(queries + 0.05 * rng.normal(size=queries.shape))
+
+    print(f"📦 {len(vectors)} 条向量, {vectors.shape[1]} 维, {len(queries)} 个查询, top-{args.top_k}")
+
+    exact = EmbeddingMatrix()
+    exact.set_many(zip(keys, vectors))
+    truth, flat_time = timed(
+        lambda: [exact.search(q, args.top_k) for q in queries], 1)
+    print(f"🎯 精确搜索: {flat_time / len(queries) * 1000:.3f} ms/查询")
+
+    started = time.perf_counter()
+    ivf = IVFIndex.train(vectors, nlist=args.nlist or None)
+    ivf.add(keys, vectors)
+    print(f"🔧 训练 + 构建: {time.perf_counter() - started:.1f} s, nlist={ivf.nlist}")
+
+    print(f"{'nprobe':>8} {'recall':>8} {'ms/查询':>10}")
+    for nprobe in (1, 2, 4, 8, 16, 32, 64):
+        if nprobe > ivf.nlist:
+            break
+        found, elapsed = timed(
+            lambda: [ivf.search(q, args.top_k, nprobe=nprobe) for q in queries], 1)
+        print(f"{nprobe:>8} {recall_at_k(truth, found):>8.3f} {elapsed / len(queries) * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -40,11 +40,15 @@ setup(
         "pyyaml>=6.0",
         "pydantic>=2.0.0",
         "loguru>=0.7.0",
+        "numpy>=1.24.0",
     ],
     extras_require={
         "gui": [
             "streamlit>=1.28.0",
         ],
+        "http2": [
+            "h2>=4.0.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
@@ -0,0 +1,92 @@
+"""
+测试公共 fixture
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    本地桩服务器 - 模拟电商平台 API
+
+    routes: {(method, path): handler}
+        handler 为 (status, headers, body) 元组，或接收请求记录并返回该元组的函数；
+        body 为 dict/list 时按 JSON 返回
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.routes = {}
+        self.requests = []
+        self.connections = set()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """桩服务器请求处理器 (HTTP/1.1 keep-alive)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        record = {
+            "method": self.command,
+            "path": parts.path,
+            "query": {k: v[0] for k, v in parse_qs(parts.query).items()},
+            "headers": dict(self.headers),
+            "body": json.loads(raw) if raw else None,
+        }
+        with self.server.lock:
+            self.server.requests.append(record)
+            self.server.connections.add(self.client_address)
+
+        handler = self.server.routes.get((self.command, parts.path))
+        if handler is None:
+            status, headers, body = 404, {}, {"error": "not found"}
+        else:
+            status, headers, body = handler(record) if callable(handler) else handler
+
+        if isinstance(body, (dict, list)):
+            payload = json.dumps(body).encode("utf-8")
+            headers = {"Content-Type": "application/json", **headers}
+        elif isinstance(body, str):
+            payload = body.encode("utf-8")
+        else:
+            payload = body or b""
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+@pytest.fixture
+def stub_server():
+    """启动本地桩服务器"""
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,10 @@
+"""
+集成测试公共 fixture
+"""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(tmp_path, monkeypatch):
+    """默认配置的知识库与缓存路径 (./data/...) 指向临时目录，不写入仓库工作区"""
+    monkeypatch.chdir(tmp_path)
@@ -10,10 +10,10 @@ class TestAgent:
     """Agent 测试类"""
     
     @pytest.fixture
-    def config(self):
-        """创建测试配置"""
+    def config(self, tmp_path):
+        """创建测试配置 (知识库与缓存写入临时目录)"""
         from ops.config import Config
-        return Config()
+        return Config(vector_store_path=str(tmp_path / "vs"), cache_dir=str(tmp_path / "cache"))
     
     @pytest.fixture
     def agent(self, config):
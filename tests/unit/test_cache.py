@@ -0,0 +1,168 @@
+"""
+单元测试 - 磁盘 HTTP 响应缓存
+"""
+import httpx
+import pytest
+
+from ops.cache import CacheRegistry, CachedResponse, ResponseCache
+from ops.http_pool import HTTPPool
+
+
+def make_response(url="http://example.com/a", body=b"hello", **headers):
+    return CachedResponse(url=url, status_code=200, headers=headers, content=body)
+
+
+class TestResponseCache:
+    """ResponseCache 测试"""
+
+    def test_put_and_get(self, tmp_path):
+        """测试写入后读取，落盘 URL 去掉查询串"""
+        cache = ResponseCache(str(tmp_path / "c.sqlite"))
+        key = cache.make_key("GET", "http://example.com/a?apiKey=SECRET")
+        cache.put(key, make_response(url="http://example.com/a?apiKey=SECRET", etag='"v1"'))
+
+        entry = cache.get(key)
+
+        assert entry.content == b"hello"
+        assert entry.etag == '"v1"'
+        assert entry.from_cache
+        assert "SECRET" not in entry.url
+        assert cache.is_fresh(entry)
+
+    def test_persists_across_instances(self, tmp_path):
+        """测试缓存持久化到磁盘"""
+        path = str(tmp_path / "c.sqlite")
+        key = ResponseCache.make_key("POST", "http://example.com/s", body={"q": "LM358"})
+        ResponseCache(path).put(key, make_response())
+
+        assert ResponseCache(path).get(key).text == "hello"
+
+    def test_key_depends_on_body_and_params(self):
+        base = ResponseCache.make_key("POST", "http://x/s", body={"q": "A"})
+        assert base == ResponseCache.make_key("post", "http://x/s", body={"q": "A"})
+        assert base != ResponseCache.make_key("POST", "http://x/s", body={"q": "B"})
+        assert base != ResponseCache.make_key("POST", "http://x/s", {"p": 1}, {"q": "A"})
+
+    def test_freshness_windows(self, tmp_path):
+        """测试 TTL 与 stale-while-revalidate 窗口"""
+        cache = ResponseCache(str(tmp_path / "c.sqlite"), ttl_seconds=10, stale_seconds=10)
+        entry = make_response()
+
+        entry.stored_at -= 5
+        assert cache.is_fresh(entry)
+        entry.stored_at -= 10
+        assert not cache.is_fresh(entry) and cache.is_servable_stale(entry)
+        entry.stored_at -= 10
+        assert not cache.is_servable_stale(entry)
+
+    def test_raise_for_status_matches_httpx(self):
+        response = CachedResponse(url="http://example.com/a", status_code=503, headers={}, content=b"")
+        with pytest.raises(httpx.HTTPStatusError) as excinfo:
+            response.raise_for_status()
+        assert excinfo.value.response.status_code == 503
+        assert str(excinfo.value.request.url) == "http://example.com/a"
+        make_response().raise_for_status()
+
+    def test_lru_eviction(self, tmp_path):
+        """测试超出大小上限时淘汰最久未访问的条目"""
+        cache = ResponseCache(str(tmp_path / "c.sqlite"), max_bytes=250)
+        for name in ("a", "b"):
+            cache.put(name, make_response(body=b"x" * 100))
+        cache.get("a")  # a 变为最近访问
+        cache.put("c", make_response(body=b"x" * 100))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.size_bytes() <= 250
+        assert cache.stats()["evictions"] == 1
+
+    def test_registry_shares_instances(self, tmp_path):
+        """测试注册表按路径复用实例并汇总统计"""
+        registry = CacheRegistry()
+        path = str(tmp_path / "c.sqlite")
+        cache = registry.get(path, lambda: ResponseCache(path))
+        cache.put("a", make_response())
+
+        assert registry.get(path, lambda: pytest.fail("不应重复创建")) is cache
+        assert registry.stats()[path]["entries"] == 1
+
+
+class TestCachedRequest:
+    """HTTPPool.cached_request 测试"""
+
+    @pytest.mark.asyncio
+    async def test_fresh_hit_skips_network(self, tmp_path, stub_server):
+        stub_server.routes[("GET", "/ds")] = (200, {"ETag": '"v1"'}, "datasheet")
+        pool = HTTPPool(cache=ResponseCache(str(tmp_path / "c.sqlite")))
+
+        first = await pool.cached_request("GET", f"{stub_server.url}/ds")
+        second = await pool.cached_request("GET", f"{stub_server.url}/ds")
+        await pool.aclose()
+
+        assert first.text == second.text == "datasheet"
+        assert second.from_cache
+        assert len(stub_server.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_revalidates_with_etag(self, tmp_path, stub_server):
+        """测试过期后发送条件请求，304 时复用缓存"""
+        def handler(record):
+            if record["headers"].get("If-None-Match") == '"v1"':
+                return 304, {"ETag": '"v1"'}, b""
+            return 200, {"ETag": '"v1"'}, "datasheet"
+
+        stub_server.routes[("GET", "/ds")] = handler
+        cache = ResponseCache(str(tmp_path / "c.sqlite"), ttl_seconds=0, stale_seconds=0)
+        pool = HTTPPool(cache=cache)
+
+        await pool.cached_request("GET", f"{stub_server.url}/ds")
+        revalidated = await pool.cached_request("GET", f"{stub_server.url}/ds")
+        await pool.aclose()
+
+        assert revalidated.text == "datasheet"
+        assert revalidated.from_cache
+        assert stub_server.requests[1]["headers"]["If-None-Match"] == '"v1"'
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self, tmp_path, stub_server):
+        """测试窗口内先返回旧响应，后台刷新缓存"""
+        versions = iter(["v1", "v2"])
+        stub_server.routes[("GET", "/ds")] = lambda record: (200, {}, next(versions))
+        cache = ResponseCache(str(tmp_path / "c.sqlite"), ttl_seconds=0, stale_seconds=3600)
+        pool = HTTPPool(cache=cache)
+        url = f"{stub_server.url}/ds"
+
+        await pool.cached_request("GET", url)
+        stale = await pool.cached_request("GET", url)
+        await pool.aclose()  # 等待后台重新验证完成
+
+        assert stale.text == "v1"
+        assert cache.get(cache.make_key("GET", url)).text == "v2"
+
+    @pytest.mark.asyncio
+    async def test_errors_not_cached(self, tmp_path, stub_server):
+        stub_server.routes[("GET", "/ds")] = (500, {}, "error")
+        pool = HTTPPool(cache=ResponseCache(str(tmp_path / "c.sqlite")))
+
+        await pool.cached_request("GET", f"{stub_server.url}/ds")
+        response = await pool.cached_request("GET", f"{stub_server.url}/ds")
+        await pool.aclose()
+
+        assert response.status_code == 500
+        assert len(stub_server.requests) == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("status", [429, 503])
+    async def test_stale_if_error_status(self, tmp_path, stub_server, status):
+        """测试过期后遇到 429/5xx 时返回旧缓存"""
+        responses = iter([(200, {}, "v1"), (status, {}, "busy")])
+        stub_server.routes[("GET", "/ds")] = lambda record: next(responses)
+        cache = ResponseCache(str(tmp_path / "c.sqlite"), ttl_seconds=0, stale_seconds=0)
+        pool = HTTPPool(cache=cache)
+
+        await pool.cached_request("GET", f"{stub_server.url}/ds")
+        response = await pool.cached_request("GET", f"{stub_server.url}/ds")
+        await pool.aclose()
+
+        assert response.status_code == 200 and response.text == "v1"
+        assert len(stub_server.requests) == 2
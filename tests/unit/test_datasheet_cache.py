@@ -0,0 +1,85 @@
+"""
+单元测试 - Datasheet 解析结果缓存
+"""
+import pytest
+
+from ops.config import Config
+from ops.parser import PARSER_VERSION, DatasheetParser
+from ops.parser.cache import DatasheetCache, file_hash, get_datasheet_cache
+
+TEXT = "STM32F103 microcontroller, package: LQFP-48, 2.0-3.6V supply"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DatasheetCache(str(tmp_path / "datasheets.sqlite"), max_bytes=10_000)
+    yield cache
+    cache.close()
+
+
+class TestDatasheetCache:
+    """DatasheetCache 测试"""
+
+    def test_round_trip(self, cache):
+        cache.put("h1", "1", {"part_number": "LM358"}, ["page 1", "page 2"])
+        assert cache.get("h1", "1") == ({"part_number": "LM358"}, ["page 1", "page 2"])
+        assert cache.get("h1", "2") is None
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    def test_lru_eviction(self, cache):
+        for i in range(3):
+            cache.put(f"h{i}", "1", {}, ["x" * 3000])
+        cache.get("h0", "1")
+        cache.put("h3", "1", {}, ["x" * 3000])
+
+        assert cache.get("h1", "1") is None
+        assert cache.get("h0", "1") is not None
+        assert cache.size_bytes() <= cache.max_bytes
+        assert cache.stats()["evictions"] >= 1
+
+    def test_prune_old_versions(self, cache):
+        cache.put("h", "1", {}, [])
+        cache.put("h", "2", {}, [])
+        assert cache.prune("2") == 1
+        assert cache.get("h", "2") is not None
+
+    def test_disabled(self, tmp_path):
+        assert get_datasheet_cache(Config(cache_dir=str(tmp_path), datasheet_cache_mb=0)) is None
+
+
+class TestParserCache:
+    """DatasheetParser 先查缓存"""
+
+    @pytest.fixture
+    def config(self, tmp_path):
+        return Config(cache_dir=str(tmp_path / "cache"))
+
+    @pytest.mark.asyncio
+    async def test_same_content_parsed_once(self, config, tmp_path, monkeypatch):
+        first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+        first.write_text(TEXT, encoding="utf-8")
+        second.write_text(TEXT, encoding="utf-8")
+        parser = DatasheetParser(config)
+
+        result = await parser.parse_file(str(first))
+        assert result.part_number == "STM32F103"
+
+        def fail(pages):
+            raise AssertionError("cache miss")
+
+        monkeypatch.setattr("ops.parser.extract_pages", fail)
+        assert await parser.parse_file(str(second)) == result
+        assert await parser.parse_text(TEXT) == result
+
+        cached = get_datasheet_cache(config).get(file_hash(TEXT.encode("utf-8")), PARSER_VERSION)
+        assert cached[1] == [TEXT]
+
+    @pytest.mark.asyncio
+    async def test_changed_content_is_reparsed(self, config, tmp_path):
+        path = tmp_path / "ds.txt"
+        path.write_text(TEXT, encoding="utf-8")
+        parser = DatasheetParser(config)
+        assert (await parser.parse_file(str(path))).package == "LQFP-48"
+
+        path.write_text(TEXT.replace("LQFP-48", "SOP-8"), encoding="utf-8")
+        assert (await parser.parse_file(str(path))).package == "SOP-8"
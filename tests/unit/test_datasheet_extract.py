@@ -0,0 +1,89 @@
+"""
+单元测试 - Datasheet 逐页参数提取
+"""
+from ops.parser.extract import DatasheetExtractor, ExtractionEngine, extract_pages
+
+COMPLETE_PAGE = (
+    "STM32F103 mainstream performance line microcontroller\n"
+    "www.st.com  package: LQFP-48\n"
+    "supply 2.0-3.6V, output 25mA, operating -40°C to 85°C"
+)
+
+
+def pages_then_fail(pages):
+    yield from pages
+    raise AssertionError("read past the last needed page")
+
+
+class TestDatasheetExtractor:
+    """DatasheetExtractor 测试"""
+
+    def test_single_page_fields(self):
+        _, fields = extract_pages([COMPLETE_PAGE])
+        assert fields["part_number"] == "STM32F103"
+        assert fields["manufacturer"] == "STMicroelectronics"
+        assert fields["package"] == "LQFP-48"
+        assert fields["specifications"]["voltage"] == "2.0-3.6V"
+        assert fields["specifications"]["package"] == "LQFP-48"
+        assert "temperature" in fields["specifications"]
+        assert fields["summary"].startswith("STMicroelectronics STM32F103")
+
+    def test_stops_once_complete(self):
+        pages, fields = extract_pages(pages_then_fail([COMPLETE_PAGE]))
+        assert len(pages) == 1
+        assert fields["part_number"] == "STM32F103"
+
+    def test_reads_past_page_five_for_missing_fields(self):
+        filler = ["STM32F103 microcontroller family reference"] * 6
+        pages = filler + ["Manufactured by STMicroelectronics, package: LQFP-48"]
+        read, fields = extract_pages(pages)
+
+        assert len(read) == 7
+        assert fields["manufacturer"] == "STMicroelectronics"
+        assert fields["package"] == "LQFP-48"
+
+    def test_rule_priority_then_first_page(self):
+        extractor = DatasheetExtractor()
+        extractor.feed("package: SOP-8")
+        extractor.feed("package: LQFP-48 or SOP-16")
+        assert extractor.value("package") == "LQFP-48"
+        assert extractor.value("spec.package") == "SOP-8"
+        assert extractor.pages == 2 and not extractor.complete
+
+    def test_missing_fields_use_defaults(self):
+        _, fields = extract_pages([""])
+        assert fields["part_number"] == "未知"
+        assert fields["description"] == "无描述"
+        assert fields["summary"] == "未知器件"
+
+
+class TestExtractionEngine:
+    """ExtractionEngine 测试"""
+
+    def test_candidates_with_positions(self):
+        text = "esp32-c3 by espressif, 1.8-3.6v, 20ma, -40°c to 105°c, qfn-32"
+        candidates = {c.field: c for c in ExtractionEngine().scan(text, page=2)}
+
+        assert candidates["part_number"].value == "ESP32-C3"
+        assert candidates["manufacturer"].position == text.index("espressif")
+        assert candidates["spec.voltage"].value == "1.8-3.6V"
+        assert candidates["spec.current"].value == "20mA"
+        assert candidates["spec.temperature"].value == "-40°C ~ 105°C"
+        assert candidates["spec.temperature"].position == text.index("-40")
+        assert candidates["package"].value == "QFN-32"
+        assert all(c.page == 2 for c in candidates.values())
+
+    def test_package_value_is_also_a_package_candidate(self):
+        candidates = ExtractionEngine().scan("package: sot-223")
+        values = {c.field: c.value for c in candidates}
+        assert values == {"spec.package": "SOT-223", "package": "SOT-223"}
+
+    def test_generic_part_number_ranks_below_known_patterns(self):
+        candidates = ExtractionEngine().scan("part number: abc-1, see also rp2040")
+        ranked = sorted((c for c in candidates if c.field == "part_number"), key=lambda c: c.rank)
+        assert [c.value for c in ranked] == ["RP2040", "ABC-1"]
+
+    def test_found_fields_skip_lower_priority_rules(self):
+        candidates = ExtractionEngine().scan(
+            "nxp lqfp-48 3.3-5v", best={"manufacturer": 0, "spec.voltage": 0})
+        assert {c.field for c in candidates} == {"package"}
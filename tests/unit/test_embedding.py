@@ -0,0 +1,43 @@
+"""
+单元测试 - 本地词汇表嵌入
+"""
+import numpy as np
+
+from ops.knowledge.embedding import VOCABULARY, VECTOR_DIM, TextEmbedder
+
+
+def dims(*words):
+    return [VOCABULARY.index(word) for word in words]
+
+
+class TestTextEmbedder:
+    """词汇表嵌入测试"""
+
+    def setup_method(self):
+        self.embedder = TextEmbedder()
+
+    def test_counts_repeated_words(self):
+        vector = self.embedder.embed("WiFi module, wifi antenna, WIFI")
+        assert vector[dims("wifi")[0]] == np.float32(0.4)
+
+    def test_hyphenated_and_part_number_prefixes(self):
+        vector = self.embedder.embed("USB-C connector on STM32F103C8T6 and ATmega328P")
+        for i in dims("usb-c", "usb", "connector", "stm32", "atmega"):
+            assert vector[i] > 0
+        # 普通单词不按前缀命中
+        assert self.embedder.embed("cancel")[dims("can")[0]] == 0
+
+    def test_duplicate_vocabulary_word_sets_all_dims(self):
+        positions = [i for i, w in enumerate(VOCABULARY[:VECTOR_DIM]) if w == "led"]
+        vector = self.embedder.embed("led driver")
+        assert all(vector[i] > 0 for i in positions)
+
+    def test_batch_matches_single_and_hash_fallback(self):
+        texts = ["ESP32 bluetooth", "zzz qqq", ""]
+        matrix = self.embedder.embed_batch(texts)
+
+        assert matrix.shape == (3, VECTOR_DIM)
+        assert matrix.dtype == np.float32
+        assert np.array_equal(matrix[0], self.embedder.embed(texts[0]))
+        assert matrix[1].any()  # 无命中时使用哈希特征
+        assert not matrix[1, 8:].any()
@@ -0,0 +1,186 @@
+"""
+单元测试 - 向量缓存与嵌入模型切换
+"""
+import pytest
+import asyncio
+import sqlite3
+import numpy as np
+
+from ops.config import Config
+from ops.knowledge import VectorStore
+from ops.knowledge.embedding import TextEmbedder
+from ops.knowledge.embedding_cache import EmbeddingCache
+
+
+class CountingEmbedder(TextEmbedder):
+    """记录计算次数的嵌入器"""
+
+    def __init__(self, version="local-test"):
+        super().__init__()
+        self.version = version
+        self.embedded = 0
+
+    def embed_batch(self, texts):
+        self.embedded += len(texts)
+        return super().embed_batch(texts)
+
+
+class ReversedEmbedder(CountingEmbedder):
+    """新版本模型: 向量与旧版本不同"""
+
+    def embed_batch(self, texts):
+        return super().embed_batch(texts)[:, ::-1].copy()
+
+
+PARTS = [{"part_number": f"P{i}", "category": ["wifi", "sensor"][i % 2]} for i in range(20)]
+
+
+def make_store(tmp_path, embedder, **kwargs):
+    return VectorStore(Config(vector_store_path=str(tmp_path / "vs"), vector_index="flat", **kwargs), embedder)
+
+
+class TestEmbeddingCache:
+    """向量缓存测试"""
+
+    def test_keyed_by_model(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "c.sqlite"))
+        cache.put_many("m1", [("h1", np.ones(4))])
+
+        assert np.array_equal(cache.get_many("m1", ["h1", "h2"])["h1"], np.ones(4, dtype=np.float32))
+        assert cache.get_many("m2", ["h1"]) == {}
+        assert cache.prune("m2") == 1
+
+    def test_lru_size_cap(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "c.sqlite"), max_bytes=4 * 128 * 3 + 200)
+        for i in range(3):
+            cache.put_many("m", [(f"h{i}", np.ones(128))])
+        cache.get_many("m", ["h0"])
+        cache.put_many("m", [("h3", np.ones(128))])
+
+        assert set(cache.get_many("m", ["h0", "h1", "h2", "h3"])) == {"h0", "h2", "h3"}
+        assert cache.size_bytes() <= cache.max_bytes
+        assert cache.stats()["evictions"] == 1
+
+    def test_file_created_on_first_write(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "vs" / "c.sqlite"))
+        assert cache.get_many("m", ["h1"]) == {}
+        assert cache.prune("m") == 0
+        assert cache.stats()["entries"] == 0
+        assert not (tmp_path / "vs").exists()
+
+        cache.put_many("m", [("h1", np.ones(4))])
+        assert (tmp_path / "vs" / "c.sqlite").exists()
+
+    def test_upgrades_old_cache_file(self, tmp_path):
+        path = tmp_path / "c.sqlite"
+        conn = sqlite3.connect(str(path))
+        conn.execute(
+            "CREATE TABLE embeddings (hash TEXT NOT NULL, model TEXT NOT NULL, vector BLOB NOT NULL, "
+            "stored_at REAL NOT NULL, PRIMARY KEY (hash, model))")
+        conn.execute("INSERT INTO embeddings VALUES ('h1', 'm', ?, 1.0)",
+                     (np.ones(4, dtype=np.float32).tobytes(),))
+        conn.commit()
+        conn.close()
+
+        cache = EmbeddingCache(str(path))
+        assert set(cache.get_many("m", ["h1"])) == {"h1"}
+        assert cache.size_bytes() == 16
+
+    @pytest.mark.asyncio
+    async def test_store_open_creates_no_cache_file(self, tmp_path):
+        store = make_store(tmp_path, CountingEmbedder())
+        await store.initialize()
+        await store.search("wifi")
+        assert not (tmp_path / "vs" / EmbeddingCache.FILE).exists()
+
+        await store.bulk_import(PARTS[:2])
+        assert (tmp_path / "vs" / EmbeddingCache.FILE).exists()
+
+    @pytest.mark.asyncio
+    async def test_reimport_reuses_cached_vectors(self, tmp_path):
+        embedder = CountingEmbedder()
+        store = make_store(tmp_path, embedder)
+        await store.initialize()
+        await store.bulk_import(PARTS)
+        assert embedder.embedded == 20
+
+        # 新进程重新导入: 只有内容变化的条目重新计算
+        embedder2 = CountingEmbedder()
+        reopened = make_store(tmp_path, embedder2)
+        await reopened.initialize()
+        changed = [dict(p) for p in PARTS]
+        changed[0]["category"] = "opamp"
+        await reopened.bulk_import(changed)
+
+        assert embedder2.embedded == 1
+        assert all(e["embedding_model"] == "local-test" for e in reopened.index.values())
+
+    @pytest.mark.asyncio
+    async def test_cache_disabled(self, tmp_path):
+        embedder = CountingEmbedder()
+        store = make_store(tmp_path, embedder, embedding_cache=False)
+        await store.initialize()
+        await store.bulk_import(PARTS)
+        await store.bulk_import(PARTS)
+
+        assert embedder.embedded == 40
+
+
+class TestEmbedderSwitch:
+    """嵌入模型切换测试"""
+
+    @pytest.mark.asyncio
+    async def test_old_index_serves_until_reembedded(self, tmp_path):
+        old = CountingEmbedder("model-v1")
+        store = make_store(tmp_path, old)
+        await store.initialize()
+        await store.bulk_import(PARTS)
+        before = store.embeddings.vector("P1").copy()
+
+        new = ReversedEmbedder("model-v2")
+        await store.set_embedder(new)
+        assert store._query_embedder is old  # 切换完成前仍用旧模型查询
+        await store.close()
+
+        assert store._query_embedder is new
+        assert all(e["embedding_model"] == "model-v2" for e in store.index.values())
+        assert not np.allclose(store.embeddings.vector("P1"), before)
+        assert store.embedding_cache.stats()["entries"] == 20  # 旧模型的缓存已清理
+
+        reopened = make_store(tmp_path, ReversedEmbedder("model-v2"))
+        await reopened.initialize()
+        assert reopened._reembedding is None
+        assert np.allclose(reopened.embeddings.vector("P1"), store.embeddings.vector("P1"))
+
+    @pytest.mark.asyncio
+    async def test_stale_vectors_reembedded_on_load(self, tmp_path):
+        store = make_store(tmp_path, CountingEmbedder("model-v1"))
+        await store.initialize()
+        await store.bulk_import(PARTS)
+
+        new = CountingEmbedder("model-v2")
+        reopened = make_store(tmp_path, new)
+        await reopened.initialize()
+        assert reopened._reembedding is not None
+        await reopened.close()
+
+        assert new.embedded == 20
+        assert all(e["embedding_model"] == "model-v2" for e in reopened.index.values())
+
+    @pytest.mark.asyncio
+    async def test_concurrent_update_wins(self, tmp_path):
+        store = make_store(tmp_path, CountingEmbedder("model-v1"))
+        await store.initialize()
+        await store.bulk_import(PARTS)
+
+        await store.set_embedder(CountingEmbedder("model-v2"))
+        await store.add_datasheet("P3", {"category": "updated"})
+        await store.delete_part("P4")
+        await store.close()
+
+        assert store.index["P3"]["data"] == {"category": "updated"}
+        assert "P4" not in store.index
+        reopened = make_store(tmp_path, CountingEmbedder("model-v2"))
+        await reopened.initialize()
+        assert reopened.index["P3"]["data"] == {"category": "updated"}
+        assert "P4" not in reopened.index
@@ -0,0 +1,79 @@
+"""
+单元测试 - 知识库向量矩阵
+"""
+import pytest
+import numpy as np
+
+from ops.config import Config
+from ops.knowledge import VectorStore
+from ops.knowledge.matrix import EmbeddingMatrix, top_k_indices
+
+
+class TestEmbeddingMatrix:
+    """向量矩阵测试"""
+
+    def test_rows_are_normalized(self):
+        matrix = EmbeddingMatrix()
+        matrix.set("A", [3.0, 4.0])
+        matrix.set("Z", [0.0, 0.0])
+
+        assert matrix.matrix.dtype == np.float32
+        assert np.allclose(matrix.matrix[0], [0.6, 0.8])
+        assert np.allclose(matrix.matrix[1], [0.0, 0.0])
+
+    def test_search_matches_cosine(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.random((200, 16))
+        matrix = EmbeddingMatrix()
+        matrix.set_many((f"K{i}", v) for i, v in enumerate(vectors))
+        query = rng.random(16)
+
+        hits = matrix.search(query, top_k=5)
+
+        expected = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+        assert [k for k, _ in hits] == [f"K{i}" for i in np.argsort(-expected)[:5]]
+        assert hits[0][1] == pytest.approx(expected.max(), rel=1e-5)
+
+    def test_remove_moves_last_row(self):
+        matrix = EmbeddingMatrix()
+        matrix.set_many([("A", [1, 0]), ("B", [0, 1]), ("C", [1, 1])])
+        matrix.remove("A")
+
+        assert len(matrix) == 2
+        assert matrix.row_of == {"C": 0, "B": 1}
+        assert matrix.search([1, 1], top_k=1)[0][0] == "C"
+
+    def test_batch_and_dimension_check(self):
+        matrix = EmbeddingMatrix()
+        matrix.set_many([("A", [1, 0]), ("B", [0, 1])])
+
+        results = matrix.search_batch([[1, 0], [0, 1]], top_k=1)
+        assert [r[0][0] for r in results] == ["A", "B"]
+        with pytest.raises(ValueError):
+            matrix.set("C", [1, 0, 0])
+
+    def test_top_k_ties_keep_row_order(self):
+        assert list(top_k_indices(np.array([0.5, 0.9, 0.5, 0.5]), 3)) == [1, 0, 2]
+
+
+class TestVectorStoreSemanticSearch:
+    """VectorStore 语义搜索测试"""
+
+    @pytest.mark.asyncio
+    async def test_matrix_follows_store(self, tmp_path):
+        config = Config(vector_store_path=str(tmp_path / "vs"))
+        store = VectorStore(config)
+        await store.initialize()
+        await store.bulk_import([
+            {"part_number": "ESP32", "category": "wifi bluetooth module"},
+            {"part_number": "LM358", "category": "opamp amplifier"},
+        ])
+        await store.delete_part("LM358")
+
+        reopened = VectorStore(config)
+        await reopened.initialize()
+        assert list(reopened.embeddings.keys) == ["ESP32"]
+
+        (wifi, amp) = await reopened.semantic_search_batch(["wifi", "opamp"], top_k=3)
+        assert wifi[0]["part_number"] == "ESP32"
+        assert [r["part_number"] for r in amp] == ["ESP32"]
@@ -0,0 +1,130 @@
+"""
+单元测试 - 属性位图过滤
+"""
+import numpy as np
+import pytest
+
+from ops.config import Config
+from ops.knowledge import VectorStore
+from ops.knowledge.filters import FilterIndex, attribute
+from ops.knowledge.ivf import IVFIndex
+from ops.knowledge.matrix import normalize_rows
+
+
+def entry(pn, **data):
+    return {"part_number": pn, "data": {"part_number": pn, **data}}
+
+
+class TestFilterIndex:
+    """位图索引测试"""
+
+    def test_attribute_falls_back_to_specs(self):
+        assert attribute({"specifications": {"package": "SOT-223"}}, "package") == "sot-223"
+        assert attribute({"specs": {"voltage": "3.0-3.6V"}}, "voltage") == "3.0-3.6v"
+        assert attribute({}, "category") == ""
+
+    def test_intersection(self):
+        index = FilterIndex()
+        index.add("A", entry("A", category="LDO", package="SOT-223", voltage="3.3V"))
+        index.add("B", entry("B", category="LDO", package="SOT-23-5", voltage="1.8V"))
+        index.add("C", entry("C", category="MCU", package="LQFP-48", voltage="3.3V"))
+
+        assert index.matching({"category": "ldo"}) == {"A", "B"}
+        assert index.matching({"category": "LDO", "voltage": "3.3"}) == {"A"}
+        assert index.matching({"package": "sot"}) == {"A", "B"}
+        assert index.matching({"category": "Sensor"}) == set()
+        assert index.matching({"color": "red"}) is None
+        assert index.matching(None) is None
+
+    def test_voltage_matches_numeric_range(self):
+        index = FilterIndex()
+        index.add("A", entry("A", voltage="2.0-3.6V"))
+        index.add("B", entry("B", voltage="5V"))
+        index.add("C", entry("C", specifications={"voltage": "3-32V"}))
+        index.add("D", entry("D", voltage="wide range"))
+
+        assert index.matching({"voltage": "3.3"}) == {"A", "C"}
+        assert index.matching({"voltage": "5V"}) == {"B", "C"}
+        assert index.matching({"voltage": "40"}) == set()
+        assert index.matching({"voltage": "wide"}) == {"D"}
+
+    def test_batch_update_matches_single_adds(self):
+        entries = {
+            f"P{i}": entry(f"P{i}", category=("LDO", "MCU", "ADC")[i % 3], package=f"SOT-{i % 5}")
+            for i in range(2000)
+        }
+        batch, single = FilterIndex(), FilterIndex()
+        batch.rebuild(entries)
+        for key, value in entries.items():
+            single.add(key, value)
+
+        assert batch.bitmaps == single.bitmaps
+        assert batch.matching({"category": "adc", "package": "sot-2"}) == {
+            f"P{i}" for i in range(2000) if i % 3 == 2 and i % 5 == 2}
+
+    def test_remove_reuses_slot(self):
+        index = FilterIndex()
+        index.add("A", entry("A", category="LDO"))
+        index.add("B", entry("B", category="MCU"))
+        index.remove("A")
+        assert "ldo" not in index.bitmaps["category"]
+
+        index.add("C", entry("C", category="MCU"))
+        assert index.matching({"category": "mcu"}) == {"B", "C"}
+        assert len(index) == 2
+
+    def test_replace_updates_bitmaps(self):
+        index = FilterIndex()
+        index.add("A", entry("A", category="LDO"))
+        index.add("A", entry("A", category="Buck"))
+        assert index.matching({"category": "ldo"}) == set()
+        assert index.matching({"category": "buck"}) == {"A"}
+
+
+class TestFilteredIVF:
+    """IVF 检索只对允许的条目打分"""
+
+    def test_allowed_restricts_results(self):
+        rng = np.random.default_rng(0)
+        vectors = normalize_rows(rng.normal(size=(200, 16)))
+        keys = [f"P{i}" for i in range(200)]
+        ivf = IVFIndex.train(vectors, nlist=4)
+        ivf.add(keys, vectors)
+
+        allowed = set(keys[::2])
+        hits = ivf.search(vectors[1], top_k=5, nprobe=4, allowed=allowed)
+        assert hits and all(key in allowed for key, _ in hits)
+
+
+class TestVectorStoreFilters:
+    """VectorStore 过滤测试"""
+
+    @pytest.fixture
+    async def store(self, tmp_path):
+        store = VectorStore(Config(vector_store_path=str(tmp_path / "vs")))
+        await store.initialize()
+        await store.bulk_import([
+            {"part_number": "AMS1117-3.3", "category": "LDO", "package": "SOT-223"},
+            {"part_number": "XC6206", "category": "LDO", "package": "SOT-23"},
+            {"part_number": "STM32F103C8T6", "category": "MCU", "package": "LQFP-48"},
+        ])
+        return store
+
+    @pytest.mark.asyncio
+    async def test_keyword_search_filters_on_data(self, store):
+        results = await store.search("sot", filters={"category": "ldo"})
+        assert {r["part_number"] for r in results} == {"AMS1117-3.3", "XC6206"}
+
+    @pytest.mark.asyncio
+    async def test_semantic_search_filters(self, store):
+        results = await store.semantic_search("regulator", top_k=5, filters={"category": "MCU"})
+        assert [r["part_number"] for r in results] == ["STM32F103C8T6"]
+
+    @pytest.mark.asyncio
+    async def test_filters_follow_delete_and_reload(self, store, tmp_path):
+        await store.delete_part("XC6206")
+        reopened = VectorStore(Config(vector_store_path=str(tmp_path / "vs")))
+        await reopened.initialize()
+
+        results = await reopened.hybrid_search("ldo", filters={"package": "sot"})
+        assert [r["part_number"] for r in results] == ["AMS1117-3.3"]
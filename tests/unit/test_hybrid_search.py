@@ -0,0 +1,76 @@
+"""
+单元测试 - BM25 + 向量混合检索
+"""
+import pytest
+
+from ops.config import Config
+from ops.knowledge import VectorStore
+from ops.knowledge.text_index import TextIndex
+
+
+def entry(pn, **data):
+    return {"part_number": pn, "data": {"part_number": pn, **data}}
+
+
+class TestBM25:
+    """BM25 打分测试"""
+
+    def test_rare_terms_weigh_more(self):
+        index = TextIndex()
+        index.add("A", entry("A", category="LDO regulator"))
+        index.add("B", entry("B", category="Buck regulator"))
+        index.add("C", entry("C", category="Op Amp"))
+
+        scores = index.bm25("ldo regulator")
+        assert set(scores) == {"A", "B"}
+        assert scores["A"] > scores["B"]
+
+    def test_prefix_fallback_and_allowed(self):
+        index = TextIndex()
+        index.add("STM32F103C8T6", entry("STM32F103C8T6", category="MCU"))
+        index.add("NE555", entry("NE555", category="Timer"))
+
+        assert set(index.bm25("stm32")) == {"STM32F103C8T6"}
+        assert index.bm25("stm32", allowed={"NE555"}) == {}
+
+    def test_lengths_follow_removal(self):
+        index = TextIndex()
+        index.add("A", entry("A", category="Timer"))
+        index.remove("A")
+        assert index.bm25("timer") == {}
+        assert index._total_length == 0
+
+
+class TestHybridSearch:
+    """VectorStore.hybrid_search 测试"""
+
+    @pytest.fixture
+    async def store(self, tmp_path):
+        store = VectorStore(Config(vector_store_path=str(tmp_path / "vs")))
+        await store.initialize()
+        await store.bulk_import([
+            {"part_number": "AMS1117-3.3", "category": "LDO", "description": "3.3V linear regulator"},
+            {"part_number": "LM358", "category": "Op Amp", "description": "dual operational amplifier"},
+            {"part_number": "NE555", "category": "Timer", "description": "precision timer"},
+        ])
+        return store
+
+    @pytest.mark.asyncio
+    async def test_fuses_keyword_and_vector_rankings(self, store):
+        results = await store.hybrid_search("linear regulator", limit=2)
+
+        assert results[0]["part_number"] == "AMS1117-3.3"
+        assert results[0]["bm25_score"] > 0
+        assert results[0]["similarity"] is not None
+        assert results[0]["relevance_score"] >= results[-1]["relevance_score"]
+        assert len(results) == 2
+
+    @pytest.mark.asyncio
+    async def test_filters_apply_before_scoring(self, store):
+        assert await store.hybrid_search("timer", filters={"category": "Sensor"}) == []
+
+    @pytest.mark.asyncio
+    async def test_empty_store(self, tmp_path):
+        store = VectorStore(Config(vector_store_path=str(tmp_path / "empty")))
+        await store.initialize()
+        assert await store.hybrid_search("anything") == []
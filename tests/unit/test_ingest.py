@@ -0,0 +1,156 @@
+"""
+单元测试 - Datasheet 目录批量导入
+"""
+from pathlib import Path
+import threading
+
+import pytest
+
+from ops.config import Config
+from ops.ingest import IngestCheckpoint, ingest_directory
+from ops.knowledge import VectorStore
+
+DATASHEETS = {
+    "mcu/stm32.txt": "STM32F103 microcontroller by STMicroelectronics, package: LQFP-48, 2.0-3.6V",
+    "mcu/rp2040.md": "RP2040 dual core microcontroller, QFN-56, 1.8-3.3V",
+    "opamp/lm358.txt": "LM358 dual operational amplifier, Texas Instruments, SOIC-8, 3-32V",
+    "opamp/lm358-copy.txt": "LM358 dual operational amplifier, Texas Instruments, SOIC-8, 3-32V",
+    "misc/notes.txt": "meeting notes without any recognisable part",
+    "misc/image.png": "not a datasheet",
+}
+
+
+@pytest.fixture
+def library(tmp_path):
+    root = tmp_path / "datasheets"
+    for name, text in DATASHEETS.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(
+        vector_store_path=str(tmp_path / "vs"),
+        vector_store_fsync=False,
+        cache_dir=str(tmp_path / "cache"),
+    )
+
+
+@pytest.fixture
+async def store(config):
+    store = VectorStore(config)
+    await store.initialize()
+    return store
+
+
+class TestIngestDirectory:
+    """ingest_directory 测试"""
+
+    @pytest.mark.asyncio
+    async def test_imports_and_dedupes(self, library, config, store):
+        stats = await ingest_directory(str(library), config=config, store=store)
+
+        assert stats.total == 5
+        assert stats.imported == 3
+        assert stats.duplicates == 1
+        assert stats.unidentified == 1
+        assert stats.failed == 0
+
+        part = await store.get_part("STM32F103")
+        assert part["data"]["package"] == "LQFP-48"
+        assert part["data"]["source_file"] == "mcu/stm32.txt"
+        assert store.embeddings.vector("LM358") is not None
+
+    @pytest.mark.asyncio
+    async def test_batches_and_progress(self, library, config, store):
+        reports = []
+        stats = await ingest_directory(
+            str(library), config=config, store=store, batch_size=1,
+            progress=lambda s: reports.append(s.processed), progress_every=1,
+        )
+        assert stats.batches == 3
+        assert reports[-1] == stats.total == stats.processed
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_finished_files(self, library, config, store):
+        await ingest_directory(str(library), config=config, store=store)
+        stats = await ingest_directory(str(library), config=config, store=store)
+        assert stats.skipped == 5 and stats.duplicates == 0 and stats.imported == 0
+
+        (library / "mcu/stm32.txt").write_text(
+            "STM32F103 microcontroller, package: LQFP-44", encoding="utf-8")
+        stats = await ingest_directory(str(library), config=config, store=store)
+        assert stats.imported == 1
+        assert (await store.get_part("STM32F103"))["data"]["package"] == "LQFP-44"
+
+        stats = await ingest_directory(str(library), config=config, store=store, resume=False)
+        assert stats.skipped == 0 and stats.imported == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_commit_is_not_checkpointed(self, library, config, store, monkeypatch):
+        async def fail(*args, **kwargs):
+            raise RuntimeError("disk full")
+
+        original = store.bulk_import
+        monkeypatch.setattr(store, "bulk_import", fail)
+        with pytest.raises(RuntimeError):
+            await ingest_directory(str(library), config=config, store=store)
+
+        monkeypatch.setattr(store, "bulk_import", original)
+        stats = await ingest_directory(str(library), config=config, store=store)
+        # 重复文件的内容尚未导入，不能按检查点跳过
+        assert stats.imported == 3 and stats.duplicates == 1
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_contents(self, library, config, store, tmp_path):
+        checkpoint_path = str(tmp_path / "ckpt.sqlite")
+        await ingest_directory(
+            str(library), config=config, store=store, checkpoint_path=checkpoint_path)
+
+        checkpoint = IngestCheckpoint(checkpoint_path)
+        try:
+            assert checkpoint.stats() == {"imported": 3, "unidentified": 1, "duplicate": 1}
+            files, hashes = checkpoint.load()
+            # 两份相同内容的 LM358: 先遍历到的一份导入，另一份记为重复
+            assert set(files) == {
+                "mcu/stm32.txt", "mcu/rp2040.md", "opamp/lm358-copy.txt", "opamp/lm358.txt",
+                "misc/notes.txt"}
+            assert files["opamp/lm358.txt"][2] == "duplicate"
+            assert len(hashes) == 4
+        finally:
+            checkpoint.close()
+
+    @pytest.mark.asyncio
+    async def test_files_are_stat_off_event_loop(self, library, config, store, monkeypatch):
+        threads = set()
+        original = Path.stat
+
+        def stat(self, *args, **kwargs):
+            if library in self.parents:
+                threads.add(threading.current_thread())
+            return original(self, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "stat", stat)
+        await ingest_directory(str(library), config=config, store=store)
+        assert threads and threading.main_thread() not in threads
+
+    @pytest.mark.asyncio
+    async def test_vanished_file_counts_as_failed(self, library, config, store, monkeypatch):
+        from ops import ingest
+        original = ingest.iter_datasheets
+
+        def walk(directory):
+            yield from original(directory)
+            yield directory / "gone.txt"
+
+        monkeypatch.setattr(ingest, "iter_datasheets", walk)
+        stats = await ingest_directory(str(library), config=config, store=store)
+        assert stats.total == 6 and stats.failed == 1 and stats.imported == 3
+
+    @pytest.mark.asyncio
+    async def test_not_a_directory(self, config, store, tmp_path):
+        with pytest.raises(ValueError):
+            await ingest_directory(str(tmp_path / "missing"), config=config, store=store)
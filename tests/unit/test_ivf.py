@@ -0,0 +1,104 @@
+"""
+单元测试 - IVF 近似最近邻索引
+"""
+import pytest
+import numpy as np
+
+from ops.config import Config
+from ops.knowledge import VectorStore
+from ops.knowledge.ivf import IVFIndex, recall_at_k
+from ops.knowledge.matrix import EmbeddingMatrix, normalize_rows
+
+
+def clustered(size=2000, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    return normalize_rows(centers[rng.integers(0, 20, size)] + 0.2 * rng.normal(size=(size, dim)))
+
+
+class TestIVFIndex:
+    """IVF 索引测试"""
+
+    def setup_method(self):
+        self.vectors = clustered()
+        self.keys = [f"K{i}" for i in range(len(self.vectors))]
+        self.ivf = IVFIndex.train(self.vectors, nlist=32)
+        self.ivf.add(self.keys, self.vectors)
+        self.exact = EmbeddingMatrix()
+        self.exact.set_many(zip(self.keys, self.vectors))
+
+    def test_full_probe_equals_exact(self):
+        queries = self.vectors[:20]
+        truth = self.exact.search_batch(queries, top_k=10)
+        found = self.ivf.search_batch(queries, top_k=10, nprobe=32)
+
+        assert recall_at_k(truth, found) == 1.0
+
+    def test_recall_grows_with_nprobe(self):
+        queries = normalize_rows(self.vectors[:50] + 0.1)
+        truth = self.exact.search_batch(queries, top_k=10)
+
+        low = recall_at_k(truth, self.ivf.search_batch(queries, 10, nprobe=1))
+        high = recall_at_k(truth, self.ivf.search_batch(queries, 10, nprobe=8))
+
+        assert high >= low
+        assert high > 0.9
+
+    def test_incremental_insert_and_remove(self):
+        self.ivf.remove("K0")
+        assert "K0" not in self.ivf
+        assert all(key != "K0" for key, _ in self.ivf.search(self.vectors[0], 5, nprobe=32))
+
+        self.ivf.add(["NEW"], self.vectors[:1])
+        assert self.ivf.search(self.vectors[0], 1, nprobe=32)[0][0] in {"NEW", "K0"}
+        assert len(self.ivf) == len(self.keys)
+
+    def test_save_and_load_centroids(self, tmp_path):
+        self.ivf.save(tmp_path)
+        loaded = IVFIndex.load(tmp_path, nprobe=4)
+
+        assert np.array_equal(loaded.centroids, self.ivf.centroids)
+        assert loaded.trained_size == len(self.keys)
+        assert len(loaded) == 0  # 倒排表由调用方重新分配
+
+    def test_load_missing_or_corrupt(self, tmp_path):
+        assert IVFIndex.load(tmp_path) is None
+        (tmp_path / IVFIndex.FILE).write_bytes(b"garbage")
+        assert IVFIndex.load(tmp_path) is None
+
+
+class TestVectorStoreANN:
+    """VectorStore 使用 IVF 索引测试"""
+
+    @pytest.mark.asyncio
+    async def test_builds_persists_and_reloads(self, tmp_path):
+        config = Config(vector_store_path=str(tmp_path / "vs"), ivf_min_size=50, ivf_nlist=4)
+        store = VectorStore(config)
+        await store.initialize()
+        await store.bulk_import([
+            {"part_number": f"P{i}", "category": ["wifi", "sensor", "opamp", "mosfet"][i % 4]}
+            for i in range(100)
+        ])
+        await store.close()
+
+        assert store.ann is not None and len(store.ann) == 100
+        assert (tmp_path / "vs" / IVFIndex.FILE).exists()
+
+        reopened = VectorStore(config)
+        await reopened.initialize()
+        assert reopened.ann is not None and len(reopened.ann) == 100
+        await reopened.delete_part("P0")
+        assert "P0" not in reopened.ann
+
+        results = await reopened.semantic_search("sensor", top_k=3)
+        assert len(results) == 3
+
+    @pytest.mark.asyncio
+    async def test_flat_index_never_builds(self, tmp_path):
+        config = Config(vector_store_path=str(tmp_path / "vs"), vector_index="flat", ivf_min_size=1)
+        store = VectorStore(config)
+        await store.initialize()
+        await store.bulk_import([{"part_number": f"P{i}"} for i in range(10)])
+        await store.close()
+
+        assert store.ann is None
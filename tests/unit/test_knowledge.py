@@ -129,6 +129,25 @@ class TestEmbeddingFunctions:
         assert part.get("embeddings") is not None
         assert len(part["embeddings"]) == 128
 
+    @pytest.mark.asyncio
+    async def test_create_embeddings_failed_write_keeps_index(self, vector_store, monkeypatch):
+        """测试写入失败时内存中的条目与向量保持不变"""
+        await vector_store.add_datasheet("ESP32-S3", {"part_number": "ESP32-S3", "data": {"wireless": "WiFi"}})
+        vector_store._drop_embedding("ESP32-S3")
+        before = dict(vector_store.index["ESP32-S3"])
+
+        async def failing_write(records, batch=False):
+            if callable(records):
+                records()
+            raise OSError("disk full")
+
+        monkeypatch.setattr(vector_store, "_write", failing_write)
+        with pytest.raises(OSError):
+            await vector_store.create_embeddings()
+
+        assert vector_store.index["ESP32-S3"] == before
+        assert "ESP32-S3" not in vector_store.embeddings
+
     @pytest.mark.asyncio
     async def test_semantic_search(self, vector_store):
         """测试语义搜索"""
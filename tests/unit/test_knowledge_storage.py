@@ -0,0 +1,197 @@
+"""
+单元测试 - 知识库追加日志存储
+"""
+import pytest
+import json
+
+from ops.config import Config
+from ops.knowledge import VectorStore
+from ops.knowledge.storage import RecordLog
+
+
+class TestRecordLog:
+    """追加日志测试"""
+
+    def test_append_and_replay(self, tmp_path):
+        log = RecordLog(tmp_path)
+        log.append([("put", "A", {"v": 1}), ("put", "B", {"v": 2})])
+        log.append([("del", "A", None), ("put", "B", {"v": 3})])
+
+        assert log.load() == {"B": {"v": 3}}
+
+    def test_truncated_tail_ignored(self, tmp_path):
+        """测试崩溃时写了一半的最后一行被忽略"""
+        log = RecordLog(tmp_path)
+        log.append([("put", "A", {"v": 1})])
+        with open(log.log_path, "ab") as f:
+            f.write(b'{"op":"put","key":"B","ent')
+
+        assert log.load() == {"A": {"v": 1}}
+
+    def test_compact_keeps_records_appended_after_offset(self, tmp_path):
+        log = RecordLog(tmp_path)
+        log.append([("put", "A", {"v": 1})])
+        offset = log.log_size()
+        snapshot = RecordLog.encode_snapshot({"A": {"v": 1}})
+        log.append([("put", "B", {"v": 2})])  # 合并期间的新写入
+
+        log.compact(snapshot, offset)
+
+        assert json.loads(log.snapshot_path.read_text()) == {"A": {"v": 1}}
+        assert log.load() == {"A": {"v": 1}, "B": {"v": 2}}
+        assert not (tmp_path / "index.json.tmp").exists()
+
+    def test_compact_removes_fully_merged_log(self, tmp_path):
+        log = RecordLog(tmp_path)
+        log.append([("put", "A", {"v": 1})])
+
+        log.compact(RecordLog.encode_snapshot({"A": {"v": 1}}), log.log_size())
+
+        assert not log.log_path.exists()
+        assert log.load() == {"A": {"v": 1}}
+
+    def test_needs_compaction(self, tmp_path):
+        log = RecordLog(tmp_path, compact_min_bytes=100)
+        log.append([("put", "A", {"v": 1})])
+        assert not log.needs_compaction()
+
+        log.append([("put", f"K{i}", {"v": i}) for i in range(20)])
+        assert log.needs_compaction()
+
+
+class TestVectorStorePersistence:
+    """VectorStore 持久化测试"""
+
+    def make_store(self, tmp_path, **kwargs):
+        return VectorStore(Config(vector_store_path=str(tmp_path / "vs"), **kwargs))
+
+    @pytest.mark.asyncio
+    async def test_writes_append_instead_of_rewriting(self, tmp_path):
+        """测试每次插入只追加一行，不重写快照"""
+        store = self.make_store(tmp_path)
+        await store.initialize()
+        for i in range(50):
+            await store.add_datasheet(f"PART-{i}", {"category": "MCU"})
+
+        assert not store._log.snapshot_path.exists()
+        assert len(store._log.log_path.read_bytes().splitlines()) == 50
+
+    @pytest.mark.asyncio
+    async def test_reopen_replays_log(self, tmp_path):
+        store = self.make_store(tmp_path)
+        await store.initialize()
+        await store.add_datasheet("LM358", {"category": "Op Amp"})
+        await store.add_datasheet("NE555", {"category": "Timer"})
+        await store.delete_part("NE555")
+
+        reopened = self.make_store(tmp_path)
+        await reopened.initialize()
+
+        assert list(reopened.index) == ["LM358"]
+
+    @pytest.mark.asyncio
+    async def test_save_index_compacts(self, tmp_path):
+        store = self.make_store(tmp_path)
+        await store.initialize()
+        await store.add_datasheet("LM358", {"category": "Op Amp"})
+
+        await store.save_index()
+
+        assert not store._log.log_path.exists()
+        assert "LM358" in json.loads(store._log.snapshot_path.read_text())
+
+    @pytest.mark.asyncio
+    async def test_save_before_initialize_keeps_existing_data(self, tmp_path):
+        """测试未加载时保存不会丢失磁盘上已有数据"""
+        store = self.make_store(tmp_path)
+        await store.initialize()
+        await store.add_datasheet("LM358", {})
+        await store.save_index()
+
+        other = self.make_store(tmp_path)
+        await other.add_datasheet("NE555", {})
+        await other.save_index()
+
+        assert set(other.index) == {"LM358", "NE555"}
+
+    @pytest.mark.asyncio
+    async def test_background_compaction(self, tmp_path):
+        store = self.make_store(tmp_path, vector_store_compact_mb=0.0001)
+        await store.initialize()
+        for i in range(20):
+            await store.add_datasheet(f"PART-{i}", {"description": "x" * 20})
+        await store.close()
+
+        assert store._log.snapshot_path.exists()
+        reopened = self.make_store(tmp_path)
+        await reopened.initialize()
+        assert len(reopened.index) == 20
+
+
+class TestBulkImport:
+    """批量导入事务测试"""
+
+    def make_store(self, tmp_path):
+        return VectorStore(Config(vector_store_path=str(tmp_path / "vs")))
+
+    @pytest.mark.asyncio
+    async def test_batch_is_single_log_line(self, tmp_path):
+        store = self.make_store(tmp_path)
+        await store.initialize()
+        parts = [{"part_number": f"part-{i}", "category": "MCU"} for i in range(100)]
+
+        imported = await store.bulk_import(parts)
+
+        assert imported == 100
+        assert len(store._log.log_path.read_bytes().splitlines()) == 1
+        assert len(store.embeddings) == 100
+
+        reopened = self.make_store(tmp_path)
+        await reopened.initialize()
+        assert len(reopened.index) == 100
+        assert "PART-0" in reopened.index
+
+    def test_truncated_batch_discarded(self, tmp_path):
+        """测试写了一半的批量记录整批丢弃，且后续追加不受影响"""
+        log = RecordLog(tmp_path)
+        log.append([("put", "A", {"v": 1})])
+        payload = RecordLog.encode_batch([("put", "B", {"v": 2}), ("put", "C", {"v": 3})])
+        with open(log.log_path, "ab") as f:
+            f.write(payload[:-10])
+
+        assert log.load() == {"A": {"v": 1}}
+        log.append([("put", "D", {"v": 4})])
+        assert log.load() == {"A": {"v": 1}, "D": {"v": 4}}
+
+    @pytest.mark.asyncio
+    async def test_failure_leaves_store_untouched(self, tmp_path):
+        store = self.make_store(tmp_path)
+        await store.initialize()
+        await store.add_datasheet("LM358", {})
+        log_before = store._log.log_path.read_bytes()
+
+        def broken(texts):
+            raise RuntimeError("embedding failed")
+
+        store.embed_batch = broken
+        with pytest.raises(RuntimeError):
+            await store.bulk_import([{"part_number": "NE555"}, {"part_number": "TL072"}])
+
+        assert list(store.index) == ["LM358"]
+        assert store._log.log_path.read_bytes() == log_before
+
+    @pytest.mark.asyncio
+    async def test_progress_and_duplicates(self, tmp_path):
+        store = self.make_store(tmp_path)
+        await store.initialize()
+        events = []
+        parts = [{"part_number": "a", "v": 1}, {"part_number": "A", "v": 2}, {"v": 3}]
+
+        imported = await store.bulk_import(
+            parts, progress=lambda *e: events.append(e), chunk_size=1
+        )
+
+        assert imported == 1
+        assert store.index["A"]["data"]["v"] == 2  # 后出现的重复条目生效
+        assert {stage for stage, _, _ in events} == {"stage", "embed", "write"}
+        assert events[-1] == ("write", 1, 1)
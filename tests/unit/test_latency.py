@@ -0,0 +1,104 @@
+"""
+单元测试 - 延迟直方图与自适应超时
+"""
+import pytest
+
+from ops.latency import LatencyHistogram, TimeoutPolicy
+
+
+class TestLatencyHistogram:
+    """HDR 风格直方图测试"""
+
+    def test_percentiles_within_relative_error(self):
+        histogram = LatencyHistogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1000)  # 1ms ~ 1s
+
+        assert len(histogram) == 1000
+        assert histogram.percentile(0.5) == pytest.approx(0.5, rel=0.02)
+        assert histogram.percentile(0.99) == pytest.approx(0.99, rel=0.02)
+        assert histogram.percentile(1.0) == pytest.approx(1.0, rel=0.02)
+
+    def test_percentile_is_upper_bound(self):
+        """测试分位取桶上界 (超时估计偏保守)"""
+        histogram = LatencyHistogram()
+        histogram.record(0.123456)
+
+        assert histogram.percentile(0.5) >= 0.123456
+
+    def test_small_values_exact(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.00005)  # 50us，线性区间内精确
+
+        assert histogram.percentile(1.0) == pytest.approx(0.00005)
+
+    def test_values_clamped_to_max(self):
+        histogram = LatencyHistogram(max_seconds=1.0)
+        histogram.record(50.0)
+
+        assert histogram.percentile(1.0) == pytest.approx(1.0, rel=0.02)
+
+    def test_empty(self):
+        assert LatencyHistogram().percentile(0.99) is None
+
+    def test_old_windows_expire(self):
+        histogram = LatencyHistogram(window_seconds=60)
+        histogram.record(5.0)
+        histogram._window_started -= 61  # 进入下一个窗口: 旧数据仍可见
+        histogram.record(0.01)
+        assert histogram.percentile(1.0) == pytest.approx(5.0, rel=0.02)
+
+        histogram._window_started -= 61  # 再轮换一次: 5s 样本过期
+        assert histogram.percentile(1.0) == pytest.approx(0.01, rel=0.02)
+
+
+class TestTimeoutPolicy:
+    """自适应超时测试"""
+
+    def make_histogram(self, seconds, count=50):
+        histogram = LatencyHistogram()
+        for _ in range(count):
+            histogram.record(seconds)
+        return histogram
+
+    def test_default_until_enough_samples(self):
+        policy = TimeoutPolicy(min_samples=20)
+
+        assert policy.timeout(self.make_histogram(0.1, count=5), default=2.0) == 2.0
+
+    def test_p99_plus_margin(self):
+        policy = TimeoutPolicy(margin=0.5)
+
+        timeout = policy.timeout(self.make_histogram(1.0), default=2.0)
+
+        assert timeout == pytest.approx(1.5, rel=0.02)
+
+    def test_floor_and_ceiling(self):
+        policy = TimeoutPolicy(floor=0.25, ceiling=3.0)
+
+        assert policy.timeout(self.make_histogram(0.01), default=2.0) == 0.25
+        assert policy.timeout(self.make_histogram(5.0), default=2.0) == 3.0
+        assert policy.timeout(self.make_histogram(5.0), default=2.0, ceiling=30.0) == pytest.approx(7.5, rel=0.02)
+
+    def test_disabled(self):
+        policy = TimeoutPolicy(enabled=False)
+
+        assert policy.timeout(self.make_histogram(0.01), default=2.0) == 2.0
+
+    def test_source_timeout_follows_observed_latency(self, tmp_path):
+        """测试未显式配置的数据源超时按观测延迟自适应"""
+        from ops.config import Config
+        from ops.resilience import get_guard
+        from ops.search import SearchEngine
+
+        engine = SearchEngine(Config(
+            vector_store_path=str(tmp_path / "vs"),
+            source_timeouts={"pinned": 5.0},
+        ))
+        latency = get_guard("adaptive-source").latency
+        for _ in range(50):
+            latency.record(0.04)
+
+        assert engine._source_timeout("adaptive-source") == 0.25  # p99 x 1.5 低于下限
+        assert engine._source_timeout("pinned") == 5.0
+        assert engine._source_timeout("unseen-source") == engine.config.source_timeout_seconds
@@ -0,0 +1,160 @@
+"""
+单元测试 - 按需解码的快照索引
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from ops.config import Config
+from ops.knowledge import VectorStore
+from ops.knowledge.storage import LazyIndex, RecordLog
+
+
+def write_snapshot(path, index):
+    path.write_bytes(RecordLog.encode_snapshot(index))
+
+
+class TestLazyIndex:
+    """LazyIndex 测试"""
+
+    def test_snapshot_is_valid_json(self, tmp_path):
+        index = {"A": {"v": 1}, 'B"1': {"v": "x\ny"}}
+        write_snapshot(tmp_path / "index.json", index)
+        assert json.loads((tmp_path / "index.json").read_text()) == index
+
+    def test_entries_decoded_on_demand(self, tmp_path):
+        write_snapshot(tmp_path / "index.json", {"A": {"v": 1}, 'B"1': {"v": 2}, "C": {"v": 3}})
+        index = LazyIndex.open(tmp_path / "index.json")
+
+        assert len(index) == 3 and list(index) == ["A", 'B"1', "C"]
+        assert index.decoded() == {}
+        assert index['B"1'] == {"v": 2}
+        assert index['B"1'] is index['B"1']
+        assert set(index.decoded()) == {'B"1'}
+
+    def test_mutations(self, tmp_path):
+        write_snapshot(tmp_path / "index.json", {"A": {"v": 1}, "B": {"v": 2}})
+        index = LazyIndex.open(tmp_path / "index.json")
+
+        del index["A"]
+        index["C"] = {"v": 3}
+        index.pop("B")
+        assert "A" not in index and "B" not in index
+        assert dict(index) == {"C": {"v": 3}}
+        index["A"] = {"v": 4}
+        assert dict(index) == {"A": {"v": 4}, "C": {"v": 3}}
+
+    def test_reencode_copies_undecoded_entries(self, tmp_path):
+        write_snapshot(tmp_path / "index.json", {"A": {"v": 1}, "B": {"v": 2}})
+        index = LazyIndex.open(tmp_path / "index.json")
+        index["B"]["v"] = 20
+
+        encoded = RecordLog.encode_snapshot(index)
+        assert json.loads(encoded) == {"A": {"v": 1}, "B": {"v": 20}}
+        assert index.decoded().keys() == {"B"}
+
+    def test_legacy_single_line_snapshot(self, tmp_path):
+        (tmp_path / "index.json").write_text(json.dumps({"A": {"v": 1}}))
+        index = LazyIndex.open(tmp_path / "index.json")
+        assert dict(index) == {"A": {"v": 1}}
+        assert index.decoded() == {"A": {"v": 1}}
+
+    @pytest.mark.parametrize("indent", [2, 0])
+    def test_legacy_indented_snapshot(self, tmp_path, indent):
+        """旧版本 json.dump(indent=2) 写出的快照不能被当作逐行格式"""
+        data = {"A": {"v": 1, "tags": ["x"]}, "B\\": {"v": 2}}
+        (tmp_path / "index.json").write_text(
+            json.dumps(data, ensure_ascii=False, indent=indent), encoding="utf-8")
+        assert dict(LazyIndex.open(tmp_path / "index.json")) == data
+
+    def test_key_ending_with_backslash(self, tmp_path):
+        data = {"A\\": {"v": 1}, "B": {"v": 2}}
+        write_snapshot(tmp_path / "index.json", data)
+        index = LazyIndex.open(tmp_path / "index.json")
+        assert index.decoded() == {}
+        assert dict(index) == data
+
+    def test_missing_or_empty_snapshot(self, tmp_path):
+        assert len(LazyIndex.open(tmp_path / "index.json")) == 0
+        (tmp_path / "index.json").write_bytes(b"")
+        assert len(LazyIndex.open(tmp_path / "index.json")) == 0
+
+
+class TestLazyVectorStore:
+    """VectorStore 打开时不解码条目"""
+
+    @pytest.mark.asyncio
+    async def test_baseline_snapshot_survives_compaction(self, tmp_path):
+        """旧版本写出的 indent=2 快照: 打开后数据完整，合并快照不丢数据"""
+        path = tmp_path / "vs"
+        path.mkdir()
+        data = {
+            "LM358": {"part_number": "LM358", "data": {"category": "Op Amp"}, "embedding": None},
+            "NE555": {"part_number": "NE555", "data": {"category": "Timer"}, "embedding": None},
+        }
+        (path / "index.json").write_text(
+            json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+        store = VectorStore(Config(vector_store_path=str(path)))
+        await store.initialize()
+        assert set(store.index) == {"LM358", "NE555"}
+        await store.add_datasheet("TL431", {"category": "Reference"})
+        await store.save_index()
+
+        reopened = VectorStore(Config(vector_store_path=str(path)))
+        await reopened.initialize()
+        assert set(reopened.index) == {"LM358", "NE555", "TL431"}
+        assert (await reopened.get_part("NE555"))["data"]["category"] == "Timer"
+
+    @pytest.fixture
+    async def path(self, tmp_path):
+        store = VectorStore(Config(vector_store_path=str(tmp_path / "vs")))
+        await store.initialize()
+        await store.bulk_import([
+            {"part_number": f"P{i}", "category": "LDO" if i % 2 else "MCU"} for i in range(20)
+        ])
+        await store.save_index()
+        return tmp_path / "vs"
+
+    @pytest.mark.asyncio
+    async def test_open_decodes_nothing(self, path):
+        store = VectorStore(Config(vector_store_path=str(path)))
+        await store.initialize()
+
+        assert len(store.index) == 20
+        assert store.index.decoded() == {}
+        assert store.embeddings.base.model == store.embedding_model
+        assert store._reembedding is None
+
+        assert (await store.get_part("P3"))["data"]["category"] == "LDO"
+        assert len(await store.semantic_search("ldo", top_k=3)) == 3
+        assert len(store.index.decoded()) <= 4
+
+    @pytest.mark.asyncio
+    async def test_search_indexes_built_on_first_use(self, path):
+        store = VectorStore(Config(vector_store_path=str(path)))
+        await store.initialize()
+        assert not store._search_indexed
+
+        results = await store.hybrid_search("p1", filters={"category": "ldo"}, limit=20)
+        assert store._search_indexed
+        assert results and all(r["data"]["category"] == "LDO" for r in results)
+
+        await store.add_datasheet("NEW1", {"category": "LDO"})
+        assert "NEW1" in store.filter_index.matching({"category": "ldo"})
+
+    @pytest.mark.asyncio
+    async def test_search_indexes_built_off_event_loop(self, path, monkeypatch):
+        store = VectorStore(Config(vector_store_path=str(path)))
+        await store.initialize()
+        threads = []
+        rebuild = store.text_index.rebuild
+        monkeypatch.setattr(store.text_index, "rebuild", lambda index: (
+            threads.append(threading.current_thread()), rebuild(index)))
+
+        results = await asyncio.gather(*(store.search("p1") for _ in range(3)))
+        assert threads and threads[0] is not threading.main_thread()
+        assert len(threads) == 1
+        assert all(r and r[0]["part_number"] == "P1" for r in results)
@@ -0,0 +1,125 @@
+"""
+单元测试 - 多进程共享知识库 (文件锁 + 同步其他进程的写入)
+"""
+import asyncio
+import multiprocessing
+
+import pytest
+
+from ops.config import Config
+from ops.knowledge import VectorStore
+from ops.knowledge.locking import FileLock
+from ops.knowledge.storage import RecordLog
+
+
+def make_config(path):
+    return Config(vector_store_path=str(path), vector_store_fsync=False, embedding_cache=False)
+
+
+def add_parts(path, worker, count):
+    """子进程: 逐条写入，并不时合并快照"""
+    async def run():
+        store = VectorStore(make_config(path))
+        await store.initialize()
+        for i in range(count):
+            await store.bulk_import([{"part_number": f"W{worker}-{i}", "category": "Sensor"}])
+            if i % 10 == 9:
+                await store.save_index()
+        await store.close()
+
+    asyncio.run(run())
+
+
+class TestFileLock:
+    """文件锁测试"""
+
+    def test_reentrant(self, tmp_path):
+        lock = FileLock(tmp_path / "x.lock")
+        with lock:
+            with lock:
+                pass
+        with lock:
+            pass
+
+
+class TestRecordLogSync:
+    """多个 RecordLog 实例共享目录"""
+
+    def test_read_new_returns_foreign_records(self, tmp_path):
+        a, b = RecordLog(tmp_path), RecordLog(tmp_path)
+        a.load()
+        b.load()
+        assert b.append([("put", "A", {"v": 1})]) == []
+
+        assert a.changed()
+        assert a.read_new() == [{"op": "put", "key": "A", "entry": {"v": 1}}]
+        assert not a.changed()
+        foreign = a.append([("put", "B", {"v": 2})])
+        assert foreign == []
+
+    def test_stale_compaction_is_skipped(self, tmp_path):
+        a, b = RecordLog(tmp_path), RecordLog(tmp_path)
+        a.append([("put", "A", {"v": 1})])
+        a.load()
+        b.load()
+        expected_b = b.snapshot_id()
+
+        assert a.compact(RecordLog.encode_snapshot({"A": {"v": 1}}), a.offset, a.snapshot_id())
+        assert not b.compact(RecordLog.encode_snapshot({}), b.offset, expected_b)
+        assert b.read_new() is None
+        assert b.load() == {"A": {"v": 1}}
+
+
+class TestSharedVectorStore:
+    """两个 VectorStore 实例共享同一目录"""
+
+    @pytest.mark.asyncio
+    async def test_readers_see_other_writers(self, tmp_path):
+        a, b = VectorStore(make_config(tmp_path)), VectorStore(make_config(tmp_path))
+        await a.initialize()
+        await b.initialize()
+
+        await a.add_datasheet("LM358", {"category": "Op Amp"})
+        assert [r["part_number"] for r in await b.search("lm358")] == ["LM358"]
+        assert await b.get_part("LM358") is not None
+
+        await b.delete_part("LM358")
+        assert await a.get_part("LM358") is None
+
+    @pytest.mark.asyncio
+    async def test_reload_after_foreign_compaction(self, tmp_path):
+        a, b = VectorStore(make_config(tmp_path)), VectorStore(make_config(tmp_path))
+        await a.initialize()
+        await b.initialize()
+
+        await a.bulk_import([{"part_number": "NE555", "category": "Timer"}])
+        await a.save_index()
+        await b.add_datasheet("LM358", {"category": "Op Amp"})
+        await b.save_index()
+
+        assert set(b.index) == {"NE555", "LM358"}
+        assert b.embeddings.vector("NE555") is not None
+        await a.refresh()
+        assert set(a.index) == {"NE555", "LM358"}
+
+
+class TestMultiProcessWriters:
+    """多个进程并发写入"""
+
+    def test_concurrent_writers_keep_all_entries(self, tmp_path):
+        ctx = multiprocessing.get_context("spawn")
+        workers = [ctx.Process(target=add_parts, args=(tmp_path, w, 30)) for w in range(4)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join(60)
+            assert p.exitcode == 0
+
+        async def read():
+            store = VectorStore(make_config(tmp_path))
+            await store.initialize()
+            return store
+
+        store = asyncio.run(read())
+        assert len(store.index) == 120
+        assert len(store.embeddings) == 120
@@ -0,0 +1,82 @@
+"""
+单元测试 - PDF 解析进程池
+"""
+import os
+import sys
+import time
+
+import pytest
+
+from ops.config import Config
+from ops.parser import DatasheetParser
+from ops.parser.pool import PDFTimeoutError, PDFWorkerPool
+
+
+def worker_pid(_=None):
+    return os.getpid()
+
+
+def slow(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+@pytest.fixture
+def pool():
+    pool = PDFWorkerPool(workers=1, timeout=5.0, memory_mb=0)
+    yield pool
+    pool.shutdown()
+
+
+class TestPDFWorkerPool:
+    """进程池测试"""
+
+    @pytest.mark.asyncio
+    async def test_runs_in_worker_process(self, pool):
+        assert await pool.run(worker_pid) != os.getpid()
+        assert pool.stats()["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_timeout_recycles_pool(self, pool):
+        first = await pool.run(worker_pid)
+        pool.timeout = 0.5
+        with pytest.raises(PDFTimeoutError):
+            await pool.run(slow, 10)
+
+        pool.timeout = 5.0
+        assert await pool.run(worker_pid) != first
+        stats = pool.stats()
+        assert stats["timeouts"] == 1 and stats["restarts"] == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(sys.platform == "win32", reason="RLIMIT_AS is POSIX only")
+    async def test_memory_limit(self):
+        pool = PDFWorkerPool(workers=1, timeout=10.0, memory_mb=512)
+        try:
+            with pytest.raises(MemoryError):
+                await pool.run(allocate, 1024)
+            assert await pool.run(allocate, 16) == 16 * 1024 * 1024
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_invalid_pdf_fails_without_blocking(self, pool):
+        with pytest.raises(Exception):
+            await pool.extract(b"not a pdf")
+        assert pool.stats()["failed"] == 1
+
+
+class TestParserUsesPool:
+    """DatasheetParser 的文本解析不阻塞事件循环"""
+
+    @pytest.mark.asyncio
+    async def test_parse_text_file(self, tmp_path):
+        path = tmp_path / "ds.txt"
+        path.write_text("STM32F103 microcontroller, package: LQFP-48, 2.0-3.6V supply", encoding="utf-8")
+        result = await DatasheetParser(Config(cache_dir=str(tmp_path / "cache"))).parse_file(str(path))
+        assert result.part_number == "STM32F103"
+        assert result.package == "LQFP-48"
@@ -0,0 +1,257 @@
+"""
+单元测试 - 投机预取模块
+"""
+import pytest
+import asyncio
+
+from ops.prefetch import BoundedTaskGroup, EnrichmentPrefetcher
+
+
+class FakeEngine:
+    """记录调用情况的搜索引擎替身"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.price_calls = []
+        self.alt_calls = []
+        self.cancelled = []
+
+    async def compare_prices(self, part_number):
+        self.price_calls.append(part_number)
+        await asyncio.sleep(self.delay)
+        return {"best_price": 1.0, "total_stock": 100}
+
+    async def get_alternatives(self, part_number):
+        self.alt_calls.append(part_number)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(part_number)
+            raise
+        return [{"part_number": f"{part_number}-ALT"}]
+
+
+class TestBoundedTaskGroup:
+    """有界任务组测试"""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """测试并发数不超过上限"""
+        group = BoundedTaskGroup(max_concurrency=2)
+        running = 0
+        peak = 0
+
+        async def work():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        tasks = [group.spawn(i, work) for i in range(6)]
+        await asyncio.gather(*tasks)
+        await group.aclose()
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_spawn_dedupes_by_key(self):
+        """测试相同 key 复用同一任务"""
+        group = BoundedTaskGroup()
+        first = group.spawn("k", lambda: asyncio.sleep(0, result=1))
+        second = group.spawn("k", lambda: asyncio.sleep(0, result=2))
+
+        assert first is second
+        assert await first == 1
+        await group.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cancel_and_close(self):
+        """测试取消与关闭"""
+        group = BoundedTaskGroup()
+        task = group.spawn("slow", lambda: asyncio.sleep(10))
+
+        assert group.cancel(["slow", "missing"]) == 1
+        await group.aclose()
+        assert task.cancelled()
+
+        with pytest.raises(RuntimeError):
+            group.spawn("late", lambda: asyncio.sleep(0))
+
+
+class TestEnrichmentPrefetcher:
+    """富化预取器测试"""
+
+    def test_likely_top_k_uses_search_score(self):
+        """测试按搜索分数预测 top-k"""
+        candidates = [
+            {"part_number": "A", "score": 0.5},
+            {"part_number": "B", "score": 0.9},
+            {"part_number": "C", "match_score": 0.7},
+        ]
+
+        assert EnrichmentPrefetcher.likely_top_k(candidates, 2) == ["B", "C"]
+
+    @pytest.mark.asyncio
+    async def test_retain_cancels_dropped_candidates(self):
+        """测试跌出 top-k 的投机任务被取消"""
+        engine = FakeEngine(delay=10)
+        prefetcher = EnrichmentPrefetcher(engine, max_concurrency=4)
+        prefetcher.start(["A", "B"])
+        await asyncio.sleep(0)
+
+        cancelled = prefetcher.retain(["A"])
+        await asyncio.sleep(0)
+
+        assert cancelled == 2  # B 的价格与替代料任务
+        assert "B" in engine.cancelled
+        assert prefetcher.group.get(("alternatives", "A")) is not None
+        await prefetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_prefetched_lookup_is_reused(self):
+        """测试排序阶段复用预取任务，不重复查询"""
+        engine = FakeEngine()
+        prefetcher = EnrichmentPrefetcher(engine)
+        prefetcher.start(["A"])
+
+        price = await prefetcher.price("A")
+        alternatives = await prefetcher.alternatives("A")
+        await prefetcher.aclose()
+
+        assert price["best_price"] == 1.0
+        assert alternatives[0]["part_number"] == "A-ALT"
+        assert engine.price_calls == ["A"]
+        assert engine.alt_calls == ["A"]
+
+
+    @pytest.mark.asyncio
+    async def test_timeout_does_not_cancel_shared_lookup(self):
+        """测试等待超时不会取消共享的预取任务"""
+        engine = FakeEngine(delay=0.05)
+        prefetcher = EnrichmentPrefetcher(engine)
+        prefetcher.start(["A"])
+
+        with pytest.raises(asyncio.TimeoutError):
+            await prefetcher.price_result("A", timeout=0.01)
+        assert (await prefetcher.price_result("A", timeout=1))["best_price"] == 1.0
+        assert engine.price_calls == ["A"]
+        await prefetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_timeout_includes_queueing(self):
+        """测试排队等待并发槽位的时间计入超时"""
+        engine = FakeEngine(delay=0.1)
+        prefetcher = EnrichmentPrefetcher(engine, max_concurrency=1)
+        prefetcher.start(["A", "B"])
+
+        prices = await asyncio.gather(
+            *(prefetcher.price_result(pn, timeout=0.15) for pn in "AB"),
+            return_exceptions=True,
+        )
+        assert prices[0]["best_price"] == 1.0
+        assert isinstance(prices[1], asyncio.TimeoutError)
+        await prefetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cancel_on_timeout_spares_other_waiters(self):
+        """测试超时只在没有其他等待者时取消任务"""
+        group = BoundedTaskGroup()
+        task = group.spawn("slow", lambda: asyncio.sleep(0.1, result="done"))
+
+        patient = asyncio.ensure_future(group.result("slow", timeout=1))
+        with pytest.raises(asyncio.TimeoutError):
+            await group.result("slow", timeout=0.01, cancel_on_timeout=True)
+        assert not task.cancelled()
+        assert await patient == "done"
+
+        hung = group.spawn("hung", lambda: asyncio.sleep(10))
+        with pytest.raises(asyncio.TimeoutError):
+            await group.result("hung", timeout=0.01, cancel_on_timeout=True)
+        assert group.get("hung") is None
+        await group.aclose()
+        assert hung.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_result_of_cancelled_lookup(self):
+        group = BoundedTaskGroup(max_concurrency=1)
+        group.spawn("busy", lambda: asyncio.sleep(10))
+        group.spawn("queued", lambda: asyncio.sleep(0))
+        waiting = asyncio.ensure_future(group.result("queued", timeout=0.01))
+        await asyncio.sleep(0)
+
+        group.cancel(["queued"])
+        with pytest.raises(RuntimeError):
+            await waiting
+        await group.aclose()
+
+
+class TestAgentPrefetch:
+    """Agent 预取集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_select_only_enriches_top_k(self, tmp_path, monkeypatch):
+        """测试选型只为 top-k 获取替代料"""
+        from ops.agent import Agent
+        from ops.config import Config
+
+        agent = Agent(Config(vector_store_path=str(tmp_path / "vs"), cache_dir=str(tmp_path / "cache")))
+        original = agent.search_engine.get_alternatives
+        speculated, awaited = [], []
+        ranked = asyncio.Event()  # 排序完成、跌出 top-k 的投机任务已取消
+
+        original_start = EnrichmentPrefetcher.start
+        original_retain = EnrichmentPrefetcher.retain
+
+        def start(self, part_numbers):
+            part_numbers = list(part_numbers)
+            speculated.extend(part_numbers)
+            original_start(self, part_numbers)
+
+        def retain(self, part_numbers):
+            cancelled = original_retain(self, part_numbers)
+            ranked.set()
+            return cancelled
+
+        monkeypatch.setattr(EnrichmentPrefetcher, "start", start)
+        monkeypatch.setattr(EnrichmentPrefetcher, "retain", retain)
+
+        async def tracked(part_number):
+            await ranked.wait()
+            alternatives = await original(part_number)
+            awaited.append(part_number)
+            return alternatives
+
+        agent.search_engine.get_alternatives = tracked
+        result = await agent.select("3.3V LDO", top_k=2)
+
+        top = [r.part_number for r in result.recommended_parts]
+        assert 0 < len(top) <= 2 and speculated
+        # 只有最终 top-k 完成了替代料查询，投机预取的其他候选均被取消
+        assert sorted(awaited) == sorted(top)
+        assert all(isinstance(r.alternatives, list) for r in result.recommended_parts)
+
+    @pytest.mark.asyncio
+    async def test_price_deadline_with_hanging_lookups(self, tmp_path):
+        """测试比价全部挂起时排序在一个截止时间内完成，并释放并发槽位"""
+        from ops.agent import Agent
+        from ops.config import Config
+
+        agent = Agent(Config(vector_store_path=str(tmp_path / "vs"), cache_dir=str(tmp_path / "cache")))
+
+        async def hang(part_number):
+            await asyncio.sleep(60)
+
+        agent.search_engine.compare_prices = hang
+        agent.search_engine.price_timeout = lambda: 0.2
+        prefetcher = EnrichmentPrefetcher(agent.search_engine, max_concurrency=4)
+        candidates = [{"part_number": f"PN{i}", "specs": {}} for i in range(10)]
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await agent._analyze_and_rank(candidates, agent.parse_query("LDO"), prefetcher)
+
+        assert loop.time() - started < 1.0
+        assert len(results) == 10 and all(r.price is None for r in results)
+        assert prefetcher.group.keys() == []
+        await prefetcher.aclose()
@@ -0,0 +1,182 @@
+"""
+单元测试 - 自适应限流
+"""
+import pytest
+import asyncio
+import time
+
+from ops.ratelimit import AdaptiveLimiter, Outcome, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class TestTokenBucket:
+    """令牌桶测试"""
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+        assert bucket.reserve() == pytest.approx(0.2, abs=0.02)
+
+    def test_pause(self):
+        bucket = TokenBucket(rate=100, capacity=10)
+        bucket.pause(0.5)
+
+        assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+
+    @pytest.mark.asyncio
+    async def test_async_acquire_paces_requests(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+
+        started = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+
+        assert time.monotonic() - started >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiters_refund_tokens(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+        await bucket.acquire()
+
+        waiters = [asyncio.ensure_future(bucket.acquire()) for _ in range(20)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+        # 取消的预留全部归还，速率恢复，不留下 2 秒的欠账
+        assert bucket.reserve() == pytest.approx(0.1, abs=0.03)
+
+    def test_cancel_capped_at_capacity(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        bucket.cancel()
+
+        assert bucket._tokens == 2
+
+
+class TestAIMD:
+    """AIMD 并发调整测试"""
+
+    def make_limiter(self, **kwargs):
+        kwargs.setdefault("rate", 1000)
+        kwargs.setdefault("burst", 1000)
+        kwargs.setdefault("cooldown", 0)
+        return AdaptiveLimiter("test", **kwargs)
+
+    def test_additive_increase(self):
+        limiter = self.make_limiter(max_concurrency=8)
+        start = limiter.limit
+        for _ in range(20):
+            limiter.acquire_sync()
+            limiter.release(0.01, Outcome(status=200))
+
+        assert limiter.limit > start
+        assert limiter.limit <= 8
+
+    def test_multiplicative_decrease_on_429(self):
+        limiter = self.make_limiter(max_concurrency=8)
+        limiter.limit = 8.0
+        outcome = Outcome()
+        outcome.record(FakeResponse(429, {"retry-after": "0.3"}))
+
+        limiter.acquire_sync()
+        limiter.release(0.01, outcome)
+
+        assert limiter.limit == 4.0
+        assert limiter.bucket.rate == 500
+        assert limiter.throttled == 1
+        assert limiter.bucket.reserve() >= 0.25
+
+    def test_slow_response_backs_off(self):
+        """测试延迟远高于基线视为拥塞"""
+        limiter = self.make_limiter(max_concurrency=8)
+        limiter.limit = 8.0
+        for _ in range(3):
+            limiter.acquire_sync()
+            limiter.release(0.01)
+        limiter.acquire_sync()
+        limiter.release(0.5)
+
+        assert limiter.limit == 4.0
+
+    def test_client_errors_are_neutral(self):
+        limiter = self.make_limiter()
+        start = limiter.limit
+        limiter.acquire_sync()
+        limiter.release(0.01, Outcome(status=404, error=True))
+
+        assert limiter.limit == start
+
+    def test_timeout_exception_counts_as_congestion(self):
+        limiter = self.make_limiter(max_concurrency=8)
+        limiter.limit = 8.0
+
+        with pytest.raises(TimeoutError):
+            with limiter.slot_sync():
+                raise TimeoutError()
+
+        assert limiter.limit == 4.0
+        assert limiter.inflight == 0
+
+
+class TestConcurrency:
+    """并发上限测试"""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_capped_by_limit(self):
+        limiter = AdaptiveLimiter("test", rate=1000, burst=1000, max_concurrency=4)
+        limiter.limit = 2.0
+        active = peak = 0
+
+        async def call():
+            nonlocal active, peak
+            async with limiter.slot():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.02)
+                active -= 1
+
+        await asyncio.gather(*(call() for _ in range(8)))
+
+        assert peak <= 3  # 期间加性增长最多提升到 3
+        assert limiter.inflight == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_releases_slot(self):
+        limiter = AdaptiveLimiter("test", rate=1000, burst=1000, max_concurrency=2)
+        limiter.limit = 1.0
+        await limiter.acquire()
+
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        limiter.release(0.01)
+        assert limiter.inflight == 0
+        await asyncio.wait_for(limiter.acquire(), 0.5)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_slot_refunds_token(self):
+        limiter = AdaptiveLimiter("test", rate=10, burst=1, max_concurrency=8)
+        async with limiter.slot():
+            pass
+
+        for _ in range(3):
+            task = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert limiter.inflight == 0
+        assert limiter.bucket.reserve() < 0.1
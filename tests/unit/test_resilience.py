@@ -0,0 +1,155 @@
+"""
+单元测试 - 熔断与对冲请求
+"""
+import pytest
+import asyncio
+
+from ops.resilience import CircuitBreaker, CircuitOpenError, SourceGuard, hedged
+
+
+class TestCircuitBreaker:
+    """熔断器测试"""
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker("s", failure_threshold=3)
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.state == "closed"
+
+        breaker.record_failure()
+
+        assert breaker.state == "open"
+        assert not breaker.allow()
+        assert breaker.rejected == 1
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker("s", failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success(0.01)
+        breaker.record_failure()
+
+        assert breaker.state == "closed"
+
+    def test_slow_call_counts_as_failure(self):
+        breaker = CircuitBreaker("s", failure_threshold=1, slow_call_seconds=0.1)
+        breaker.record_success(0.5)
+
+        assert breaker.state == "open"
+
+    def test_half_open_single_probe(self):
+        breaker = CircuitBreaker("s", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        assert not breaker.allow()  # 只放行一个探测请求
+
+        breaker.record_success(0.01)
+        assert breaker.state == "closed"
+
+    def test_half_open_failure_reopens(self):
+        breaker = CircuitBreaker("s", failure_threshold=5, reset_timeout=0.05)
+        for _ in range(5):
+            breaker.record_failure()
+        breaker._opened_at -= 1
+        assert breaker.allow()
+
+        breaker.record_failure()
+
+        assert breaker._state == "open"
+
+
+class TestHedged:
+    """对冲请求测试"""
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_when_first_is_slow(self):
+        delays = iter([1.0, 0.01])
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(next(delays))
+            return len(calls)
+
+        started = asyncio.get_running_loop().time()
+        result = await hedged(fn, delay=0.05)
+
+        assert result == 2
+        assert asyncio.get_running_loop().time() - started < 0.5
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_when_fast(self):
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            return "ok"
+
+        assert await hedged(fn, delay=0.05) == "ok"
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_both_fail_raises(self):
+        async def fn():
+            await asyncio.sleep(0.02)
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await hedged(fn, delay=0.01)
+
+
+class TestSourceGuard:
+    """数据源保护层测试"""
+
+    @pytest.mark.asyncio
+    async def test_timeouts_open_breaker(self):
+        guard = SourceGuard("slow", CircuitBreaker("slow", failure_threshold=2))
+
+        async def slow():
+            await asyncio.sleep(1)
+
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await guard.call(slow, timeout=0.02)
+
+        with pytest.raises(CircuitOpenError):
+            await guard.call(slow, timeout=0.02)
+        assert guard.stats()["state"] == "open"
+
+    @pytest.mark.asyncio
+    async def test_hedge_uses_observed_p95(self):
+        guard = SourceGuard("s", hedge_min_samples=5)
+        for _ in range(10):
+            guard.latency.record(0.01)
+        delays = iter([1.0, 0.0])
+
+        async def fn():
+            await asyncio.sleep(next(delays))
+            return "ok"
+
+        assert await guard.call(fn, timeout=0.5) == "ok"
+        assert guard.hedges == 1
+
+    @pytest.mark.asyncio
+    async def test_open_breaker_skips_source_in_search(self, tmp_path):
+        """测试熔断的数据源在搜索中被立即跳过"""
+        from ops.config import Config
+        from ops.resilience import get_guard
+        from ops.search import SearchEngine
+
+        engine = SearchEngine(Config(vector_store_path=str(tmp_path / "vs")))
+        for name in engine.sources.names():
+            engine.sources.unregister(name)
+
+        async def never(query, category, constraints, limit):
+            await asyncio.sleep(10)
+
+        engine.register_source("tripped-source", never)
+        get_guard("tripped-source").breaker._open()
+
+        started = asyncio.get_running_loop().time()
+        await engine.search("x", deadline=1.0)
+
+        assert engine.last_search_report == {"tripped-source": "open"}
+        assert asyncio.get_running_loop().time() - started < 0.1
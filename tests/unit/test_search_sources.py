@@ -0,0 +1,162 @@
+"""
+单元测试 - 多数据源并发搜索与结果合并
+"""
+import pytest
+import asyncio
+
+from ops.config import Config
+from ops.search import SearchEngine
+from ops.search.sources import ResultMerger, SearchSource, SourceRegistry
+
+
+def make_source(results, delay=0.0, error=None):
+    """构造一个测试数据源"""
+    async def search(query, category, constraints, limit):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return [dict(r) for r in results]
+    return search
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """只包含测试数据源的搜索引擎"""
+    engine = SearchEngine(Config(vector_store_path=str(tmp_path / "vs")))
+    for name in engine.sources.names():
+        engine.sources.unregister(name)
+    return engine
+
+
+class TestResultMerger:
+    """结果合并测试"""
+
+    def test_dedup_by_normalized_mpn_keeps_higher_score(self):
+        """测试按规范化型号去重，保留高分记录"""
+        merger = ResultMerger()
+        merger.add("database", [{
+            "part_number": "AMS1117-3.3", "description": "LDO", "score": 0.6,
+            "prices": [{"vendor": "LCSC", "price": 0.3, "stock": 100}],
+        }])
+        merger.add("mouser", [{
+            "part_number": "ams1117 3.3", "manufacturer": "AMS", "score": 0.9,
+            "prices": [{"vendor": "Mouser", "price": 0.5, "stock": 50}],
+        }])
+
+        results = merger.results()
+
+        assert len(results) == 1
+        merged = results[0]
+        assert merged["part_number"] == "ams1117 3.3"
+        assert merged["description"] == "LDO"  # 由低分记录补全
+        assert merged["sources"] == ["mouser", "database"]
+        assert merged["price"] == 0.3
+        assert merged["stock"] == 150
+
+    def test_results_sorted_and_limited(self):
+        """测试按分数排序并截断"""
+        merger = ResultMerger()
+        merger.add("a", [{"part_number": f"P{i}", "score": i / 10} for i in range(5)])
+
+        results = merger.results(limit=2)
+
+        assert [r["part_number"] for r in results] == ["P4", "P3"]
+
+
+class TestSourceRegistry:
+    """数据源注册表测试"""
+
+    def test_register_and_disable(self):
+        registry = SourceRegistry()
+        registry.register(SearchSource("a", make_source([])))
+        registry.register(SearchSource("b", make_source([]), enabled=False))
+
+        assert registry.names() == ["a", "b"]
+        assert [s.name for s in registry.active()] == ["a"]
+
+    def test_default_sources(self, tmp_path):
+        """测试默认注册数据库、知识库、嘉立创目录"""
+        engine = SearchEngine(Config(vector_store_path=str(tmp_path / "vs")))
+
+        assert engine.sources.names() == ["database", "knowledge", "jlc"]
+
+
+class TestFanOut:
+    """并发查询测试"""
+
+    @pytest.mark.asyncio
+    async def test_sources_queried_concurrently(self, engine):
+        """测试多个数据源并发查询"""
+        for i in range(3):
+            engine.register_source(f"s{i}", make_source([{"part_number": f"P{i}"}], delay=0.1))
+
+        started = asyncio.get_running_loop().time()
+        results = await engine.search("x", deadline=1.0)
+        elapsed = asyncio.get_running_loop().time() - started
+
+        assert len(results) == 3
+        assert elapsed < 0.25
+
+    @pytest.mark.asyncio
+    async def test_deadline_returns_partial_results(self, engine):
+        """测试截止时间到达时返回已到达的结果"""
+        engine.register_source("fast", make_source([{"part_number": "FAST"}]))
+        engine.register_source("slow", make_source([{"part_number": "SLOW"}], delay=5), timeout=10)
+
+        results = await engine.search("x", deadline=0.1)
+
+        assert [r["part_number"] for r in results] == ["FAST"]
+        assert engine.last_search_report == {"fast": "ok", "slow": "deadline"}
+
+    @pytest.mark.asyncio
+    async def test_per_source_timeout_and_errors(self, engine):
+        """测试单源超时与异常不影响其他数据源"""
+        engine.config.source_timeouts = {"slow": 0.05}
+        engine.register_source("ok", make_source([{"part_number": "OK"}]))
+        engine.register_source("slow", make_source([{"part_number": "SLOW"}], delay=1))
+        engine.register_source("bad", make_source([], error=RuntimeError("boom")))
+
+        results = await engine.search("x", deadline=2.0)
+
+        assert [r["part_number"] for r in results] == ["OK"]
+        assert engine.last_search_report == {"ok": "ok", "slow": "timeout", "bad": "error"}
+
+    @pytest.mark.asyncio
+    async def test_limit_is_respected(self, engine):
+        """测试不再固定截断为 20 条"""
+        engine.register_source("many", make_source(
+            [{"part_number": f"P{i}", "score": 0.5} for i in range(30)]
+        ))
+
+        assert len(await engine.search("x", limit=25)) == 25
+        assert len(await engine.search("x", limit=3)) == 3
+
+
+class TestVendorSource:
+    """电商平台数据源测试"""
+
+    @pytest.mark.asyncio
+    async def test_vendor_results_merged_with_database(self, tmp_path, stub_server):
+        """测试电商平台结果与内置数据库按型号合并"""
+        from ops.http_pool import HTTPPool
+        from ops.search.vendors import MouserConnector
+
+        stub_server.routes[("POST", "/api/v1/search/keyword")] = (200, {}, {
+            "SearchResults": {"Parts": [{
+                "ManufacturerPartNumber": "AMS1117-3.3",
+                "AvailabilityInStock": "10",
+                "PriceBreaks": [{"Price": "$0.40"}],
+            }]},
+        })
+        pool = HTTPPool()
+        engine = SearchEngine(Config(vector_store_path=str(tmp_path / "vs")))
+        engine.vendors["mouser"] = MouserConnector("KEY", base_url=stub_server.url, pool=pool)
+        engine.register_source("mouser", engine._vendor_search_fn("mouser"))
+
+        results = await engine.search("AMS1117", limit=5)
+        await pool.aclose()
+
+        ams = next(r for r in results if r["part_number"].startswith("AMS1117"))
+        assert "mouser" in ams["sources"]
+        assert "database" in ams["sources"]
+        assert "Mouser" in [p["vendor"] for p in ams["prices"]]
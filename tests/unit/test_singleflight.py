@@ -0,0 +1,163 @@
+"""
+单元测试 - 请求合并 (single-flight)
+"""
+import pytest
+import asyncio
+
+from ops.singleflight import SingleFlight, get_flight, singleflight_stats
+
+
+class TestSingleFlight:
+    """single-flight 测试"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """测试并发相同调用只执行一次"""
+        flight = SingleFlight("test")
+        executions = 0
+
+        async def work():
+            nonlocal executions
+            executions += 1
+            await asyncio.sleep(0.01)
+            return {"value": [1, 2]}
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+        assert executions == 1
+        assert all(r == {"value": [1, 2]} for r in results)
+        assert flight.stats() == {"calls": 5, "executions": 1, "coalesced": 4, "inflight": 0}
+
+    @pytest.mark.asyncio
+    async def test_coalesced_results_are_independent(self):
+        """测试合并的调用方拿到互不影响的结果"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            return {"items": []}
+
+        a, b = await asyncio.gather(flight.do("k", work), flight.do("k", work))
+        a["items"].append("x")
+
+        assert b["items"] == []
+
+    @pytest.mark.asyncio
+    async def test_different_keys_not_coalesced(self):
+        """测试不同 key 分别执行"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            return 1
+
+        await asyncio.gather(flight.do("a", work), flight.do("b", work))
+
+        assert flight.executions == 2
+        assert flight.coalesced == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_all_callers(self):
+        """测试异常传递给所有调用方"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flight.do("k", work), flight.do("k", work), return_exceptions=True
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.inflight() == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """测试单个调用方超时取消不影响其他调用方"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        impatient = asyncio.wait_for(flight.do("k", work), timeout=0.01)
+        patient = flight.do("k", work)
+        results = await asyncio.gather(impatient, patient, return_exceptions=True)
+
+        assert isinstance(results[0], asyncio.TimeoutError)
+        assert results[1] == "done"
+
+    def test_named_flights_are_shared(self):
+        """测试进程级命名合并组"""
+        assert get_flight("shared-test") is get_flight("shared-test")
+        assert "shared-test" in singleflight_stats()
+
+
+class TestSearchEngineCoalescing:
+    """SearchEngine 合并测试"""
+
+    @pytest.mark.asyncio
+    async def test_identical_searches_coalesced(self, tmp_path):
+        """测试相同参数的并发搜索只查询一次数据源"""
+        from ops.config import Config
+        from ops.search import SearchEngine
+
+        config = Config(vector_store_path=str(tmp_path / "vs"))
+        calls = 0
+
+        async def source(query, category, constraints, limit):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return [{"part_number": "STM32F103C8T6", "score": 0.9}]
+
+        engines = []
+        for _ in range(3):
+            engine = SearchEngine(config)
+            for name in engine.sources.names():
+                engine.sources.unregister(name)
+            engine.register_source("hot", source)
+            engines.append(engine)
+
+        results = await asyncio.gather(
+            engines[0].search("STM32F103C8T6"),
+            engines[1].search("  stm32f103c8t6 "),
+            engines[2].search("STM32F103C8T6"),
+        )
+
+        assert calls == 1
+        assert all(r[0]["part_number"] == "STM32F103C8T6" for r in results)
+
+    @pytest.mark.asyncio
+    async def test_compare_prices_coalesced_by_normalized_mpn(self, tmp_path):
+        """测试比价按规范化型号合并"""
+        from ops.config import Config
+        from ops.search import SearchEngine
+
+        engine = SearchEngine(Config(vector_store_path=str(tmp_path / "vs")))
+        flight = get_flight("compare_prices")
+        before = flight.coalesced
+
+        a, b = await asyncio.gather(
+            engine.compare_prices("AMS1117-3.3"),
+            engine.compare_prices("ams1117 3.3"),
+        )
+
+        assert flight.coalesced == before + 1
+        assert a["best_price"] == b["best_price"]
+        assert b["part_number"] == "ams1117 3.3"
+
+    @pytest.mark.asyncio
+    async def test_coalescing_can_be_disabled(self, tmp_path):
+        """测试关闭合并"""
+        from ops.config import Config
+        from ops.search import SearchEngine
+
+        engine = SearchEngine(Config(vector_store_path=str(tmp_path / "vs"), coalesce_requests=False))
+        flight = get_flight("compare_prices")
+        before = flight.calls
+
+        await asyncio.gather(engine.compare_prices("CH340G"), engine.compare_prices("CH340G"))
+
+        assert flight.calls == before
@@ -0,0 +1,69 @@
+"""
+单元测试 - 知识库关键词倒排索引
+"""
+import pytest
+
+from ops.config import Config
+from ops.knowledge import VectorStore, get_vector_store
+from ops.knowledge.text_index import TextIndex, search_text
+
+
+def entry(pn, **data):
+    return {"part_number": pn, "data": {"part_number": pn, **data}, "embeddings": [0.5] * 128}
+
+
+class TestTextIndex:
+    """倒排索引测试"""
+
+    def test_search_text_excludes_embeddings(self):
+        text = search_text(entry("LM358", category="Op Amp"))
+        assert "op amp" in text
+        assert "0.5" not in text
+
+    def test_substring_candidates(self):
+        index = TextIndex()
+        index.add("LM358", entry("LM358", category="Op Amp"))
+        index.add("NE555", entry("NE555", category="Timer"))
+
+        assert set(index.candidates(["lm35"], "lm35")) == {"LM358"}
+        assert set(index.candidates(["3.3v"], "3.3v")) == set()
+
+    def test_incremental_update(self):
+        index = TextIndex()
+        index.add("A", entry("A", category="Sensor"))
+        index.add("A", entry("A", category="Timer"))
+        assert "sensor" not in index.postings
+
+        index.remove("A")
+        assert not index.postings and not index.texts
+
+    def test_punctuation_only_query_scans_all(self):
+        index = TextIndex()
+        index.add("A", entry("A"))
+        assert set(index.candidates(["--"], "--")) == {"A"}
+
+
+class TestVectorStoreKeywordSearch:
+    """VectorStore 关键词搜索测试"""
+
+    @pytest.mark.asyncio
+    async def test_search_uses_index_after_reload_and_delete(self, tmp_path):
+        config = Config(vector_store_path=str(tmp_path / "vs"))
+        store = VectorStore(config)
+        await store.initialize()
+        await store.add_datasheet("ESP32-WROOM", {"category": "WiFi Module", "voltage": "3.3V"})
+        await store.bulk_import([{"part_number": "NE555", "category": "Timer"}])
+
+        reopened = VectorStore(config)
+        await reopened.initialize()
+        results = await reopened.search("wifi 3.3v")
+        assert [r["part_number"] for r in results] == ["ESP32-WROOM"]
+
+        await reopened.delete_part("ESP32-WROOM")
+        assert await reopened.search("wifi") == []
+        assert [r["part_number"] for r in await reopened.search("timer")] == ["NE555"]
+
+    @pytest.mark.asyncio
+    async def test_shared_store_is_cached(self, tmp_path):
+        config = Config(vector_store_path=str(tmp_path / "vs"))
+        assert await get_vector_store(config) is await get_vector_store(config)
@@ -0,0 +1,191 @@
+"""
+单元测试 - 量化内存映射向量文件
+"""
+from pathlib import Path
+from types import SimpleNamespace
+import asyncio
+import importlib.util
+import json
+
+import numpy as np
+import pytest
+
+from ops.config import Config
+from ops.knowledge import VectorStore
+from ops.knowledge.matrix import EmbeddingMatrix, normalize_rows
+from ops.knowledge.vectors import QuantizedVectors, VectorTable, quantize
+
+
+def random_vectors(n=300, dim=32, seed=0):
+    return normalize_rows(np.random.default_rng(seed).normal(size=(n, dim)))
+
+
+def write_base(path, vectors, dtype="int8", exact=True):
+    codes, scale = quantize(vectors, dtype)
+    keys = [f"K{i}" for i in range(len(vectors))]
+    QuantizedVectors.write(path, keys, codes, scale, vectors if exact else None)
+    return QuantizedVectors.open(path)
+
+
+class TestQuantizedVectors:
+    """向量文件测试"""
+
+    @pytest.mark.parametrize("dtype", ["int8", "float16"])
+    def test_roundtrip_is_memory_mapped(self, tmp_path, dtype):
+        vectors = random_vectors()
+        base = write_base(tmp_path / "v.bin", vectors, dtype)
+
+        assert isinstance(base.codes, np.memmap)
+        assert base.dtype == dtype
+        assert base.keys[5] == "K5"
+        assert np.allclose(base.vectors([1, 2]), vectors[1:3], atol=1e-3)
+
+        scores = base.scores(vectors[:3])
+        assert np.allclose(scores, vectors[:3] @ vectors.T, atol=0.02)
+
+    def test_file_is_smaller_than_json(self, tmp_path):
+        vectors = random_vectors(n=500, dim=128)
+        write_base(tmp_path / "v.bin", vectors, exact=False)
+
+        json_size = len(json.dumps(vectors.tolist()))
+        assert (tmp_path / "v.bin").stat().st_size * 5 < json_size
+
+    def test_rerank_copy_keeps_file_smaller_than_float32(self, tmp_path):
+        vectors = random_vectors(n=2000, dim=128)
+        base = write_base(tmp_path / "v.bin", vectors)
+
+        assert base.exact.dtype == np.float16
+        assert (tmp_path / "v.bin").stat().st_size < vectors.astype(np.float32).nbytes
+
+    def test_read_into_memory_on_windows(self, tmp_path, monkeypatch):
+        """Windows 上不映射文件，合并时才能替换"""
+        vectors = random_vectors(n=20, dim=8)
+        codes, scale = quantize(vectors, "int8")
+        QuantizedVectors.write(tmp_path / "v.bin", [f"K{i}" for i in range(20)], codes, scale, vectors)
+
+        monkeypatch.setattr("ops.knowledge.vectors.os", SimpleNamespace(name="nt"))
+        base = QuantizedVectors.open(tmp_path / "v.bin")
+        assert not isinstance(base.codes, np.memmap) and not isinstance(base.exact, np.memmap)
+        assert np.array_equal(base.codes, codes)
+        assert np.allclose(base.vectors([3]), vectors[3:4], atol=1e-3)
+
+    def test_corrupt_file_ignored(self, tmp_path):
+        (tmp_path / "v.bin").write_bytes(b"not a vector file")
+        assert QuantizedVectors.open(tmp_path / "v.bin") is None
+
+
+class TestVectorTable:
+    """向量文件 + 内存增量测试"""
+
+    def test_rerank_matches_exact_search(self, tmp_path):
+        vectors = random_vectors()
+        table = VectorTable(write_base(tmp_path / "v.bin", vectors), rerank=4)
+        exact = EmbeddingMatrix()
+        exact.set_many((f"K{i}", v) for i, v in enumerate(vectors))
+
+        for query in random_vectors(n=10, seed=1):
+            hits = table.search(query, top_k=5)
+            expected = exact.search(query, top_k=5)
+            assert [k for k, _ in hits] == [k for k, _ in expected]
+            assert hits[0][1] == pytest.approx(expected[0][1], abs=2e-3)
+
+    def test_overrides_and_removals(self, tmp_path):
+        vectors = random_vectors(n=10, dim=4)
+        table = VectorTable(write_base(tmp_path / "v.bin", vectors))
+
+        table.remove("K0")
+        table.set_many([("K1", [1, 0, 0, 0]), ("NEW", [0, 1, 0, 0])])
+
+        assert len(table) == 10
+        assert "K0" not in table
+        assert np.allclose(table.vector("K1"), [1, 0, 0, 0])
+        assert table.search([1, 0, 0, 0], top_k=1)[0] == ("K1", pytest.approx(1.0))
+        assert all(key != "K0" for key, _ in table.search(vectors[0], top_k=10))
+
+
+class TestVectorStoreVectorFile:
+    """VectorStore 向量文件持久化测试"""
+
+    def make_store(self, tmp_path, **kwargs):
+        return VectorStore(Config(vector_store_path=str(tmp_path / "vs"), vector_index="flat", **kwargs))
+
+    @pytest.mark.asyncio
+    async def test_compaction_moves_vectors_out_of_snapshot(self, tmp_path):
+        store = self.make_store(tmp_path)
+        await store.initialize()
+        await store.bulk_import([
+            {"part_number": "ESP32", "category": "wifi bluetooth"},
+            {"part_number": "LM358", "category": "opamp amplifier"},
+        ])
+        await store.save_index()
+
+        snapshot = json.loads((tmp_path / "vs" / "index.json").read_text())
+        assert all("embeddings" not in entry for entry in snapshot.values())
+        assert (tmp_path / "vs" / QuantizedVectors.FILE).exists()
+
+        reopened = self.make_store(tmp_path)
+        await reopened.initialize()
+        assert reopened.embeddings.stats()["file_vectors"] == 2
+        assert (await reopened.semantic_search("wifi", top_k=1))[0]["part_number"] == "ESP32"
+        assert len((await reopened.get_part("lm358"))["embeddings"]) == 128
+
+    @pytest.mark.asyncio
+    async def test_log_overrides_vector_file(self, tmp_path):
+        """测试合并后重新添加/删除的条目不会用到向量文件中的旧向量"""
+        store = self.make_store(tmp_path)
+        await store.initialize()
+        await store.bulk_import([{"part_number": "A"}, {"part_number": "B"}, {"part_number": "C"}])
+        await store.save_index()
+
+        await store.add_datasheet("A", {"category": "re-added"})
+        await store.delete_part("B")
+
+        reopened = self.make_store(tmp_path)
+        await reopened.initialize()
+        assert "A" not in reopened.embeddings
+        assert "B" not in reopened.embeddings
+        assert "C" in reopened.embeddings
+        await reopened.create_embeddings()
+        assert "A" in reopened.embeddings
+
+    @pytest.mark.asyncio
+    async def test_bench_ann_reads_store_vectors(self, tmp_path):
+        """scripts/bench_ann.py --store: 读取向量文件与增量中的全部向量"""
+        spec = importlib.util.spec_from_file_location(
+            "bench_ann", Path(__file__).parents[2] / "scripts" / "bench_ann.py")
+        bench_ann = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(bench_ann)
+
+        store = self.make_store(tmp_path)
+        await store.initialize()
+        await store.bulk_import([{"part_number": f"P{i}", "category": "sensor"} for i in range(5)])
+        await store.save_index()
+        await store.add_datasheet("NEW", {"category": "ldo"})
+        await store.create_embeddings()
+        await store.close()
+
+        keys, vectors = await asyncio.to_thread(bench_ann.load_store, str(tmp_path / "vs"))
+        assert sorted(keys) == ["NEW"] + [f"P{i}" for i in range(5)]
+        assert vectors.shape == (6, 128)
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1, atol=1e-2)
+
+    @pytest.mark.asyncio
+    async def test_float16_stores_no_rerank_copy(self, tmp_path):
+        store = self.make_store(tmp_path, vector_store_quantization="float16")
+        await store.initialize()
+        await store.bulk_import([{"part_number": f"P{i}", "category": "sensor"} for i in range(5)])
+        await store.save_index()
+
+        assert store.embeddings.base.exact is None
+        assert len(await store.semantic_search("sensor", top_k=3)) == 3
+
+    @pytest.mark.asyncio
+    async def test_float16_without_rerank(self, tmp_path):
+        store = self.make_store(tmp_path, vector_store_quantization="float16", vector_store_rerank=0)
+        await store.initialize()
+        await store.bulk_import([{"part_number": f"P{i}", "category": "sensor"} for i in range(5)])
+        await store.save_index()
+
+        assert store.embeddings.base.dtype == "float16"
+        assert store.embeddings.base.exact is None
+        assert len(await store.semantic_search("sensor", top_k=3)) == 3
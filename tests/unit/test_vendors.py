@@ -0,0 +1,236 @@
+"""
+单元测试 - HTTP 连接池与电商平台连接器 (本地桩服务器)
+"""
+import pytest
+
+from ops.config import Config
+from ops.http_pool import HTTPPool, close_http_pool, get_http_pool
+from ops.search.vendors import (
+    DigiKeyConnector,
+    LCSCConnector,
+    MouserConnector,
+    OctopartConnector,
+    build_connectors,
+    parse_price,
+    parse_stock,
+)
+
+
+@pytest.fixture
+async def pool():
+    """独立连接池"""
+    pool = HTTPPool(timeout=5.0)
+    yield pool
+    await pool.aclose()
+
+
+class TestHTTPPool:
+    """连接池测试"""
+
+    @pytest.mark.asyncio
+    async def test_client_per_host(self, pool):
+        """测试同一主机复用客户端"""
+        a = pool.client_for("https://api.mouser.com/a")
+        b = pool.client_for("https://api.mouser.com/b")
+        c = pool.client_for("https://api.digikey.com/a")
+
+        assert a is b
+        assert a is not c
+
+    @pytest.mark.asyncio
+    async def test_keepalive_reuses_connection(self, pool, stub_server):
+        """测试 keep-alive 复用同一 TCP 连接"""
+        stub_server.routes[("GET", "/ping")] = (200, {}, {"ok": True})
+
+        for _ in range(3):
+            response = await pool.get(f"{stub_server.url}/ping")
+            assert response.json() == {"ok": True}
+
+        assert len(stub_server.requests) == 3
+        assert len(stub_server.connections) == 1
+
+    @pytest.mark.asyncio
+    async def test_host_limits_override(self):
+        """测试个别主机连接数覆盖"""
+        pool = HTTPPool(max_connections_per_host=10, host_limits={"API.MOUSER.COM": 2})
+        client = pool.client_for("https://api.mouser.com/x")
+        limits = client._transport._pool._max_connections
+
+        assert limits == 2
+        await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_shared_pool_per_loop(self, tmp_path):
+        """测试同一事件循环内共享连接池"""
+        try:
+            assert get_http_pool(Config(cache_dir=str(tmp_path / "cache"))) is get_http_pool()
+        finally:
+            await close_http_pool()
+
+
+class TestParsers:
+    """价格/库存解析测试"""
+
+    def test_parse_price(self):
+        assert parse_price("$1.23") == 1.23
+        assert parse_price("¥0,85") == 0.85
+        assert parse_price("1.234,50 €") == 1234.5
+        assert parse_price(2) == 2.0
+        assert parse_price(None) is None
+        assert parse_price("N/A") is None
+
+    def test_parse_stock(self):
+        assert parse_stock("12,345 In Stock") == 12345
+        assert parse_stock(None) == 0
+        assert parse_stock(7) == 7
+
+
+class TestConnectors:
+    """连接器测试"""
+
+    @pytest.mark.asyncio
+    async def test_mouser_search(self, pool, stub_server):
+        """测试 Mouser 关键词搜索"""
+        stub_server.routes[("POST", "/api/v1/search/keyword")] = (200, {}, {
+            "Errors": [],
+            "SearchResults": {"Parts": [{
+                "ManufacturerPartNumber": "STM32F103C8T6",
+                "Manufacturer": "STMicroelectronics",
+                "Description": "ARM Microcontrollers",
+                "Category": "MCU",
+                "AvailabilityInStock": "1520",
+                "PriceBreaks": [{"Quantity": 1, "Price": "$3.48", "Currency": "USD"}],
+                "DataSheetUrl": "https://example.com/ds.pdf",
+            }]},
+        })
+        connector = MouserConnector("KEY", base_url=stub_server.url, pool=pool)
+
+        results = await connector.search("STM32F103", limit=3)
+
+        request = stub_server.requests[0]
+        assert request["query"]["apiKey"] == "KEY"
+        assert request["body"]["SearchByKeywordRequest"]["records"] == 3
+        assert results[0]["part_number"] == "STM32F103C8T6"
+        assert results[0]["price"] == 3.48
+        assert results[0]["stock"] == 1520
+        assert results[0]["source"] == "mouser"
+
+    @pytest.mark.asyncio
+    async def test_digikey_search(self, pool, stub_server):
+        """测试 Digi-Key 关键词搜索"""
+        stub_server.routes[("POST", "/products/v4/search/keyword")] = (200, {}, {
+            "Products": [{
+                "ManufacturerProductNumber": "AMS1117-3.3",
+                "Manufacturer": {"Name": "Advanced Monolithic Systems"},
+                "Description": {"ProductDescription": "IC REG LINEAR 3.3V 1A"},
+                "Category": {"Name": "PMIC"},
+                "QuantityAvailable": 5000,
+                "UnitPrice": 0.41,
+            }],
+        })
+        connector = DigiKeyConnector("TOKEN", client_id="CID", base_url=stub_server.url, pool=pool)
+
+        results = await connector.search("AMS1117")
+
+        headers = stub_server.requests[0]["headers"]
+        assert headers["Authorization"] == "Bearer TOKEN"
+        assert headers["X-DIGIKEY-Client-Id"] == "CID"
+        assert results[0]["description"] == "IC REG LINEAR 3.3V 1A"
+        assert results[0]["prices"][0]["vendor"] == "Digi-Key"
+
+    @pytest.mark.asyncio
+    async def test_octopart_get_price(self, pool, stub_server):
+        """测试 Octopart 比价取最低价并汇总库存"""
+        stub_server.routes[("POST", "/graphql")] = (200, {}, {"data": {"supSearch": {"results": [{
+            "part": {
+                "mpn": "CH340G",
+                "manufacturer": {"name": "WCH"},
+                "sellers": [
+                    {"company": {"name": "LCSC"}, "offers": [{
+                        "inventoryLevel": 3000,
+                        "prices": [{"quantity": 10, "price": 0.5, "currency": "USD"},
+                                   {"quantity": 1, "price": 0.6, "currency": "USD"}],
+                    }]},
+                    {"company": {"name": "Arrow"}, "offers": [{
+                        "inventoryLevel": 100,
+                        "prices": [{"quantity": 1, "price": 0.9, "currency": "USD"}],
+                    }]},
+                ],
+            },
+        }]}}})
+        connector = OctopartConnector("TOKEN", base_url=stub_server.url, pool=pool)
+
+        price = await connector.get_price("ch340g")
+
+        assert price["best_price"] == 0.6
+        assert price["best_vendor"] == "LCSC"
+        assert price["total_stock"] == 3100
+
+    @pytest.mark.asyncio
+    async def test_lcsc_search(self, pool, stub_server):
+        """测试立创商城搜索"""
+        stub_server.routes[("GET", "/v1/products/search")] = (200, {}, {"result": {"productList": [{
+            "productModel": "CH340N",
+            "productCode": "C2977777",
+            "brandNameEn": "WCH",
+            "stockNumber": 42000,
+            "productPriceList": [{"ladder": 10, "productPrice": "1.05"},
+                                 {"ladder": 1, "productPrice": "1.20"}],
+        }]}})
+        connector = LCSCConnector("KEY", base_url=stub_server.url, pool=pool)
+
+        results = await connector.search("CH340N")
+
+        assert results[0]["price"] == 1.2
+        assert results[0]["prices"][0]["lcsc_code"] == "C2977777"
+
+    @pytest.mark.asyncio
+    async def test_http_error_raises(self, pool, stub_server):
+        """测试 HTTP 错误向上抛出"""
+        import httpx
+        stub_server.routes[("POST", "/api/v1/search/keyword")] = (500, {}, {"error": "boom"})
+        connector = MouserConnector("KEY", base_url=stub_server.url, pool=pool)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await connector.search("X")
+
+    def test_build_connectors_only_enabled(self):
+        """测试只创建配置了 Key 的连接器"""
+        config = Config()
+        config.api_keys.mouser = "KEY"
+
+        connectors = build_connectors(config)
+
+        assert list(connectors) == ["mouser"]
+
+
+class TestLCSCClient:
+    """LCSCClient 测试"""
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_builtin_without_key(self):
+        """测试无 Key 时使用内置数据库"""
+        from ops.jlc import LCSCClient
+
+        results = await LCSCClient().search_parts("CH340", limit=5)
+
+        assert results
+        assert all(r.get("source") == "builtin" for r in results if "jlc_part_number" not in r)
+
+    @pytest.mark.asyncio
+    async def test_uses_api_with_key(self, stub_server, tmp_path):
+        """测试配置 Key 时走开放接口 (响应缓存写入临时目录)"""
+        from ops.config import Config
+        from ops.jlc import LCSCClient
+        stub_server.routes[("GET", "/v1/products/search")] = (200, {}, {"result": {"productList": [
+            {"productModel": "CH340C", "productPriceList": [{"ladder": 1, "productPrice": 1.5}]},
+        ]}})
+
+        pool = HTTPPool.from_config(Config(cache_dir=str(tmp_path / "cache")))
+        try:
+            results = await LCSCClient("KEY", base_url=stub_server.url, pool=pool).search_parts("CH340")
+        finally:
+            await pool.aclose()
+
+        assert results[0]["part_number"] == "CH340C"
+        assert results[0]["source"] == "lcsc"
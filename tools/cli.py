@@ -3,6 +3,7 @@
 OpenPartSelector CLI 入口
 """
 import sys
+import json
 import asyncio
 from typing import Optional
 
@@ -59,6 +60,40 @@ async def main():
         help="datasheet 文件路径或 URL"
     )
     
+    # ingest 命令
+    ingest_parser = subparsers.add_parser("ingest", help="批量导入 datasheet 目录到知识库")
+    ingest_parser.add_argument(
+        "directory",
+        help="datasheet 目录 (递归导入 .pdf/.txt/.md/.csv)"
+    )
+    ingest_parser.add_argument(
+        "--batch-size", "-b",
+        type=int,
+        default=500,
+        help="每批提交的条目数 (默认: 500)"
+    )
+    ingest_parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=None,
+        help="PDF 解析进程数 (默认: 配置中的 pdf_workers)"
+    )
+    ingest_parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="检查点文件路径 (默认: 知识库目录下的 ingest_checkpoint.sqlite)"
+    )
+    ingest_parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="忽略检查点，重新处理全部文件"
+    )
+    ingest_parser.add_argument(
+        "--no-embed",
+        action="store_true",
+        help="不生成向量嵌入"
+    )
+    
     # bom 命令
     bom_parser = subparsers.add_parser("bom", help="生成 BOM 清单")
     bom_parser.add_argument(
@@ -122,6 +157,36 @@ async def main():
             print(f"\n📄 解析结果:")
             print(json.dumps(result, indent=2, ensure_ascii=False))
         
+        elif args.command == "ingest":
+            from ops.ingest import ingest_directory
+            from ops.parser.pool import close_pdf_pool
+            
+            if args.workers:
+                config.pdf_workers = args.workers
+            
+            def show_progress(stats):
+                print(
+                    f"\r📥 {stats.processed}/{stats.total} "
+                    f"导入 {stats.imported} 跳过 {stats.skipped} 重复 {stats.duplicates} "
+                    f"失败 {stats.failed} ({stats.rate:.1f} 个/秒)",
+                    end="", flush=True
+                )
+            
+            try:
+                stats = await ingest_directory(
+                    args.directory,
+                    config=config,
+                    batch_size=args.batch_size,
+                    embed=not args.no_embed,
+                    checkpoint_path=args.checkpoint,
+                    resume=not args.no_resume,
+                    progress=show_progress,
+                )
+            finally:
+                close_pdf_pool()
+            print(f"\n\n✅ 导入完成 ({stats.elapsed:.1f} 秒):")
+            print(json.dumps(stats.to_dict(), indent=2, ensure_ascii=False))
+        
         elif args.command == "bom":
             from ops.utils import BomBuilder
             bom = BomBuilder()
@@ -155,5 +220,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import json
     asyncio.run(main())